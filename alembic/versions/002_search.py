@@ -0,0 +1,41 @@
+"""Full-text and prefix search indexes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Expressions must stay identical to app.search.book_document/author_document,
+# otherwise the planner will not use the indexes.
+BOOK_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, title), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, description), 'B')"
+)
+AUTHOR_DOCUMENT = "to_tsvector('simple'::regconfig, name)"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(f"CREATE INDEX ix_books_search ON books USING gin (({BOOK_DOCUMENT}))")
+    op.execute(f"CREATE INDEX ix_authors_search ON authors USING gin (({AUTHOR_DOCUMENT}))")
+
+    # trigram indexes serve LIKE 'prefix%' autocomplete on lower(...)
+    op.execute("CREATE INDEX ix_books_title_trgm ON books USING gin (lower(title) gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_authors_name_trgm ON authors USING gin (lower(name) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_authors_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_books_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_authors_search")
+    op.execute("DROP INDEX IF EXISTS ix_books_search")
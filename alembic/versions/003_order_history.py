@@ -0,0 +1,45 @@
+"""Order history indexes and per-user order totals
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_user_created",
+        "orders",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index("ix_orders_book_id", "orders", ["book_id"], unique=False)
+
+    op.create_table(
+        "user_order_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("order_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_spent", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute(
+        "INSERT INTO user_order_stats (user_id, order_count, total_spent) "
+        "SELECT user_id, count(*), sum(total_price) FROM orders GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_order_stats")
+    op.drop_index("ix_orders_book_id", table_name="orders")
+    op.drop_index("ix_orders_user_created", table_name="orders")
@@ -0,0 +1,58 @@
+"""Sales rollup tables
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "book_sales",
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("order_count", sa.BigInteger(), nullable=False),
+        sa.Column("units_sold", sa.BigInteger(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"]),
+        sa.PrimaryKeyConstraint("book_id"),
+    )
+    op.create_index("ix_book_sales_units_sold", "book_sales", ["units_sold"], unique=False)
+    op.create_index("ix_book_sales_revenue", "book_sales", ["revenue"], unique=False)
+
+    op.create_table(
+        "daily_book_sales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("order_count", sa.BigInteger(), nullable=False),
+        sa.Column("units_sold", sa.BigInteger(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"]),
+        sa.PrimaryKeyConstraint("day", "book_id"),
+    )
+
+    op.execute(
+        "INSERT INTO book_sales (book_id, order_count, units_sold, revenue) "
+        "SELECT book_id, count(*), sum(quantity), sum(total_price) FROM orders GROUP BY book_id"
+    )
+    op.execute(
+        "INSERT INTO daily_book_sales (day, book_id, order_count, units_sold, revenue) "
+        "SELECT date(created_at), book_id, count(*), sum(quantity), sum(total_price) "
+        "FROM orders GROUP BY date(created_at), book_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_book_sales")
+    op.drop_index("ix_book_sales_revenue", table_name="book_sales")
+    op.drop_index("ix_book_sales_units_sold", table_name="book_sales")
+    op.drop_table("book_sales")
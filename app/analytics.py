@@ -0,0 +1,234 @@
+"""Sales analytics served from the rollup tables.
+
+crud.record_order_totals keeps book_sales and daily_book_sales in step with
+`orders`; `reconcile` checks them against the raw orders and can rebuild
+them from scratch.
+
+    python -m app.analytics reconcile
+    python -m app.analytics reconcile --repair
+"""
+import argparse
+import asyncio
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+from sqlalchemy import Date, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models import Author, Book, BookSales, DailyBookSales, Order
+
+MAX_REPORTED_MISMATCHES = 100
+
+
+async def top_books(
+    db: AsyncSession, limit: int = 10, by: Literal["units", "revenue"] = "units"
+) -> list:
+    order = BookSales.units_sold if by == "units" else BookSales.revenue
+    result = await db.execute(
+        select(
+            BookSales.book_id,
+            Book.title,
+            BookSales.order_count,
+            BookSales.units_sold,
+            BookSales.revenue,
+        )
+        .join(Book, Book.id == BookSales.book_id)
+        .order_by(order.desc(), BookSales.book_id)
+        .limit(limit)
+    )
+    return list(result.all())
+
+
+async def revenue_by_author(db: AsyncSession, limit: int = 10) -> list:
+    revenue = func.sum(BookSales.revenue).label("revenue")
+    result = await db.execute(
+        select(
+            Author.id.label("author_id"),
+            Author.name,
+            func.sum(BookSales.units_sold).label("units_sold"),
+            revenue,
+        )
+        .join(Book, Book.id == BookSales.book_id)
+        .join(Author, Author.id == Book.author_id)
+        .group_by(Author.id, Author.name)
+        .order_by(revenue.desc(), Author.id)
+        .limit(limit)
+    )
+    return list(result.all())
+
+
+async def daily_sales(db: AsyncSession, date_from: date, date_to: date) -> list:
+    result = await db.execute(
+        select(
+            DailyBookSales.day,
+            func.sum(DailyBookSales.order_count).label("order_count"),
+            func.sum(DailyBookSales.units_sold).label("units_sold"),
+            func.sum(DailyBookSales.revenue).label("revenue"),
+        )
+        .where(DailyBookSales.day.between(date_from, date_to))
+        .group_by(DailyBookSales.day)
+        .order_by(DailyBookSales.day)
+    )
+    return list(result.all())
+
+
+class RollupMismatch(BaseModel):
+    table: str
+    key: str
+    expected: tuple[int, int, int] | None
+    actual: tuple[int, int, int] | None
+
+
+class ReconcileReport(BaseModel):
+    books_checked: int = 0
+    days_checked: int = 0
+    mismatched: int = 0
+    mismatches: list[RollupMismatch] = []
+    repaired: bool = False
+
+
+def _order_day():
+    # type_=Date so SQLite's 'YYYY-MM-DD' strings come back as dates
+    return func.date(Order.created_at, type_=Date)
+
+
+def _book_totals_from_orders():
+    return select(
+        Order.book_id,
+        func.count(),
+        func.sum(Order.quantity),
+        func.sum(Order.total_price),
+    ).group_by(Order.book_id)
+
+
+def _daily_totals_from_orders():
+    day = _order_day()
+    return select(
+        day,
+        Order.book_id,
+        func.count(),
+        func.sum(Order.quantity),
+        func.sum(Order.total_price),
+    ).group_by(day, Order.book_id)
+
+
+async def _lock_rollups(db: AsyncSession) -> None:
+    # Postgres: new orders wait while we rebuild; orders already in flight
+    # finish first, so nothing is half-counted
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE book_sales, daily_book_sales IN EXCLUSIVE MODE"))
+
+
+def _compare(table: str, expected: dict, actual: dict, report: ReconcileReport) -> None:
+    for key in expected.keys() | actual.keys():
+        if expected.get(key) != actual.get(key):
+            report.mismatched += 1
+            if len(report.mismatches) < MAX_REPORTED_MISMATCHES:
+                report.mismatches.append(
+                    RollupMismatch(
+                        table=table,
+                        key=":".join(map(str, key)),
+                        expected=expected.get(key),
+                        actual=actual.get(key),
+                    )
+                )
+
+
+async def rebuild_rollups(db: AsyncSession) -> None:
+    await db.execute(delete(BookSales))
+    await db.execute(delete(DailyBookSales))
+    await db.execute(
+        insert(BookSales).from_select(
+            ["book_id", "order_count", "units_sold", "revenue"], _book_totals_from_orders()
+        )
+    )
+    await db.execute(
+        insert(DailyBookSales).from_select(
+            ["day", "book_id", "order_count", "units_sold", "revenue"],
+            _daily_totals_from_orders(),
+        )
+    )
+
+
+async def _compare_rollups(db: AsyncSession | AsyncConnection) -> ReconcileReport:
+    report = ReconcileReport()
+
+    expected = {
+        (book_id,): tuple(totals)
+        for book_id, *totals in await db.execute(_book_totals_from_orders())
+    }
+    actual = {
+        (book_id,): tuple(totals)
+        for book_id, *totals in await db.execute(
+            select(
+                BookSales.book_id,
+                BookSales.order_count,
+                BookSales.units_sold,
+                BookSales.revenue,
+            )
+        )
+    }
+    report.books_checked = len(expected)
+    _compare("book_sales", expected, actual, report)
+
+    expected = {
+        (day, book_id): tuple(totals)
+        for day, book_id, *totals in await db.execute(_daily_totals_from_orders())
+    }
+    actual = {
+        (day, book_id): tuple(totals)
+        for day, book_id, *totals in await db.execute(
+            select(
+                DailyBookSales.day,
+                DailyBookSales.book_id,
+                DailyBookSales.order_count,
+                DailyBookSales.units_sold,
+                DailyBookSales.revenue,
+            )
+        )
+    }
+    report.days_checked = len({day for day, _ in expected})
+    _compare("daily_book_sales", expected, actual, report)
+    return report
+
+
+async def reconcile(db: AsyncSession, repair: bool = False) -> ReconcileReport:
+    if not repair and db.bind.dialect.name == "postgresql":
+        # comparing only needs one snapshot of orders and rollups, not a lock
+        # that would stall checkouts for two full scans of `orders`
+        async with db.bind.connect() as conn:
+            await conn.execution_options(
+                isolation_level="REPEATABLE READ", postgresql_readonly=True
+            )
+            async with conn.begin():
+                return await _compare_rollups(conn)
+
+    if repair:
+        await _lock_rollups(db)
+    report = await _compare_rollups(db)
+    if repair and report.mismatched:
+        await rebuild_rollups(db)
+        report.repaired = True
+    return report
+
+
+async def main(repair: bool) -> None:
+    from app.database import get_engines
+
+    async with get_engines().async_session() as db:
+        report = await reconcile(db, repair=repair)
+        await db.commit()
+    await get_engines().engine.dispose()
+    print(report.model_dump_json(indent=2))
+    if report.mismatched and not report.repaired:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sales rollup maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = subcommands.add_parser("reconcile", help="compare rollups with orders")
+    reconcile_parser.add_argument("--repair", action="store_true", help="rebuild on mismatch")
+    args = parser.parse_args()
+    asyncio.run(main(args.repair))
@@ -0,0 +1,275 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from contextvars import ContextVar
+from typing import Generic, TypeVar
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import read_lag
+from app.metrics import registry
+
+V = TypeVar("V")
+
+cache_hits = registry.counter(
+    "cache_hits_total",
+    "Lookups that found a live entry, by cache",
+    labelnames=("cache",),
+)
+cache_misses = registry.counter(
+    "cache_misses_total",
+    "Lookups that found no entry or an expired one, by cache",
+    labelnames=("cache",),
+)
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """In-process LRU cache with a per-entry time to live.
+
+    Not thread-safe: it is meant to be used from the event loop only.
+    Caches given a `name` export their hits and misses to /metrics.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        on_evict: Callable[[Hashable, V], None] | None = None,
+        name: str | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.name = name
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None) -> V | None:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self._missed()
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._evicted(key, value)
+            self._missed()
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        if self.name is not None:
+            cache_hits.inc(cache=self.name)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            evicted_key, (_, evicted_value) = self._data.popitem(last=False)
+            self._evicted(evicted_key, evicted_value)
+
+    def delete(self, key: Hashable) -> V | None:
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _missed(self) -> None:
+        self.misses += 1
+        if self.name is not None:
+            cache_misses.inc(cache=self.name)
+
+    def _evicted(self, key: Hashable, value: V) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(ABC):
+    """Storage for serialized responses.
+
+    Entries carry tags so that a write can drop every response that
+    rendered a given book or author without knowing the exact keys.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None: ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int):
+        self._entries: TTLCache[tuple[bytes, tuple[str, ...]]] = TTLCache(
+            max_size=max_entries, ttl=0, on_evict=self._untag
+        )
+        self._tags: dict[str, set[str]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        previous = self._entries.delete(key)
+        if previous:
+            self._untag(key, previous)
+        self._entries.set(key, (value, tags), ttl=ttl)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                entry = self._entries.delete(key)
+                if entry:
+                    self._untag(key, entry)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _untag(self, key: str, entry: tuple[bytes, tuple[str, ...]]) -> None:
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# when the current request missed the cache, i.e. started reading from the database
+_missed_at: ContextVar[float | None] = ContextVar("response_cache_missed_at", default=None)
+
+# how long an invalidation is remembered; a read that takes longer may store a stale entry
+INVALIDATION_WINDOW_SECONDS = 60.0
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._invalidated_at: TTLCache[float] = TTLCache(
+            max_size=100_000, ttl=INVALIDATION_WINDOW_SECONDS
+        )
+
+    async def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            cache_misses.inc(cache="response")
+            _missed_at.set(time.monotonic())
+        else:
+            self.hits += 1
+            cache_hits.inc(cache="response")
+        return value
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = ()) -> None:
+        if not self.enabled:
+            return
+        tags = tuple(tags)
+        if self._invalidated_since_read(tags):
+            # read before a write committed: storing it would bring the old row back
+            return
+        await self.backend.set(key, value, self.ttl, tags)
+
+    async def invalidate(self, *tags: str) -> None:
+        # invalidation runs even when reads are disabled so toggling stays safe
+        now = time.monotonic()
+        for tag in tags:
+            self._invalidated_at.set(tag, now)
+        await self.backend.invalidate_tags(tags)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        self._invalidated_at.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _invalidated_since_read(self, tags: tuple[str, ...]) -> bool:
+        missed_at = _missed_at.get()
+        if missed_at is None:
+            return False
+        # a lagging replica may not have the write yet even if the read started after it
+        since = missed_at - read_lag.get()
+        return any(self._invalidated_at.get(tag, -1.0) >= since for tag in tags)
+
+
+response_cache = ResponseCache(
+    backend=InMemoryCacheBackend(max_entries=settings.response_cache_max_entries),
+    ttl=settings.response_cache_ttl_seconds,
+    enabled=settings.response_cache_enabled,
+)
+
+
+BOOK_LISTS_TAG = "books:list"
+
+
+def book_tag(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+def author_tag(author_id: int) -> str:
+    return f"author:{author_id}"
+
+
+def author_books_tag(author_id: int) -> str:
+    return f"books:list:author:{author_id}"
+
+
+PENDING_TAGS_KEY = "response_cache_tags"
+
+
+def invalidate_on_commit(db: AsyncSession, *tags: str) -> None:
+    """Drop responses tagged with `tags` once `db` commits.
+
+    Invalidating before the commit would let a concurrent read put the old
+    row back in the cache.
+    """
+    db.info.setdefault(PENDING_TAGS_KEY, set()).update(tags)
+
+
+async def flush_invalidations(db: AsyncSession) -> None:
+    tags = db.info.pop(PENDING_TAGS_KEY, None)
+    if tags:
+        await response_cache.invalidate(*tags)
+
+
+def discard_invalidations(db: AsyncSession) -> None:
+    db.info.pop(PENDING_TAGS_KEY, None)
+
+
+def cached_json_response(body: bytes, hit: bool) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Cache": "HIT" if hit else "MISS"},
+    )
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -12,8 +15,98 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: str
 
+    # comma-separated read replica URLs; empty means all reads go to the primary
+    database_replica_urls: str = ""
+    replica_retry_seconds: float = 30.0
+    read_your_writes_seconds: float = 5.0
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg only: SQLAlchemy's prepared statement LRU and asyncpg's own cache
+    # (set both to 0 behind pgbouncer in transaction mode)
+    db_prepared_statement_cache_size: int = 100
+    db_statement_cache_size: int = 100
+
+    # opaque, rotated on every use; renewing costs a lookup instead of bcrypt
+    refresh_token_expire_days: int = 30
+
+    # "jose" supports every algorithm; "hmac" is a faster HS256/384/512-only path
+    token_backend: Literal["jose", "hmac"] = "jose"
+    # kid stamped on new tokens, and JSON {kid: key} of keys accepted when
+    # verifying (public keys for RS*/ES*; for HS* the secret_key is added under jwt_key_id)
+    jwt_key_id: str = ""
+    jwt_verify_keys: str = ""
+    # verified token -> claims, bounded by each token's exp
+    token_cache_max_size: int = 10_000
+    token_cache_ttl_seconds: float = 300.0
+
+    principal_cache_ttl_seconds: float = 60.0
+    principal_cache_max_size: int = 10_000
+
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: float = 30.0
+    response_cache_max_entries: int = 10_000
+
+    # row_lock: SELECT ... FOR UPDATE then check in Python
+    # atomic: single conditional UPDATE ... RETURNING, no lock held across round-trips
+    stock_reservation_mode: Literal["row_lock", "atomic"] = "row_lock"
+
+    # token buckets, in cost units per second (most routes cost 1, login 10):
+    # every request spends from its client IP's bucket, authenticated ones
+    # from their user's bucket too
+    rate_limit_enabled: bool = True
+    rate_limit_ip_rate: float = 20.0
+    rate_limit_ip_burst: float = 100.0
+    rate_limit_user_rate: float = 50.0
+    rate_limit_user_burst: float = 200.0
+    rate_limit_max_keys: int = 100_000
+    # proxies in front of the app that append to X-Forwarded-For; 0 trusts none.
+    # docker-compose.yml publishes gunicorn directly, so 0 fits it; behind a
+    # reverse proxy or load balancer set the number of proxies, or all
+    # anonymous clients share the proxy's bucket
+    rate_limit_forwarded_hops: int = 0
+
+    # admission control per process: requests served at once (size it to about
+    # twice db_pool_size + db_max_overflow; 0 disables), extra requests allowed
+    # to wait, and how long they wait before 503
+    max_concurrent_requests: int = 30
+    max_queued_requests: int = 100
+    admission_timeout_seconds: float = 1.0
+
+    # per-route HTTP and per-request SQL metrics on /metrics
+    metrics_enabled: bool = True
+
+    # development/staging only: per-request statement log, N+1 warnings,
+    # EXPLAIN of slow queries and an X-Query-Summary response header
+    query_diagnostics: bool = False
+    slow_query_ms: float = 100.0
+    explain_slow_queries: bool = True
+    query_repeat_threshold: int = 3
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings()
+
+
+class LazySettings:
+    """Reads the environment on first attribute access instead of at import.
+
+    Attributes set on the proxy (e.g. by monkeypatch) shadow the real settings.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+
+settings = LazySettings()
@@ -1,10 +1,46 @@
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+import secrets
+from collections.abc import Sequence
+
+from datetime import datetime, timedelta
 
-from app.models import Author, Book, Order, User
-from app.schemas import AuthorCreate, BookCreate, BookUpdate, OrderCreate, UserCreate
-from app.security import get_password_hash
+from sqlalchemy import Result, Row, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.config import settings
+from app.models import (
+    Author,
+    Book,
+    BookSales,
+    DailyBookSales,
+    Order,
+    RefreshToken,
+    User,
+    UserOrderStats,
+)
+from app.schemas import (
+    AuthorCreate,
+    BookCreate,
+    BookUpdate,
+    OrderBatchCreate,
+    OrderCreate,
+    UserCreate,
+)
+from app.security import password_hasher
+from app.tokens import new_refresh_token, refresh_token_digest
+
+# column sets for the read paths that render straight from row tuples
+BOOK_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.description,
+    Book.price,
+    Book.stock_quantity,
+    Book.author_id,
+    Book.created_at,
+)
+AUTHOR_COLUMNS = (Author.id, Author.name, Author.bio, Author.birth_date)
 
 
 async def get_author(db: AsyncSession, author_id: int) -> Author | None:
@@ -14,6 +50,23 @@ async def get_author(db: AsyncSession, author_id: int) -> Author | None:
     return result.scalar_one_or_none()
 
 
+async def get_author_row(db: AsyncSession, author_id: int) -> Row | None:
+    result = await db.execute(select(*AUTHOR_COLUMNS).where(Author.id == author_id))
+    return result.one_or_none()
+
+
+async def get_author_book_rows(db: AsyncSession, author_id: int) -> list[Row]:
+    result = await db.execute(
+        select(*BOOK_COLUMNS).where(Book.author_id == author_id).order_by(Book.id)
+    )
+    return list(result.all())
+
+
+async def author_exists(db: AsyncSession, author_id: int) -> bool:
+    result = await db.execute(select(Author.id).where(Author.id == author_id))
+    return result.scalar_one_or_none() is not None
+
+
 async def get_author_by_name(db: AsyncSession, name: str) -> Author | None:
     result = await db.execute(select(Author).where(Author.name == name))
     return result.scalar_one_or_none()
@@ -24,6 +77,13 @@ async def get_authors(db: AsyncSession, skip: int = 0, limit: int = 100) -> list
     return list(result.scalars().all())
 
 
+async def get_author_rows(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[Row]:
+    result = await db.execute(
+        select(*AUTHOR_COLUMNS).order_by(Author.id).offset(skip).limit(limit)
+    )
+    return list(result.all())
+
+
 async def create_author(db: AsyncSession, author: AuthorCreate) -> Author:
     db_author = Author(**author.model_dump())
     db.add(db_author)
@@ -33,35 +93,104 @@ async def create_author(db: AsyncSession, author: AuthorCreate) -> Author:
 
 
 async def get_book(db: AsyncSession, book_id: int) -> Book | None:
-    result = await db.execute(select(Book).where(Book.id == book_id))
+    result = await db.execute(
+        select(Book).options(joinedload(Book.author)).where(Book.id == book_id)
+    )
     return result.scalar_one_or_none()
 
 
-async def get_books(
+async def _paginate_books(
     db: AsyncSession,
-    skip: int = 0,
-    limit: int = 100,
-    author_id: int | None = None,
-) -> tuple[list[Book], int]:
-    query = select(Book)
+    query,
+    skip: int,
+    limit: int,
+    author_id: int | None,
+    after_id: int | None,
+    with_total: bool,
+) -> tuple[Result, int | None]:
+    query = query.order_by(Book.id)
     count_query = select(func.count(Book.id))
 
     if author_id:
         query = query.where(Book.author_id == author_id)
         count_query = count_query.where(Book.author_id == author_id)
 
-    total_result = await db.execute(count_query)
-    total = total_result.scalar_one()
+    total = None
+    if with_total:
+        total_result = await db.execute(count_query)
+        total = total_result.scalar_one()
+
+    if after_id is not None:
+        # keyset: seek past the last seen id instead of scanning `skip` rows
+        query = query.where(Book.id > after_id)
+    else:
+        query = query.offset(skip)
+
+    return await db.execute(query.limit(limit)), total
 
-    result = await db.execute(query.offset(skip).limit(limit))
+
+async def get_books(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    author_id: int | None = None,
+    after_id: int | None = None,
+    with_total: bool = True,
+) -> tuple[list[Book], int | None]:
+    result, total = await _paginate_books(
+        db,
+        select(Book).options(joinedload(Book.author)),
+        skip,
+        limit,
+        author_id,
+        after_id,
+        with_total,
+    )
     return list(result.scalars().all()), total
 
 
+async def get_book_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    author_id: int | None = None,
+    after_id: int | None = None,
+    with_total: bool = True,
+    book_columns: Sequence = BOOK_COLUMNS,
+    with_author: bool = True,
+) -> tuple[list[Row], int | None]:
+    """Like get_books, but as (*book_columns, *AUTHOR_COLUMNS) tuples.
+
+    Leaving out columns (e.g. the unbounded description) keeps them off the
+    wire from the database, not just out of the response.
+    """
+    query = select(*book_columns)
+    if with_author:
+        query = query.add_columns(*AUTHOR_COLUMNS).join(Author)
+    result, total = await _paginate_books(
+        db,
+        query,
+        skip,
+        limit,
+        author_id,
+        after_id,
+        with_total,
+    )
+    return list(result.all()), total
+
+
+async def get_book_row(db: AsyncSession, book_id: int) -> Row | None:
+    result = await db.execute(
+        select(*BOOK_COLUMNS, *AUTHOR_COLUMNS).join(Author).where(Book.id == book_id)
+    )
+    return result.one_or_none()
+
+
 async def create_book(db: AsyncSession, book: BookCreate) -> Book:
     db_book = Book(**book.model_dump())
     db.add(db_book)
     await db.flush()
-    await db.refresh(db_book)
+    await db.refresh(db_book, ["author"])
     return db_book
 
 
@@ -75,17 +204,16 @@ async def update_book(db: AsyncSession, book_id: int, book_update: BookUpdate) -
         setattr(db_book, field, value)
 
     await db.flush()
-    await db.refresh(db_book)
     return db_book
 
 
-async def delete_book(db: AsyncSession, book_id: int) -> bool:
+async def delete_book(db: AsyncSession, book_id: int) -> Book | None:
     db_book = await get_book(db, book_id)
     if not db_book:
-        return False
+        return None
     await db.delete(db_book)
     await db.flush()
-    return True
+    return db_book
 
 
 async def get_user(db: AsyncSession, user_id: int) -> User | None:
@@ -93,6 +221,11 @@ async def get_user(db: AsyncSession, user_id: int) -> User | None:
     return result.scalar_one_or_none()
 
 
+async def get_user_principal(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User.id, User.role).where(User.id == user_id))
+    return result.one_or_none()
+
+
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     result = await db.execute(select(User).where(User.username == username))
     return result.scalar_one_or_none()
@@ -104,7 +237,7 @@ async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
 
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -116,40 +249,279 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     return db_user
 
 
-async def get_book_for_update(db: AsyncSession, book_id: int) -> Book | None:
-    from sqlalchemy.orm import lazyload
+async def update_user_password(db: AsyncSession, user: User, hashed_password: str) -> User:
+    user.password = hashed_password
+    await db.flush()
+    return user
+
+
+class RefreshTokenReused(Exception):
+    """A used refresh token was presented again and its family revoked."""
+
+
+async def create_refresh_token(
+    db: AsyncSession, user_id: int, family_id: str | None = None
+) -> str:
+    token = new_refresh_token()
+    await db.execute(
+        insert(RefreshToken).values(
+            token_hash=refresh_token_digest(token),
+            user_id=user_id,
+            family_id=family_id or secrets.token_hex(16),
+            expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[int, str] | None:
+    """Exchange a refresh token for the next one in its family: (user_id, new token).
+
+    None for unknown, expired or revoked tokens. A token that was already
+    used revokes its whole family and raises RefreshTokenReused; the caller
+    commits the revocation.
+    """
+    digest = refresh_token_digest(token)
+    now = datetime.utcnow()
+    # claiming the token is a single statement, so two concurrent refreshes
+    # cannot both succeed
     result = await db.execute(
-        select(Book)
-        .options(lazyload(Book.author))
-        .where(Book.id == book_id)
-        .with_for_update()
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == digest,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
     )
+    row = result.one_or_none()
+    if row:
+        return row.user_id, await create_refresh_token(db, row.user_id, row.family_id)
+
+    # a used token shown again has leaked: whoever holds its successor may be the thief
+    family_id = await db.scalar(
+        select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == digest, RefreshToken.used_at.is_not(None)
+        )
+    )
+    if family_id is None:
+        return None
+    await revoke_refresh_family(db, family_id)
+    raise RefreshTokenReused("Refresh token reuse detected")
+
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str, user_id: int) -> bool:
+    family_id = await db.scalar(
+        select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == refresh_token_digest(token),
+            RefreshToken.user_id == user_id,
+        )
+    )
+    if family_id is None:
+        return False
+    await revoke_refresh_family(db, family_id)
+    return True
+
+
+async def get_book_for_update(db: AsyncSession, book_id: int) -> Book | None:
+    result = await db.execute(select(Book).where(Book.id == book_id).with_for_update())
     return result.scalar_one_or_none()
 
 
-async def create_order(
-    db: AsyncSession,
-    user_id: int,
-    order_data: OrderCreate,
-) -> Order:
-    book = await get_book_for_update(db, order_data.book_id)
+async def reserve_stock(db: AsyncSession, book_id: int, quantity: int) -> int:
+    result = await db.execute(
+        update(Book)
+        .where(Book.id == book_id, Book.stock_quantity >= quantity)
+        .values(stock_quantity=Book.stock_quantity - quantity)
+        .returning(Book.price, Book.stock_quantity)
+    )
+    row = result.one_or_none()
+    if row:
+        return row.price
+
+    # the UPDATE matched nothing: only now pay for finding out why
+    available = await db.scalar(select(Book.stock_quantity).where(Book.id == book_id))
+    if available is None:
+        raise ValueError("Book not found")
+    raise ValueError(f"Not enough stock. Available: {available}, requested: {quantity}")
+
+
+async def reserve_stock_with_lock(db: AsyncSession, book_id: int, quantity: int) -> int:
+    book = await get_book_for_update(db, book_id)
     if not book:
         raise ValueError("Book not found")
 
-    if book.stock_quantity < order_data.quantity:
+    if book.stock_quantity < quantity:
         raise ValueError(
-            f"Not enough stock. Available: {book.stock_quantity}, requested: {order_data.quantity}"
+            f"Not enough stock. Available: {book.stock_quantity}, requested: {quantity}"
         )
 
-    book.stock_quantity -= order_data.quantity
+    book.stock_quantity -= quantity
+    return book.price
+
+
+async def create_order(
+    db: AsyncSession,
+    user_id: int,
+    order_data: OrderCreate,
+) -> Order:
+    if settings.stock_reservation_mode == "atomic":
+        price = await reserve_stock(db, order_data.book_id, order_data.quantity)
+    else:
+        price = await reserve_stock_with_lock(db, order_data.book_id, order_data.quantity)
 
     order = Order(
         user_id=user_id,
         book_id=order_data.book_id,
         quantity=order_data.quantity,
-        total_price=book.price * order_data.quantity,
+        total_price=price * order_data.quantity,
     )
     db.add(order)
     await db.flush()
     await db.refresh(order)
+    # The book row stays locked until commit, so these upserts lengthen that
+    # window; orders for one book already queue on its row, so no new waits.
+    await record_order_totals(db, user_id, [order])
     return order
+
+
+async def get_books_for_update(db: AsyncSession, book_ids: list[int]) -> dict[int, Book]:
+    # one statement, rows locked in id order so concurrent carts can't deadlock
+    result = await db.execute(
+        select(Book).where(Book.id.in_(book_ids)).order_by(Book.id).with_for_update()
+    )
+    return {book.id: book for book in result.scalars()}
+
+
+async def create_orders_batch(
+    db: AsyncSession,
+    user_id: int,
+    batch: OrderBatchCreate,
+) -> list[Order]:
+    requested: dict[int, int] = {}
+    for item in batch.items:
+        requested[item.book_id] = requested.get(item.book_id, 0) + item.quantity
+
+    books = await get_books_for_update(db, sorted(requested))
+
+    for book_id, quantity in requested.items():
+        book = books.get(book_id)
+        if not book:
+            raise ValueError(f"Book {book_id} not found")
+        if book.stock_quantity < quantity:
+            raise ValueError(
+                f"Not enough stock for book {book_id}. "
+                f"Available: {book.stock_quantity}, requested: {quantity}"
+            )
+
+    for book_id, quantity in requested.items():
+        books[book_id].stock_quantity -= quantity
+
+    result = await db.scalars(
+        insert(Order).returning(Order),
+        [
+            {
+                "user_id": user_id,
+                "book_id": item.book_id,
+                "quantity": item.quantity,
+                "total_price": books[item.book_id].price * item.quantity,
+            }
+            for item in batch.items
+        ],
+    )
+    orders = list(result.all())
+    await record_order_totals(db, user_id, orders)
+    return orders
+
+
+def _upsert(db: AsyncSession, table):
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+async def _increment(db: AsyncSession, model, key: tuple[str, ...], rows: list[dict]) -> None:
+    """Add the non-key columns of `rows` onto existing rows, inserting missing ones.
+
+    A single atomic upsert, so concurrent orders can't lose updates.
+    """
+    stmt = _upsert(db, model).values(sorted(rows, key=lambda row: [row[k] for k in key]))
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                name: getattr(model, name) + stmt.excluded[name]
+                for name in rows[0]
+                if name not in key
+            },
+        )
+    )
+
+
+async def record_order_totals(db: AsyncSession, user_id: int, orders: list[Order]) -> None:
+    """Fold new orders into the rollup tables, in the orders' own transaction."""
+    await _increment(
+        db,
+        UserOrderStats,
+        ("user_id",),
+        [
+            {
+                "user_id": user_id,
+                "order_count": len(orders),
+                "total_spent": sum(order.total_price for order in orders),
+            }
+        ],
+    )
+
+    books: dict[int, dict] = {}
+    days: dict[tuple, dict] = {}
+    for order in orders:
+        for totals in (
+            books.setdefault(order.book_id, {"book_id": order.book_id}),
+            days.setdefault(
+                (order.created_at.date(), order.book_id),
+                {"day": order.created_at.date(), "book_id": order.book_id},
+            ),
+        ):
+            totals["order_count"] = totals.get("order_count", 0) + 1
+            totals["units_sold"] = totals.get("units_sold", 0) + order.quantity
+            totals["revenue"] = totals.get("revenue", 0) + order.total_price
+
+    await _increment(db, BookSales, ("book_id",), list(books.values()))
+    await _increment(db, DailyBookSales, ("day", "book_id"), list(days.values()))
+
+
+async def get_user_order_stats(db: AsyncSession, user_id: int) -> tuple[int, int]:
+    result = await db.execute(
+        select(UserOrderStats.order_count, UserOrderStats.total_spent).where(
+            UserOrderStats.user_id == user_id
+        )
+    )
+    row = result.one_or_none()
+    return (row.order_count, row.total_spent) if row else (0, 0)
+
+
+async def get_user_orders(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 20,
+    before: tuple[datetime, int] | None = None,
+) -> list[Order]:
+    """Newest first; `before` is the (created_at, id) of the last order seen."""
+    query = select(Order).where(Order.user_id == user_id)
+    if before is not None:
+        query = query.where(tuple_(Order.created_at, Order.id) < before)
+    result = await db.execute(
+        query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+    )
+    return list(result.scalars().all())
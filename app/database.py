@@ -1,26 +1,401 @@
-from collections.abc import AsyncGenerator
+import itertools
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
+from http.cookies import SimpleCookie
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
 
 from app.config import settings
+from app.metrics import registry
+
+pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool",
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after pool_timeout",
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start)
+
+
+def engine_options(database_url: str) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # a single shared in-memory connection, nothing to size
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+transaction_seconds = registry.histogram(
+    "db_transaction_seconds",
+    "Time a request held its database transaction or read connection",
+    labelnames=("route", "mode"),
+)
+
+
+def _pool_stat(name: str) -> float:
+    if _engines is None:
+        return 0
+    pool = _engines.engine.sync_engine.pool
+    return getattr(pool, name)() if isinstance(pool, InstrumentedQueuePool) else 0
+
+
+registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    callback=lambda: _pool_stat("checkedout"),
+)
+registry.gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    callback=lambda: _pool_stat("overflow"),
+)
+registry.gauge(
+    "db_pool_size",
+    "Configured pool size",
+    callback=lambda: _pool_stat("size"),
+)
+
+
+replica_failovers = registry.counter(
+    "db_replica_failovers_total",
+    "Reads moved off a replica that could not hand out a connection",
+)
+
+# how far behind the primary this request's reads may be; the response cache uses it
+read_lag: ContextVar[float] = ContextVar("read_lag", default=0.0)
+
+
+class ReplicaSession(Session):
+    """Session that reads from a replica, or the primary if no replica can be reached.
+
+    The connection is taken on first use, so a request answered from the
+    response cache never touches the database. If the replica fails to
+    connect or its pool times out, the request moves on to the next healthy
+    replica and then the primary instead of failing.
+    """
+
+    def __init__(self, *args, replica: "Replica", streaming: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+        self.streaming = streaming
+        self._bind: Engine | None = None
+
+    def get_bind(self, *args, **kwargs) -> Engine:
+        if self._bind is None:
+            self._bind = self._connect()
+        return self._bind
+
+    def _connect(self) -> Engine:
+        engines = get_engines()
+        replica, tried = self.replica, set()
+        while replica is not None and replica not in tried:
+            tried.add(replica)
+            bind = (replica.engine if self.streaming else replica.read_engine).sync_engine
+            try:
+                self.connection(bind_arguments={"bind": bind})
+                return bind
+            except exc.TimeoutError:
+                # pool exhausted: busy rather than down
+                pass
+            except exc.DBAPIError:
+                # nothing ran yet: failing here means the replica cannot be reached
+                engines.router.mark_down(replica)
+            replica_failovers.inc()
+            replica = engines.router.pick()
+        primary = engines.async_session if self.streaming else engines.read_session
+        return primary.kw["bind"].sync_engine
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+        self.sessionmaker = async_sessionmaker(
+            self.read_engine,
+            expire_on_commit=False,
+            sync_session_class=ReplicaSession,
+            replica=self,
+        )
+        self.stream_sessionmaker = async_sessionmaker(
+            engine,
+            expire_on_commit=False,
+            sync_session_class=ReplicaSession,
+            replica=self,
+            streaming=True,
+        )
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+
+class EngineRouter:
+    """Round-robin over healthy read replicas, falling back to the primary."""
+
+    def __init__(self, replicas: list[Replica], retry_seconds: float):
+        self.replicas = replicas
+        self.retry_seconds = retry_seconds
+        self._next = itertools.cycle(range(len(replicas))) if replicas else None
+
+    def pick(self) -> Replica | None:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+
+
+class Engines:
+    """The primary engine, its sessionmakers and the replica router."""
+
+    def __init__(self):
+        self.engine = create_async_engine(
+            settings.database_url,
+            echo=False,
+            **engine_options(settings.database_url),
+        )
+        self.async_session = async_sessionmaker(self.engine, expire_on_commit=False)
+        # reads run without BEGIN/COMMIT: nothing to commit, no transaction held while rendering
+        self.read_session = async_sessionmaker(
+            self.engine.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False
+        )
+        self.router = EngineRouter(
+            [
+                Replica(create_async_engine(url.strip(), echo=False, **engine_options(url.strip())))
+                for url in settings.database_replica_urls.split(",")
+                if url.strip()
+            ],
+            retry_seconds=settings.replica_retry_seconds,
+        )
+
+
+_engines: Engines | None = None
+
+
+def get_engines() -> Engines:
+    """The engines, created once on first use rather than at import."""
+    global _engines
+    if _engines is None:
+        _engines = Engines()
+    return _engines
 
-engine = create_async_engine(settings.database_url, echo=False)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+PRIMARY_COOKIE = "db_primary_until"
 
 
 class Base(DeclarativeBase):
     pass
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+@event.listens_for(Session, "after_flush")
+def _mark_writes(session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state) -> None:
+    # bulk INSERT and UPDATE ... RETURNING statements never go through a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_begin(session, transaction, connection) -> None:
+    session.info.setdefault("began_at", time.perf_counter())
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    # read-your-writes: a client that just wrote keeps reading from the primary
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _primary_cookie(until: float) -> str:
+    cookie = SimpleCookie()
+    cookie[PRIMARY_COOKIE] = str(until)
+    cookie[PRIMARY_COOKIE]["max-age"] = int(settings.read_your_writes_seconds) + 1
+    cookie[PRIMARY_COOKIE]["path"] = "/"
+    cookie[PRIMARY_COOKIE]["httponly"] = True
+    cookie[PRIMARY_COOKIE]["samesite"] = "lax"
+    return cookie.output(header="").strip()
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client that just wrote to the primary via PRIMARY_COOKIE.
+
+    Plain ASGI: the cookie is added to http.response.start, which is sent
+    after session_scope committed and stored state["primary_until"].
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # the dict request.state wraps, shared with the route
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and "primary_until" in state:
+                MutableHeaders(scope=message).append(
+                    "set-cookie", _primary_cookie(state["primary_until"])
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _observe_transaction(session: AsyncSession, request: Request, mode: str) -> None:
+    began_at = session.info.pop("began_at", None)
+    if began_at is None:
+        # the request never touched the database (e.g. served from cache)
+        return
+    route = request.scope.get("route")
+    transaction_seconds.observe(
+        time.perf_counter() - began_at,
+        route=getattr(route, "path", request.url.path),
+        mode=mode,
+    )
+
+
+@asynccontextmanager
+async def session_scope(
+    sessionmaker: async_sessionmaker,
+    request: Request,
+    replica: Replica | None = None,
+    read_only: bool = False,
+) -> AsyncIterator[AsyncSession]:
+    # app.cache builds the response cache from settings; models import this module without them
+    from app.cache import discard_invalidations, flush_invalidations
+
+    async with sessionmaker() as session:
         try:
             yield session
-            await session.commit()
+            if not read_only:
+                await session.commit()
+                await flush_invalidations(session)
+        except exc.DBAPIError as e:
+            # a lost connection, not a statement timeout or cancelled query
+            if replica is not None and e.connection_invalidated:
+                get_engines().router.mark_down(replica)
+            discard_invalidations(session)
+            await session.rollback()
+            raise
         except Exception:
+            discard_invalidations(session)
             await session.rollback()
             raise
+        finally:
+            if read_only:
+                await session.close()
+            _observe_transaction(session, request, "read" if read_only else "write")
+        if session.info.get("has_writes"):
+            request.state.primary_until = time.time() + settings.read_your_writes_seconds
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with session_scope(get_engines().async_session, request) as session:
+        yield session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    engines = get_engines()
+    replica = None if reads_pinned_to_primary(request) else engines.router.pick()
+    sessionmaker = replica.sessionmaker if replica else engines.read_session
+    read_lag.set(settings.read_your_writes_seconds if replica else 0.0)
+    async with session_scope(sessionmaker, request, replica, read_only=True) as session:
+        yield session
+
+
+def get_read_db_factory(
+    request: Request,
+) -> Callable[[], AbstractAsyncContextManager[AsyncSession]]:
+    """Read sessions for streaming responses.
+
+    A StreamingResponse body runs after yield dependencies have exited, so the
+    endpoint opens the session itself once streaming starts. Server-side
+    cursors need a transaction, hence the non-AUTOCOMMIT sessionmakers; nothing
+    is committed and the transaction is rolled back on close.
+    """
+    engines = get_engines()
+    replica = None if reads_pinned_to_primary(request) else engines.router.pick()
+    sessionmaker = replica.stream_sessionmaker if replica else engines.async_session
+    return partial(session_scope, sessionmaker, request, replica, read_only=True)
+
+
+async def connect_engines() -> None:
+    """Open a connection to every database so the first request does not pay for it.
+
+    The primary must be reachable; a replica that is not is marked down.
+    """
+    engines = get_engines()
+    async with engines.engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    for replica in engines.router.replicas:
+        try:
+            async with replica.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except (exc.DBAPIError, OSError):
+            engines.router.mark_down(replica)
+
+
+async def dispose_engines() -> None:
+    if _engines is None:
+        return
+    await _engines.engine.dispose()
+    for replica in _engines.router.replicas:
+        await replica.engine.dispose()
 
 
 
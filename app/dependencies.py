@@ -1,21 +1,23 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import get_user
+from app.crud import get_user_principal
 from app.database import get_db
-from app.models import User, UserRole
-from app.security import decode_token
+from app.models import UserRole
+from app.principal import Principal, principal_cache
+from app.tokens import verify_request_token
 
 security = HTTPBearer()
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security), # ждет заголовок Authorization: Bearer <token>
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = await verify_request_token(request.scope, token)
 
     if not payload:
         raise HTTPException(
@@ -32,20 +34,26 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    user = await get_user(db, int(user_id))
-    if not user:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = await get_user_principal(db, int(user_id))
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    return user
+    principal = Principal(id=row.id, role=row.role)
+    principal_cache.set(user_id, principal)
+    return principal
 
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,222 @@
+"""Opt-in query diagnostics: statement log per request, N+1 and slow-query detection.
+
+Enabled with QUERY_DIAGNOSTICS=true (development and staging only: EXPLAIN
+runs an extra statement per slow query and the summary header exposes query
+counts). Tests use `capture_queries` to assert statement budgets:
+
+    with capture_queries() as log:
+        await client.get("/books")
+    log.assert_budget(2)
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "X-Query-Summary"
+
+# runs of bind markers, so IN lists of different lengths share a shape
+_BIND_LIST_RE = re.compile(r"(\?|\$\d+|%\(\w+\)s|:\w+)(\s*,\s*(\?|\$\d+|%\(\w+\)s|:\w+))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _SPACE_RE.sub(" ", _BIND_LIST_RE.sub("?", statement)).strip()
+
+
+@dataclass(slots=True)
+class QueryRecord:
+    statement: str
+    seconds: float
+
+
+@dataclass
+class QueryLog:
+    queries: list[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def statements(self) -> list[str]:
+        return [query.statement for query in self.queries]
+
+    @property
+    def seconds(self) -> float:
+        return sum(query.seconds for query in self.queries)
+
+    def reset(self) -> None:
+        self.queries.clear()
+
+    def repeated(self, threshold: int = 2) -> dict[str, int]:
+        """Statement shapes run at least `threshold` times: likely N+1."""
+        shapes = Counter(statement_shape(query.statement) for query in self.queries)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def summary(self, repeat_threshold: int = 2) -> str:
+        return (
+            f"queries={self.count}; time_ms={self.seconds * 1000:.1f}; "
+            f"repeated={len(self.repeated(repeat_threshold))}"
+        )
+
+    def assert_budget(self, max_queries: int, max_repeats: int | None = None) -> None:
+        problems = []
+        if self.count > max_queries:
+            problems.append(f"{self.count} statements, budget is {max_queries}")
+        if max_repeats is not None:
+            for shape, count in self.repeated(max_repeats + 1).items():
+                problems.append(f"{count}x (max {max_repeats}): {shape}")
+        if problems:
+            listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(self.statements))
+            raise AssertionError("; ".join(problems) + "\nStatements:\n" + listing)
+
+
+current_query_log: ContextVar[QueryLog | None] = ContextVar("current_query_log", default=None)
+
+
+_explaining: ContextVar[bool] = ContextVar("explaining", default=False)
+
+
+def _in_postgres_transaction(conn) -> bool:
+    return (
+        conn.dialect.name == "postgresql"
+        and conn.in_transaction()
+        and conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT"
+    )
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    token = _explaining.set(True)
+    try:
+        if _in_postgres_transaction(conn):
+            # a failed statement aborts the whole transaction; a savepoint contains it
+            with conn.begin_nested():
+                rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        else:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    except Exception as e:  # diagnostics must never break the request
+        return f"EXPLAIN failed: {e}"
+    finally:
+        _explaining.reset(token)
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._diagnostics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _explaining.get():
+        return
+    elapsed = time.perf_counter() - context._diagnostics_started_at
+    log = current_query_log.get()
+    if log is not None:
+        log.queries.append(QueryRecord(statement, elapsed))
+
+    if elapsed < settings.slow_query_ms / 1000:
+        return
+    plan = None
+    if (
+        settings.explain_slow_queries
+        and not executemany
+        and statement.lstrip().upper().startswith("SELECT")
+        # a server-side cursor is still open on this connection
+        and not context.execution_options.get("stream_results")
+    ):
+        plan = _explain(conn, statement, parameters)
+    logger.warning(
+        "Slow query (%.1f ms): %s%s",
+        elapsed * 1000,
+        statement,
+        f"\nPlan:\n{plan}" if plan else "",
+    )
+
+
+def query_diagnostics_enabled() -> bool:
+    return event.contains(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def enable_query_diagnostics() -> None:
+    if not query_diagnostics_enabled():
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def disable_query_diagnostics() -> None:
+    if query_diagnostics_enabled():
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def capture_queries(log: QueryLog | None = None):
+    """Collect the statements run in the current context (test helper).
+
+    Listeners it had to install are removed on exit, so slow-query logging
+    does not stay on for the rest of the process.
+    """
+    installed = not query_diagnostics_enabled()
+    enable_query_diagnostics()
+    log = log if log is not None else QueryLog()
+    token = current_query_log.set(log)
+    try:
+        yield log
+    finally:
+        current_query_log.reset(token)
+        if installed:
+            disable_query_diagnostics()
+
+
+def report_request(method: str, route: str, log: QueryLog) -> None:
+    for shape, count in log.repeated(settings.query_repeat_threshold).items():
+        logger.warning("Possible N+1 in %s %s: %d x %s", method, route, count, shape)
+
+
+class QueryDiagnosticsMiddleware:
+    """Groups statements per request, warns about N+1 and adds a summary header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                summary = log.summary(settings.query_repeat_threshold).encode()
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (SUMMARY_HEADER.lower().encode(), summary),
+                ]
+            await send(message)
+
+        token = current_query_log.set(log)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_log.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            report_request(scope["method"], route, log)
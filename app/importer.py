@@ -0,0 +1,304 @@
+"""Bulk catalogue import from NDJSON or CSV.
+
+Rows are validated and inserted in batches: authors are resolved through an
+in-memory name -> id map, missing authors are created with
+INSERT ... ON CONFLICT DO NOTHING, books go in as multi-row INSERTs.
+
+    python -m app.importer catalogue.ndjson
+    python -m app.importer catalogue.csv --format csv --batch-size 5000
+"""
+import argparse
+import asyncio
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Author, Book
+
+ImportFormat = Literal["ndjson", "csv"]
+
+MAX_REPORTED_ERRORS = 1000
+# longer lines are reported as row errors instead of being buffered
+MAX_LINE_BYTES = 1 << 20
+
+
+class ImportRow(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: str
+    price: int = Field(..., ge=0)
+    stock_quantity: int = Field(default=0, ge=0)
+    author_name: str = Field(..., min_length=1, max_length=255)
+    author_bio: str | None = None
+    author_birth_date: date | None = None
+
+    @field_validator("author_birth_date")
+    @classmethod
+    def birth_date_not_in_future(cls, v: date | None) -> date | None:
+        if v is not None and v > date.today():
+            raise ValueError("birth_date cannot be in the future")
+        return v
+
+
+class RowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    authors_created: int = 0
+    errors: list[RowError] = []
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line=line, error=error))
+
+
+_rows_adapter = TypeAdapter(list[ImportRow])
+
+
+@dataclass(frozen=True, slots=True)
+class BadLine:
+    error: str
+
+
+def _decode_line(line: bytes, max_line_bytes: int) -> str | BadLine:
+    if len(line) > max_line_bytes:
+        return BadLine(f"Line longer than {max_line_bytes} bytes")
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return BadLine(f"Invalid UTF-8 at byte {e.start}")
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int | None = None
+) -> AsyncIterator[str | BadLine]:
+    max_line_bytes = max_line_bytes or MAX_LINE_BYTES
+    buffer = b""
+    # the rest of a line already reported as too long is dropped up to its newline
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield _decode_line(line, max_line_bytes)
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield BadLine(f"Line longer than {max_line_bytes} bytes")
+                skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield _decode_line(buffer, max_line_bytes)
+
+
+async def parse_ndjson(
+    lines: AsyncIterable[str | BadLine],
+) -> AsyncIterator[tuple[int, dict | str]]:
+    number = 0
+    async for line in lines:
+        number += 1
+        if isinstance(line, BadLine):
+            yield number, line.error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, f"Invalid JSON: {e.msg}"
+            continue
+        yield number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+async def parse_csv(
+    lines: AsyncIterable[str | BadLine],
+) -> AsyncIterator[tuple[int, dict | str]]:
+    header = None
+    pending: list[str] = []
+    start = number = 0
+    async for line in lines:
+        number += 1
+        if isinstance(line, BadLine):
+            # a bad line inside a quoted field spoils the whole record
+            yield (start if pending else number), line.error
+            pending = []
+            continue
+        if not pending:
+            start = number
+        pending.append(line)
+        # an odd number of quotes means a quoted field continues on the next line
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+
+        record = "\n".join(pending)
+        pending = []
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield start, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # empty CSV cells mean "not provided"
+        yield start, {key: value for key, value in zip(header, values) if value != ""}
+
+    if pending:
+        yield start, "Unterminated quoted field"
+
+
+def validate_batch(
+    batch: list[tuple[int, dict]], report: ImportReport
+) -> list[tuple[int, ImportRow]]:
+    try:
+        rows = _rows_adapter.validate_python([record for _, record in batch])
+        return [(line, row) for (line, _), row in zip(batch, rows)]
+    except ValidationError as e:
+        failed: dict[int, list[str]] = {}
+        for error in e.errors():
+            index, *field = error["loc"]
+            failed.setdefault(index, []).append(f"{'.'.join(map(str, field))}: {error['msg']}")
+
+    valid = []
+    for index, (line, record) in enumerate(batch):
+        if index in failed:
+            report.add_error(line, "; ".join(failed[index]))
+        else:
+            valid.append((line, ImportRow.model_validate(record)))
+    return valid
+
+
+def _insert_ignoring_conflicts(db: AsyncSession, table):
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=["name"])
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["name"])
+    return insert(table)
+
+
+class CatalogueImporter:
+    def __init__(self, db: AsyncSession, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.author_ids: dict[str, int] = {}
+        self.touched_author_ids: set[int] = set()
+
+    async def load_authors(self) -> None:
+        result = await self.db.execute(select(Author.name, Author.id))
+        self.author_ids = dict(result.tuples().all())
+
+    async def create_missing_authors(self, rows: Iterable[ImportRow]) -> None:
+        missing: dict[str, ImportRow] = {}
+        for row in rows:
+            if row.author_name not in self.author_ids and row.author_birth_date is not None:
+                missing.setdefault(row.author_name, row)
+        if not missing:
+            return
+
+        await self.db.execute(
+            _insert_ignoring_conflicts(self.db, Author),
+            [
+                {"name": name, "bio": row.author_bio, "birth_date": row.author_birth_date}
+                for name, row in missing.items()
+            ],
+        )
+        result = await self.db.execute(
+            select(Author.name, Author.id).where(Author.name.in_(list(missing)))
+        )
+        created = dict(result.tuples().all())
+        self.report.authors_created += len(created)
+        self.author_ids.update(created)
+
+    async def import_batch(self, batch: list[tuple[int, dict]]) -> None:
+        valid = validate_batch(batch, self.report)
+        await self.create_missing_authors(row for _, row in valid)
+
+        books = []
+        for line, row in valid:
+            author_id = self.author_ids.get(row.author_name)
+            if author_id is None:
+                self.report.add_error(
+                    line,
+                    f"Unknown author '{row.author_name}' and no author_birth_date to create it",
+                )
+                continue
+            self.touched_author_ids.add(author_id)
+            books.append(
+                {
+                    "title": row.title,
+                    "description": row.description,
+                    "price": row.price,
+                    "stock_quantity": row.stock_quantity,
+                    "author_id": author_id,
+                }
+            )
+
+        if books:
+            await self.db.execute(insert(Book), books)
+            self.report.imported += len(books)
+
+    async def run(self, records: AsyncIterable[tuple[int, dict | str]]) -> ImportReport:
+        await self.load_authors()
+        batch: list[tuple[int, dict]] = []
+        async for line, record in records:
+            self.report.processed += 1
+            if isinstance(record, str):
+                self.report.add_error(line, record)
+                continue
+            batch.append((line, record))
+            if len(batch) >= self.batch_size:
+                await self.import_batch(batch)
+                batch = []
+        if batch:
+            await self.import_batch(batch)
+        return self.report
+
+
+def parse_records(chunks: AsyncIterable[bytes], fmt: ImportFormat):
+    lines = iter_lines(chunks)
+    return parse_csv(lines) if fmt == "csv" else parse_ndjson(lines)
+
+
+async def _read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def main(path: str, fmt: ImportFormat, batch_size: int) -> None:
+    from app.database import get_engines
+
+    async with get_engines().async_session() as db:
+        importer = CatalogueImporter(db, batch_size=batch_size)
+        report = await importer.run(parse_records(_read_file(path), fmt))
+        await db.commit()
+    await get_engines().engine.dispose()
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import books and authors")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    asyncio.run(main(args.path, fmt, args.batch_size))
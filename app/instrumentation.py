@@ -0,0 +1,169 @@
+"""Request and query metrics.
+
+MetricsMiddleware is a plain ASGI middleware (no BaseHTTPMiddleware task and
+memory stream per request) that times every request by route template.
+SQLAlchemy cursor events count and time the statements each request runs,
+through a per-request RequestStats kept in a context variable.
+Startup and time-to-first-response gauges track cold start cost.
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics import registry
+
+# request latencies are mostly sub-second, queries mostly sub-10ms
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+)
+request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    labelnames=("method", "route"),
+)
+responses_total = registry.counter(
+    "http_responses_total",
+    "Responses by route template and status code",
+    labelnames=("method", "route", "status"),
+)
+query_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "Duration of single SQL statements",
+    buckets=QUERY_BUCKETS,
+)
+queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "SQL statements executed per request",
+    labelnames=("route",),
+    buckets=COUNT_BUCKETS,
+)
+query_seconds_per_request = registry.histogram(
+    "db_query_seconds_per_request",
+    "Total SQL time per request",
+    labelnames=("route",),
+    buckets=QUERY_BUCKETS,
+)
+process_startup_seconds = registry.gauge(
+    "process_startup_seconds",
+    "Seconds from process start until the startup hooks finished",
+)
+time_to_first_response_seconds = registry.gauge(
+    "process_time_to_first_response_seconds",
+    "Seconds from process start until the first response was sent",
+)
+
+_imported_at = time.monotonic()
+_first_response_sent = False
+
+
+def process_age() -> float:
+    """Seconds since this process started; for a forked worker, since the fork.
+
+    Falls back to the time since this module was imported where /proc is missing.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _imported_at
+
+
+def record_startup() -> None:
+    process_startup_seconds.set(process_age())
+
+
+@dataclass(slots=True)
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# requests that matched no route share one label instead of one per raw path
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec()
+            request_stats.reset(token)
+
+            method = scope["method"]
+            route = route_label(scope)
+            request_seconds.observe(elapsed, method=method, route=route)
+            responses_total.inc(method=method, route=route, status=status_code)
+            queries_per_request.observe(stats.queries, route=route)
+            if stats.queries:
+                query_seconds_per_request.observe(stats.query_seconds, route=route)
+
+            global _first_response_sent
+            if not _first_response_sent:
+                _first_response_sent = True
+                time_to_first_response_seconds.set(process_age())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+    query_seconds.observe(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+def instrument_queries() -> None:
+    # on the Engine class, so the primary and every replica are covered
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstrument_queries() -> None:
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,17 +1,82 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import configure_mappers
+
+from app.config import settings
+from app.database import ReadYourWritesMiddleware, connect_engines, dispose_engines
+from app.diagnostics import QueryDiagnosticsMiddleware, enable_query_diagnostics
+from app.instrumentation import MetricsMiddleware, instrument_queries, record_startup
+from app.metrics import registry
+from app.ratelimit import RateLimitMiddleware
+
+from app.routers import analytics, auth, authors, books, orders, search
+from app.security import PasswordHasherBusy, password_hasher
+from app.serialization import ORJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # runs in every worker after the fork, before it accepts connections
+    configure_mappers()
+    await connect_engines()
+    await password_hasher.warm_up()
+    record_startup()
+    yield
+    password_hasher.shutdown()
+    await dispose_engines()
 
-from app.routers import auth, authors, books, orders
 
 app = FastAPI(
     title="Book Store API",
     description="REST API for managing books, authors and orders",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+# innermost: the route's session has committed by the time the response starts
+app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.query_diagnostics:
+    app.add_middleware(QueryDiagnosticsMiddleware)
+    enable_query_diagnostics()
+
+# rejects before any route, DB or bcrypt work
+app.add_middleware(RateLimitMiddleware)
+
+# added last, so it is outermost and times the other middleware too
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    instrument_queries()
+
+
 app.include_router(auth.router)
 app.include_router(books.router)
 app.include_router(authors.router)
 app.include_router(orders.router)
+app.include_router(search.router)
+app.include_router(analytics.router)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -23,7 +88,9 @@ async def root():
             "books": "/books",
             "authors": "/authors", 
             "auth": "/auth/register, /auth/login",
-            "orders": "/orders"
+            "orders": "/orders",
+            "search": "/search, /search/autocomplete",
+            "analytics": "/analytics/top-books, /analytics/revenue-by-author, /analytics/daily-sales",
         }
     }
 
@@ -31,3 +98,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
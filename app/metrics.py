@@ -0,0 +1,141 @@
+import bisect
+from collections.abc import Callable
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Gauge set directly, or read from `callback` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Callable[[], float] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        self.values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> list[str]:
+        if self.callback is not None:
+            return [f"{self.name} {self.callback()}"]
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self.values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        entry = self.values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback=callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self.metrics.values())
+
+
+registry = Registry()
@@ -1,12 +1,16 @@
 import enum
 from datetime import date, datetime
 
-from sqlalchemy import ForeignKey, Index, String, Text
+from sqlalchemy import BigInteger, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
 
 
+# Relationships are lazy="raise": nothing is loaded implicitly, every query in
+# crud.py states which relationships its response schema needs.
+
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     USER = "user"
@@ -20,7 +24,7 @@ class Author(Base):
     bio: Mapped[str | None] = mapped_column(Text)
     birth_date: Mapped[date]
 
-    books: Mapped[list["Book"]] = relationship(back_populates="author", lazy="selectin")
+    books: Mapped[list["Book"]] = relationship(back_populates="author", lazy="raise")
 
 
 class Book(Base):
@@ -34,7 +38,7 @@ class Book(Base):
     author_id: Mapped[int] = mapped_column(ForeignKey("authors.id"))
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    author: Mapped["Author"] = relationship(back_populates="books", lazy="joined")
+    author: Mapped["Author"] = relationship(back_populates="books", lazy="raise")
 
     __table_args__ = (Index("ix_books_author_id", "author_id"),)
 
@@ -48,7 +52,7 @@ class User(Base):
     password: Mapped[str] = mapped_column(String(255))
     role: Mapped[UserRole] = mapped_column(default=UserRole.USER)
 
-    orders: Mapped[list["Order"]] = relationship(back_populates="user", lazy="selectin")
+    orders: Mapped[list["Order"]] = relationship(back_populates="user", lazy="raise")
 
 
 class Order(Base):
@@ -61,5 +65,69 @@ class Order(Base):
     total_price: Mapped[int]
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    user: Mapped["User"] = relationship(back_populates="orders", lazy="joined")
-    book: Mapped["Book"] = relationship(lazy="joined")
+    user: Mapped["User"] = relationship(back_populates="orders", lazy="raise")
+    book: Mapped["Book"] = relationship(lazy="raise")
+
+    __table_args__ = (
+        # order history: newest first per user, id breaks created_at ties
+        Index("ix_orders_user_created", "user_id", created_at.desc(), id.desc()),
+        Index("ix_orders_book_id", "book_id"),
+    )
+
+
+class UserOrderStats(Base):
+    """Running per-user totals, updated in the same transaction as the orders."""
+
+    __tablename__ = "user_order_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    order_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    total_spent: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class BookSales(Base):
+    """Lifetime sales per book, maintained together with the orders."""
+
+    __tablename__ = "book_sales"
+
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"), primary_key=True)
+    order_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    units_sold: Mapped[int] = mapped_column(BigInteger, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __table_args__ = (
+        Index("ix_book_sales_units_sold", "units_sold"),
+        Index("ix_book_sales_revenue", "revenue"),
+    )
+
+
+class DailyBookSales(Base):
+    """Sales per (UTC day, book); one row per book sold that day."""
+
+    __tablename__ = "daily_book_sales"
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"), primary_key=True)
+    order_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    units_sold: Mapped[int] = mapped_column(BigInteger, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class RefreshToken(Base):
+    """Opaque refresh tokens, stored as SHA-256 digests.
+
+    A login starts a family; each refresh marks the presented token used and
+    issues the next one in the same family. A used token presented again has
+    leaked, so the whole family is revoked.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    family_id: Mapped[str] = mapped_column(String(32), index=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    expires_at: Mapped[datetime]
+    used_at: Mapped[datetime | None]
+    revoked_at: Mapped[datetime | None]
@@ -0,0 +1,35 @@
+import base64
+import json
+
+
+# integer primary keys are 32-bit columns on Postgres
+MAX_ID = 2**31 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+    if not isinstance(position, dict):
+        raise InvalidCursor("Invalid cursor")
+    return position
+
+
+def cursor_id(position: dict, key: str = "id") -> int:
+    value = position.get(key)
+    # bool is an int subclass; an out-of-range id would fail in the driver instead
+    if type(value) is not int or not 0 <= value <= MAX_ID:
+        raise InvalidCursor("Invalid cursor")
+    return value
@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.cache import TTLCache
+from app.config import settings
+from app.models import User, UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Slim projection of the authenticated user: only what authorization needs."""
+
+    id: int
+    role: UserRole
+
+
+principal_cache: TTLCache[Principal] = TTLCache(
+    max_size=settings.principal_cache_max_size,
+    ttl=settings.principal_cache_ttl_seconds,
+    name="principal",
+)
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.delete(str(user_id))
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    invalidate_principal(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    invalidate_principal(target.id)
@@ -0,0 +1,255 @@
+"""Per-client rate limiting and admission control.
+
+Every request spends tokens from its client IP's bucket, and from the
+user's bucket as well when it carries a valid access token. Expensive routes cost more
+(bcrypt logins, exports, deep OFFSET pages), so one client cannot starve
+the others. Over the limit: 429 with Retry-After.
+
+Admission control caps the requests served at once by this process, so
+bursts queue briefly in front of the app instead of inside the connection
+pool. A request that finds no slot in time gets 503.
+"""
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from urllib.parse import parse_qs
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import registry
+from app.tokens import verify_request_token
+
+rate_limited_total = registry.counter(
+    "http_rate_limited_total",
+    "Requests rejected with 429 by bucket kind",
+    labelnames=("bucket",),
+)
+load_shed_total = registry.counter(
+    "http_load_shed_total",
+    "Requests rejected with 503 because no admission slot freed up in time",
+)
+
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+
+ROUTE_COSTS = {
+    ("POST", "/auth/login"): 10,
+    ("POST", "/auth/register"): 10,
+    ("GET", "/search"): 2,
+    ("GET", "/books/export"): 20,
+    ("POST", "/books/import"): 20,
+}
+# GET /books?offset=: one extra token per this many skipped rows
+OFFSET_COST_STEP = 1000
+MAX_OFFSET_COST = 20
+
+
+def request_cost(method: str, path: str, query_string: bytes) -> int:
+    path = path.rstrip("/") or "/"
+    cost = ROUTE_COSTS.get((method, path), 1)
+    if method == "GET" and path == "/books" and b"offset" in query_string:
+        try:
+            offset = int(parse_qs(query_string.decode())["offset"][0])
+        except (KeyError, ValueError, UnicodeDecodeError):
+            # malformed values are rejected by validation later
+            return cost
+        cost += min(max(offset, 0) // OFFSET_COST_STEP, MAX_OFFSET_COST)
+    return cost
+
+
+class RateLimitStore(ABC):
+    """Token bucket state.
+
+    The in-memory store is per process; with several workers each one
+    enforces its own limits, so a shared store (e.g. Redis running the
+    refill-and-take step as one script) keeps them global.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Spend `cost` tokens; 0 if allowed, else seconds until it would be."""
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        # a bucket left alone until it is full again carries no state worth keeping
+        self._buckets: TTLCache[tuple[float, float]] = TTLCache(max_size=max_keys, ttl=0)
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        now = self.clock()
+        cost = min(cost, burst)
+        state = self._buckets.get(key)
+        tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+def client_ip(scope: dict, forwarded_hops: int) -> str:
+    if forwarded_hops > 0:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                # each proxy appends the address it saw; earlier entries are client-controlled
+                hops = [part.strip() for part in value.decode("latin-1").split(",")]
+                return hops[-min(forwarded_hops, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def authenticated_user(scope: dict) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            # get_current_user reuses these claims instead of verifying again
+            claims = await verify_request_token(scope, token)
+            return claims.get("sub") if claims else None
+    return None
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store: RateLimitStore,
+        ip_rate: float,
+        ip_burst: float,
+        user_rate: float,
+        user_burst: float,
+        forwarded_hops: int = 0,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.forwarded_hops = forwarded_hops
+        self.enabled = enabled
+
+    async def check(self, scope: dict) -> tuple[str, float]:
+        """The bucket kind that limited this request and the Retry-After, 0 if allowed."""
+        cost = request_cost(scope["method"], scope["path"], scope["query_string"])
+        ip = client_ip(scope, self.forwarded_hops)
+        retry_after = await self.store.take(f"ip:{ip}", cost, self.ip_rate, self.ip_burst)
+        if retry_after:
+            return "ip", retry_after
+        user_id = await authenticated_user(scope)
+        if user_id is None:
+            return "ip", 0.0
+        return "user", await self.store.take(
+            f"user:{user_id}", cost, self.user_rate, self.user_burst
+        )
+
+
+class AdmissionController:
+    """At most `limit` requests in the app; up to `max_queued` wait `timeout` for a slot."""
+
+    def __init__(self, limit: int, max_queued: int, timeout: float):
+        self.limit = limit
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._slots = asyncio.Semaphore(limit) if limit > 0 else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._slots is not None
+
+    async def acquire(self) -> bool:
+        if not self._slots.locked():
+            await self._slots.acquire()
+        elif self.queued >= self.max_queued:
+            return False
+        else:
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.queued -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+
+rate_limiter = RateLimiter(
+    InMemoryRateLimitStore(max_keys=settings.rate_limit_max_keys),
+    ip_rate=settings.rate_limit_ip_rate,
+    ip_burst=settings.rate_limit_ip_burst,
+    user_rate=settings.rate_limit_user_rate,
+    user_burst=settings.rate_limit_user_burst,
+    forwarded_hops=settings.rate_limit_forwarded_hops,
+    enabled=settings.rate_limit_enabled,
+)
+
+admission = AdmissionController(
+    limit=settings.max_concurrent_requests,
+    max_queued=settings.max_queued_requests,
+    timeout=settings.admission_timeout_seconds,
+)
+
+registry.gauge(
+    "http_admission_queued",
+    "Requests waiting for an admission slot",
+    callback=lambda: admission.queued,
+)
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if rate_limiter.enabled:
+            bucket, retry_after = await rate_limiter.check(scope)
+            if retry_after:
+                rate_limited_total.inc(bucket=bucket)
+                response = JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={"detail": "Too many requests"},
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+                await response(scope, receive, send)
+                return
+
+        if not admission.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        if not await admission.acquire():
+            load_shed_total.inc()
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is busy, try again later"},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics import ReconcileReport, daily_sales, reconcile, revenue_by_author, top_books
+from app.database import get_db, get_read_db
+from app.dependencies import get_admin_user
+from app.principal import Principal
+from app.schemas import AuthorRevenueResponse, BookSalesResponse, DailySalesResponse
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/top-books", response_model=list[BookSalesResponse])
+async def get_top_books(
+    limit: int = Query(default=10, ge=1, le=100),
+    by: Literal["units", "revenue"] = "units",
+    db: AsyncSession = Depends(get_read_db),
+    _: Principal = Depends(get_admin_user),
+):
+    return await top_books(db, limit=limit, by=by)
+
+
+@router.get("/revenue-by-author", response_model=list[AuthorRevenueResponse])
+async def get_revenue_by_author(
+    limit: int = Query(default=10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    _: Principal = Depends(get_admin_user),
+):
+    return await revenue_by_author(db, limit=limit)
+
+
+@router.get("/daily-sales", response_model=list[DailySalesResponse])
+async def get_daily_sales(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    _: Principal = Depends(get_admin_user),
+):
+    # orders are stamped in UTC, so are the days
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
+        )
+    return await daily_sales(db, date_from, date_to)
+
+
+@router.post("/reconcile", response_model=ReconcileReport)
+async def reconcile_rollups(
+    repair: bool = False,
+    db: AsyncSession = Depends(get_db),
+    _: Principal = Depends(get_admin_user),
+):
+    return await reconcile(db, repair=repair)
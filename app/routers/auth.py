@@ -1,13 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import create_user, get_user_by_email, get_user_by_username
+from app.crud import (
+    RefreshTokenReused,
+    create_refresh_token,
+    create_user,
+    get_user_by_email,
+    get_user_by_username,
+    revoke_refresh_token,
+    rotate_refresh_token,
+    update_user_password,
+)
 from app.database import get_db
-from app.schemas import LoginRequest, Token, UserCreate, UserResponse
-from app.security import create_access_token, verify_password
+from app.dependencies import security
+from app.metrics import registry
+from app.schemas import (
+    LoginRequest,
+    LogoutRequest,
+    RefreshRequest,
+    Token,
+    UserCreate,
+    UserResponse,
+)
+from app.security import create_access_token, password_hasher
+from app.tokens import get_token_verifier, verify_request_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+refresh_token_reuse = registry.counter(
+    "refresh_token_reuse_total",
+    "Used refresh tokens presented again; each revokes its token family",
+)
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -30,12 +55,70 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
 async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_db)):
     user = await get_user_by_username(db, credentials.username)
 
-    if not user or not verify_password(credentials.password, user.password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    if new_hash:
+        # cost factor changed since the hash was stored — rehash while we have the plaintext
+        await update_user_password(db, user, new_hash)
+
     access_token = create_access_token(data={"sub": str(user.id)})
-    return Token(access_token=access_token)
+    refresh_token = await create_refresh_token(db, user.id)
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        rotated = await rotate_refresh_token(db, body.refresh_token)
+    except RefreshTokenReused as e:
+        # the request fails, the revocation must stay
+        await db.commit()
+        refresh_token_reuse.inc()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    user_id, refresh_token = rotated
+    access_token = create_access_token(data={"sub": str(user_id)})
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: Request,
+    body: LogoutRequest | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+):
+    claims = await verify_request_token(request.scope, credentials.credentials)
+    if not claims:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    await get_token_verifier().revoke(claims)
+    if body and body.refresh_token:
+        await revoke_refresh_token(db, body.refresh_token, int(claims["sub"]))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
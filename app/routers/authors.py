@@ -1,11 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import create_author, get_author, get_author_by_name, get_authors
-from app.database import get_db
+from app.cache import (
+    author_books_tag,
+    author_tag,
+    book_tag,
+    cached_json_response,
+    response_cache,
+)
+from app.crud import (
+    create_author,
+    get_author_book_rows,
+    get_author_by_name,
+    get_author_row,
+    get_author_rows,
+)
+from app.database import get_db, get_read_db
 from app.dependencies import get_admin_user
-from app.models import User
+from app.principal import Principal
 from app.schemas import AuthorCreate, AuthorResponse, AuthorWithBooksResponse
+from app.serialization import ORJSONResponse, author_item, author_with_books, dumps
 
 router = APIRouter(prefix="/authors", tags=["authors"])
 
@@ -14,16 +28,17 @@ router = APIRouter(prefix="/authors", tags=["authors"])
 async def list_authors(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_authors(db, skip=skip, limit=limit)
+    rows = await get_author_rows(db, skip=skip, limit=limit)
+    return ORJSONResponse([author_item(row) for row in rows])
 
 
 @router.post("", response_model=AuthorResponse, status_code=status.HTTP_201_CREATED)
 async def add_author(
     author: AuthorCreate,
     db: AsyncSession = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
     if await get_author_by_name(db, author.name):
         raise HTTPException(
@@ -37,12 +52,26 @@ async def add_author(
 @router.get("/{author_id}", response_model=AuthorWithBooksResponse)
 async def get_author_detail(
     author_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    author = await get_author(db, author_id)
+    cache_key = f"authors:detail:{author_id}"
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached_json_response(cached, hit=True)
+
+    author = await get_author_row(db, author_id)
     if not author:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Author not found",
         )
-    return author
+
+    detail = author_with_books(author, await get_author_book_rows(db, author_id))
+    body = dumps(detail)
+    tags = [
+        author_tag(author_id),
+        author_books_tag(author_id),
+        *(book_tag(book["id"]) for book in detail["books"]),
+    ]
+    await response_cache.set(cache_key, body, tags=tags)
+    return cached_json_response(body, hit=False)
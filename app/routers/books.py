@@ -1,11 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import create_book, delete_book, get_author, get_book, get_books, update_book
-from app.database import get_db
+from app.cache import (
+    BOOK_LISTS_TAG,
+    author_books_tag,
+    author_tag,
+    book_tag,
+    cached_json_response,
+    invalidate_on_commit,
+    response_cache,
+)
+from app.crud import (
+    author_exists,
+    create_book,
+    delete_book,
+    get_book_row,
+    get_book_rows,
+    update_book,
+)
+from app.database import get_db, get_read_db, get_read_db_factory
 from app.dependencies import get_admin_user
-from app.models import User
+from app.exporter import MEDIA_TYPES, encode_rows, stream_catalogue
+from app.importer import CatalogueImporter, ImportFormat, ImportReport, parse_records
+from app.pagination import InvalidCursor, cursor_id, decode_cursor, encode_cursor
+from app.principal import Principal
+from app.search import search_index
 from app.schemas import BookCreate, BookResponse, BookUpdate, PaginatedBooks
+from app.serialization import BookFields, InvalidFields, book_item, book_page, dumps
 
 router = APIRouter(prefix="/books", tags=["books"])
 
@@ -15,40 +40,155 @@ async def list_books(
     limit: int = 20,
     offset: int = 0,
     author_id: int | None = None,
+    cursor: str | None = None,
+    include_total: bool | None = None,
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        book_fields = BookFields(fields)
+    except InvalidFields as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cache_key = (
+        f"books:list:{limit}:{offset}:{author_id}:{cursor}:{include_total}"
+        f":{book_fields.cache_key}"
+    )
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached_json_response(cached, hit=True)
+
+    after_id = None
+    if cursor:
+        try:
+            after_id = cursor_id(decode_cursor(cursor))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    # the count is a full scan, so cursor clients only pay for it on request
+    if include_total is None:
+        include_total = after_id is None
+
+    rows, total = await get_book_rows(
+        db,
+        skip=offset,
+        limit=limit,
+        author_id=author_id,
+        after_id=after_id,
+        with_total=include_total,
+        book_columns=book_fields.columns,
+        with_author=book_fields.with_author,
+    )
+    items = [book_item(row, book_fields) for row in rows]
+    next_cursor = encode_cursor({"id": items[-1]["id"]}) if items and len(items) == limit else None
+    body = dumps(
+        book_page(
+            items,
+            total=total,
+            limit=limit,
+            offset=0 if after_id is not None else offset,
+            next_cursor=next_cursor,
+        )
+    )
+
+    tags = {author_books_tag(author_id) if author_id else BOOK_LISTS_TAG}
+    for item in items:
+        tags.add(book_tag(item["id"]))
+        if "author" in item:
+            tags.add(author_tag(item["author"]["id"]))
+    await response_cache.set(cache_key, body, tags=tags)
+    return cached_json_response(body, hit=False)
+
+
+@router.post("/import", response_model=ImportReport)
+async def import_books(
+    request: Request,
+    format: ImportFormat | None = None,
+    batch_size: int = 1000,
     db: AsyncSession = Depends(get_db),
+    _: Principal = Depends(get_admin_user),
 ):
-    books, total = await get_books(db, skip=offset, limit=limit, author_id=author_id)
-    return PaginatedBooks(items=books, total=total, limit=limit, offset=offset)
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if content_type.startswith("text/csv") else "ndjson"
+
+    importer = CatalogueImporter(db, batch_size=max(1, min(batch_size, 10_000)))
+    report = await importer.run(parse_records(request.stream(), format))
+
+    # Core inserts bypass the ORM events that normally keep these in sync
+    search_index.invalidate()
+    # and again after the commit, in case a rebuild reads the old rows meanwhile
+    db.info["search_index_dirty"] = True
+    invalidate_on_commit(
+        db, BOOK_LISTS_TAG, *(author_books_tag(author_id) for author_id in importer.touched_author_ids)
+    )
+    return report
+
+
+@router.get("/export")
+async def export_books(
+    format: ImportFormat = "ndjson",
+    author_id: int | None = None,
+    session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]] = Depends(
+        get_read_db_factory
+    ),
+    _: Principal = Depends(get_admin_user),
+):
+    async def body() -> AsyncIterator[bytes]:
+        async with session_factory() as db:
+            async for chunk in encode_rows(stream_catalogue(db, author_id), format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
 
 
 @router.get("/{book_id}", response_model=BookResponse)
 async def get_book_detail(
     book_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    book = await get_book(db, book_id)
-    if not book:
+    cache_key = f"books:detail:{book_id}"
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached_json_response(cached, hit=True)
+
+    row = await get_book_row(db, book_id)
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found",
         )
-    return book
+
+    book = book_item(row)
+    body = dumps(book)
+    await response_cache.set(
+        cache_key, body, tags=[book_tag(book["id"]), author_tag(book["author_id"])]
+    )
+    return cached_json_response(body, hit=False)
 
 
 @router.post("", response_model=BookResponse, status_code=status.HTTP_201_CREATED)
 async def add_book(
     book: BookCreate,
     db: AsyncSession = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
-    author = await get_author(db, book.author_id)
-    if not author:
+    if not await author_exists(db, book.author_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Author not found",
         )
 
-    return await create_book(db, book)
+    created = await create_book(db, book)
+    invalidate_on_commit(db, BOOK_LISTS_TAG, author_books_tag(book.author_id))
+    return created
 
 
 @router.patch("/{book_id}", response_model=BookResponse)
@@ -56,7 +196,7 @@ async def modify_book(
     book_id: int,
     book_update: BookUpdate,
     db: AsyncSession = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
     updated = await update_book(db, book_id, book_update)
     if not updated:
@@ -64,6 +204,7 @@ async def modify_book(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found",
         )
+    invalidate_on_commit(db, book_tag(book_id))
     return updated
 
 
@@ -71,7 +212,7 @@ async def modify_book(
 async def remove_book(
     book_id: int,
     db: AsyncSession = Depends(get_db),
-    _: User = Depends(get_admin_user),
+    _: Principal = Depends(get_admin_user),
 ):
     deleted = await delete_book(db, book_id)
     if not deleted:
@@ -79,3 +220,9 @@ async def remove_book(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found",
         )
+    invalidate_on_commit(
+        db,
+        book_tag(book_id),
+        BOOK_LISTS_TAG,
+        author_books_tag(deleted.author_id),
+    )
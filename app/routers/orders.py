@@ -1,31 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import create_order
-from app.database import get_db
+from app.cache import book_tag, invalidate_on_commit
+from app.crud import create_order, create_orders_batch, get_user_order_stats, get_user_orders
+from app.database import get_db, get_read_db
 from app.dependencies import get_current_user
-from app.models import User
-from app.schemas import OrderCreate, OrderResponse
+from app.models import UserRole
+from app.pagination import InvalidCursor, cursor_id, decode_cursor, encode_cursor
+from app.principal import Principal
+from app.schemas import (
+    OrderBatchCreate,
+    OrderBatchResponse,
+    OrderCreate,
+    OrderResponse,
+    OrderSummary,
+    PaginatedOrders,
+)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
+def order_error(e: ValueError) -> HTTPException:
+    error_msg = str(e)
+    if "not found" in error_msg.lower():
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=error_msg,
+        )
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=error_msg,
+    )
+
+
+def resolve_user_id(current_user: Principal, user_id: int | None) -> int:
+    if user_id is None or user_id == current_user.id:
+        return current_user.id
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user_id
+
+
+@router.get("", response_model=PaginatedOrders)
+async def list_orders(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    user_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    user_id = resolve_user_id(current_user, user_id)
+
+    before = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            before = (datetime.fromisoformat(position["created_at"]), cursor_id(position))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    orders = await get_user_orders(db, user_id, limit=limit, before=before)
+    next_cursor = None
+    if len(orders) == limit:
+        last = orders[-1]
+        next_cursor = encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+    return PaginatedOrders(items=orders, limit=limit, next_cursor=next_cursor)
+
+
+@router.get("/summary", response_model=OrderSummary)
+async def order_summary(
+    user_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    user_id = resolve_user_id(current_user, user_id)
+    order_count, total_spent = await get_user_order_stats(db, user_id)
+    return OrderSummary(user_id=user_id, order_count=order_count, total_spent=total_spent)
+
+
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def place_order(
     order: OrderCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     try:
-        return await create_order(db, current_user.id, order)
+        created = await create_order(db, current_user.id, order)
     except ValueError as e:
-        error_msg = str(e)
-        if "not found" in error_msg.lower():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=error_msg,
-            )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_msg,
-        )
+        raise order_error(e)
+
+    # stock_quantity is part of every cached book representation
+    invalidate_on_commit(db, book_tag(order.book_id))
+    return created
+
+
+@router.post("/batch", response_model=OrderBatchResponse, status_code=status.HTTP_201_CREATED)
+async def place_order_batch(
+    batch: OrderBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    try:
+        created = await create_orders_batch(db, current_user.id, batch)
+    except ValueError as e:
+        raise order_error(e)
+
+    invalidate_on_commit(db, *{book_tag(item.book_id) for item in batch.items})
+    return OrderBatchResponse(
+        orders=created,
+        total_price=sum(order.total_price for order in created),
+    )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.schemas import SearchResults, Suggestion
+from app.search import autocomplete, search_books
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    books = await search_books(db, q, limit=limit)
+    return SearchResults(query=q, items=books)
+
+
+@router.get("/autocomplete", response_model=list[Suggestion])
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    suggestions = await autocomplete(db, prefix, limit=limit)
+    return [Suggestion(kind=kind, id=entity_id, text=text) for kind, entity_id, text in suggestions]
@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
@@ -10,6 +11,9 @@ class AuthorBase(BaseModel):
     bio: str | None = None
     birth_date: date
 
+
+class AuthorCreate(AuthorBase):
+    # input-only: response models must not re-run it on stored data
     @field_validator("birth_date")
     @classmethod
     def birth_date_not_in_future(cls, v: date) -> date: # # v — это значение, которое прислал юзер
@@ -18,10 +22,6 @@ class AuthorBase(BaseModel):
         return v
 
 
-class AuthorCreate(AuthorBase):
-    pass
-
-
 class AuthorResponse(AuthorBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -94,6 +94,15 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
 
 
 class TokenData(BaseModel):
@@ -110,6 +119,10 @@ class OrderCreate(BaseModel):
     quantity: int = Field(..., gt=0)
 
 
+class OrderBatchCreate(BaseModel):
+    items: list[OrderCreate] = Field(..., min_length=1, max_length=100)
+
+
 class OrderResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -121,8 +134,65 @@ class OrderResponse(BaseModel):
     created_at: datetime
 
 
+class OrderBatchResponse(BaseModel):
+    orders: list[OrderResponse]
+    total_price: int
+
+
+class PaginatedOrders(BaseModel):
+    items: list[OrderResponse]
+    limit: int
+    next_cursor: str | None = None
+
+
+class OrderSummary(BaseModel):
+    user_id: int
+    order_count: int
+    total_spent: int
+
+
 class PaginatedBooks(BaseModel):
     items: list[BookResponse]
-    total: int
+    total: int | None
     limit: int
     offset: int
+    next_cursor: str | None = None
+
+
+class BookSalesResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    book_id: int
+    title: str
+    order_count: int
+    units_sold: int
+    revenue: int
+
+
+class AuthorRevenueResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    author_id: int
+    name: str
+    units_sold: int
+    revenue: int
+
+
+class DailySalesResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    order_count: int
+    units_sold: int
+    revenue: int
+
+
+class SearchResults(BaseModel):
+    query: str
+    items: list[BookResponse]
+
+
+class Suggestion(BaseModel):
+    kind: Literal["author", "book"]
+    id: int
+    text: str
@@ -0,0 +1,216 @@
+import bisect
+import re
+
+from sqlalchemy import case, event, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes, joinedload
+
+from app.models import Author, Book
+
+TITLE_WEIGHT = 3.0
+AUTHOR_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+# Postgres: these expressions must match the ones indexed in migration 002_search
+_SIMPLE = literal_column("'simple'::regconfig")
+
+
+def book_document():
+    return func.setweight(func.to_tsvector(_SIMPLE, Book.title), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(_SIMPLE, Book.description), literal_column("'B'"))
+    )
+
+
+def author_document():
+    return func.to_tsvector(_SIMPLE, Author.name)
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class InvertedIndex:
+    """In-process fallback used where Postgres full-text search is unavailable.
+
+    Built lazily from the database and dropped whenever the book and author
+    text it indexes changes.
+    """
+
+    def __init__(self):
+        self.stale = True
+        self._generation = 0
+        self._postings: dict[str, dict[int, float]] = {}
+        self._titles: list[tuple[str, int, str]] = []
+        self._authors: list[tuple[str, int, str]] = []
+
+    def invalidate(self) -> None:
+        self.stale = True
+        self._generation += 1
+
+    async def ensure_built(self, db: AsyncSession) -> None:
+        if not self.stale:
+            return
+
+        generation = self._generation
+        postings: dict[str, dict[int, float]] = {}
+        titles = []
+        rows = await db.execute(
+            select(Book.id, Book.title, Book.description, Author.name).join(Author)
+        )
+        for book_id, title, description, author_name in rows:
+            for text, weight in (
+                (title, TITLE_WEIGHT),
+                (author_name, AUTHOR_WEIGHT),
+                (description, DESCRIPTION_WEIGHT),
+            ):
+                for token in tokenize(text):
+                    scores = postings.setdefault(token, {})
+                    scores[book_id] = scores.get(book_id, 0.0) + weight
+            titles.append((title.lower(), book_id, title))
+
+        authors = [
+            (name.lower(), author_id, name)
+            for author_id, name in await db.execute(select(Author.id, Author.name))
+        ]
+
+        self._postings = postings
+        self._titles = sorted(titles)
+        self._authors = sorted(authors)
+        # a write that landed while we were reading keeps the index stale
+        self.stale = generation != self._generation
+
+    def search(self, query: str, limit: int) -> list[int]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # every term must match, like websearch_to_tsquery
+        matches = [self._postings.get(token, {}) for token in tokens]
+        matches.sort(key=len)
+        scores = dict(matches[0])
+        for other in matches[1:]:
+            scores = {
+                book_id: score + other[book_id]
+                for book_id, score in scores.items()
+                if book_id in other
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [book_id for book_id, _ in ranked[:limit]]
+
+    @staticmethod
+    def _prefixed(entries: list[tuple[str, int, str]], prefix: str, limit: int):
+        start = bisect.bisect_left(entries, (prefix,))
+        for key, entity_id, text in entries[start : start + limit]:
+            if not key.startswith(prefix):
+                break
+            yield entity_id, text
+
+    def autocomplete(self, prefix: str, limit: int) -> list[tuple[str, int, str]]:
+        prefix = prefix.lower()
+        suggestions = [("author", i, text) for i, text in self._prefixed(self._authors, prefix, limit)]
+        suggestions += [("book", i, text) for i, text in self._prefixed(self._titles, prefix, limit)]
+        return suggestions[:limit]
+
+
+search_index = InvertedIndex()
+
+
+# what the index is built from; stock and price updates leave it valid
+_INDEXED_ATTRIBUTES = {
+    Book: ("title", "description", "author_id", "author"),
+    Author: ("name",),
+}
+
+
+def _changes_index(obj) -> bool:
+    indexed = _INDEXED_ATTRIBUTES.get(type(obj))
+    return indexed is not None and any(
+        # an attribute that was never loaded was not changed; never load it here
+        attributes.get_history(obj, key, attributes.PASSIVE_NO_INITIALIZE).has_changes()
+        for key in indexed
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _catalogue_flushed(session, flush_context) -> None:
+    added_or_removed = (*session.new, *session.deleted)
+    if any(isinstance(obj, (Book, Author)) for obj in added_or_removed) or any(
+        _changes_index(obj) for obj in session.dirty
+    ):
+        session.info["search_index_dirty"] = True
+        search_index.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+def _catalogue_committed(session) -> None:
+    # rebuilds that ran between flush and commit could not see the new rows
+    if session.info.pop("search_index_dirty", False):
+        search_index.invalidate()
+
+
+def _uses_postgres(db: AsyncSession) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+
+async def get_books_by_ids(db: AsyncSession, book_ids: list[int]) -> list[Book]:
+    if not book_ids:
+        return []
+    result = await db.execute(
+        select(Book).options(joinedload(Book.author)).where(Book.id.in_(book_ids))
+    )
+    books = {book.id: book for book in result.scalars()}
+    return [books[book_id] for book_id in book_ids if book_id in books]
+
+
+async def search_books(db: AsyncSession, query: str, limit: int = 20) -> list[Book]:
+    if not _uses_postgres(db):
+        await search_index.ensure_built(db)
+        return await get_books_by_ids(db, search_index.search(query, limit))
+
+    ts_query = func.websearch_to_tsquery(_SIMPLE, query)
+    matching_authors = select(Author.id).where(author_document().op("@@")(ts_query))
+    # ts_rank is roughly 0..1, an author hit counts like a strong text match
+    rank = func.ts_rank(book_document(), ts_query) + case(
+        (Book.author_id.in_(matching_authors), 0.5), else_=0.0
+    )
+    result = await db.execute(
+        select(Book)
+        .options(joinedload(Book.author))
+        .where(book_document().op("@@")(ts_query) | Book.author_id.in_(matching_authors))
+        .order_by(rank.desc(), Book.id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def autocomplete(
+    db: AsyncSession, prefix: str, limit: int = 10
+) -> list[tuple[str, int, str]]:
+    if not _uses_postgres(db):
+        await search_index.ensure_built(db)
+        return search_index.autocomplete(prefix, limit)
+
+    pattern = escape_like(prefix.lower()) + "%"
+    authors = await db.execute(
+        select(Author.id, Author.name)
+        .where(func.lower(Author.name).like(pattern, escape="\\"))
+        .order_by(func.lower(Author.name))
+        .limit(limit)
+    )
+    suggestions = [("author", author_id, name) for author_id, name in authors]
+    books = await db.execute(
+        select(Book.id, Book.title)
+        .where(func.lower(Book.title).like(pattern, escape="\\"))
+        .order_by(func.lower(Book.title))
+        .limit(limit)
+    )
+    suggestions += [("book", book_id, title) for book_id, title in books]
+    return suggestions[:limit]
@@ -1,31 +1,131 @@
-from datetime import datetime, timedelta
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from app.config import settings
+from app.metrics import registry
+from app.tokens import get_token_verifier
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# passlib is imported on first use: it is not needed to import the app, and
+# the lifespan warm-up loads bcrypt before traffic arrives
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.bcrypt_rounds,
+    )
+
+
+def __getattr__(name: str):
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds",
+    "CPU-bound bcrypt time per operation, excluding time queued for a worker",
+    labelnames=("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop in a bounded thread pool.
+
+    ``max_workers=0`` keeps the old behaviour and hashes inline.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+            if max_workers > 0
+            else None
+        )
+
+    async def _run(self, operation: str, func, *args):
+        if self._executor is None:
+            result, elapsed = _timed(func, *args)
+        else:
+            if self.pending >= self.max_pending:
+                raise PasswordHasherBusy("Password hashing queue is full")
+
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                result, elapsed = await loop.run_in_executor(self._executor, _timed, func, *args)
+            finally:
+                self.pending -= 1
+
+        # observed back on the event loop: metrics are not thread-safe
+        password_hash_seconds.observe(elapsed, operation=operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_pwd_context().hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", get_pwd_context().verify, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            "verify", get_pwd_context().verify_and_update, plain_password, hashed_password
+        )
+
+    async def warm_up(self) -> None:
+        # the first call loads and self-tests the bcrypt backend (several hashes)
+        await self.hash("warm-up")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-
-
-def decode_token(token: str) -> dict | None:
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
-    except JWTError:
-        return None
+    claims = {
+        **data,
+        "exp": int(time.time()) + settings.access_token_expire_minutes * 60,
+        # lets a single token be revoked
+        "jti": secrets.token_urlsafe(16),
+    }
+    return get_token_verifier().backend.encode(claims)
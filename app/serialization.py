@@ -0,0 +1,102 @@
+"""Fast JSON rendering for the hot catalogue reads.
+
+Bodies are built straight from row tuples and encoded with orjson, so data
+that came out of our own database is not validated again on the way out.
+The shapes must stay identical to BookResponse, PaginatedBooks and
+AuthorWithBooksResponse, which remain the documented contract.
+"""
+from collections.abc import Sequence
+
+import orjson
+from fastapi.responses import Response
+
+from app.crud import AUTHOR_COLUMNS, BOOK_COLUMNS
+
+BOOK_KEYS = tuple(column.key for column in BOOK_COLUMNS)
+AUTHOR_KEYS = tuple(column.key for column in AUTHOR_COLUMNS)
+BOOK_FIELDS = (*BOOK_KEYS, "author")
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class BookFields:
+    """A sparse field set for book lists, e.g. ``fields=title,price``.
+
+    `id` is always included: cursors and cache tags are built from it.
+    """
+
+    __slots__ = ("keys", "columns", "with_author")
+
+    def __init__(self, fields: str | None = None):
+        requested = {name.strip() for name in fields.split(",")} if fields else set(BOOK_FIELDS)
+        requested.discard("")
+        unknown = requested.difference(BOOK_FIELDS)
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        requested.add("id")
+        selected = [
+            (key, column) for key, column in zip(BOOK_KEYS, BOOK_COLUMNS) if key in requested
+        ]
+        self.keys = tuple(key for key, _ in selected)
+        self.columns = tuple(column for _, column in selected)
+        self.with_author = "author" in requested
+
+    @property
+    def cache_key(self) -> str:
+        return ",".join(self.keys) + (",author" if self.with_author else "")
+
+
+ALL_BOOK_FIELDS = BookFields()
+
+
+def dumps(value) -> bytes:
+    # OPT_UTC_Z: render UTC as "Z" like pydantic does
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def book_list_item(row: Sequence) -> dict:
+    return dict(zip(BOOK_KEYS, row))
+
+
+def author_item(row: Sequence) -> dict:
+    return dict(zip(AUTHOR_KEYS, row))
+
+
+def book_item(row: Sequence, fields: BookFields = ALL_BOOK_FIELDS) -> dict:
+    """(*fields.columns, *AUTHOR_COLUMNS) -> BookResponse-shaped dict."""
+    book = dict(zip(fields.keys, row))
+    if fields.with_author:
+        book["author"] = dict(zip(AUTHOR_KEYS, row[len(fields.keys) :]))
+    return book
+
+
+def book_page(
+    items: list[dict],
+    total: int | None,
+    limit: int,
+    offset: int,
+    next_cursor: str | None,
+) -> dict:
+    return {
+        "items": items,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+    }
+
+
+def author_with_books(author: Sequence, books: Sequence[Sequence]) -> dict:
+    body = author_item(author)
+    body["books"] = [book_list_item(row) for row in books]
+    return body
@@ -0,0 +1,292 @@
+"""Access token signing, verification cache and revocation.
+
+TokenBackend turns claims into a compact JWS and back. Each backend holds a
+signing key stamped with a ``kid`` header and a set of verification keys by
+kid, so keys can be rotated: add the new key, switch jwt_key_id, and drop
+the old key once its tokens have expired.
+
+TokenVerifier caches verified claims by token digest until the token's
+``exp`` (or the cache TTL), and checks the ``jti`` against a revocation store
+on every request, cached or not.
+
+Refresh tokens are opaque random strings, stored only as digests.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import math
+import secrets
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+import orjson
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import registry
+
+token_verifications = registry.counter(
+    "token_verifications_total",
+    "Access token checks by outcome",
+    labelnames=("result",),
+)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenBackend(ABC):
+    def __init__(
+        self,
+        signing_key: str,
+        algorithm: str,
+        key_id: str = "",
+        verify_keys: dict[str, str] | None = None,
+    ):
+        self.signing_key = signing_key
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self.verify_keys = dict(verify_keys or {})
+        if algorithm.startswith("HS"):
+            # symmetric: the signing secret verifies its own tokens
+            self.verify_keys.setdefault(key_id, signing_key)
+        if key_id not in self.verify_keys:
+            raise ValueError(f"No verification key for the signing key id {key_id!r}")
+
+    def _key_id(self, header: dict) -> str:
+        kid = header.get("kid", "")
+        # the header is attacker-controlled: a list or dict kid must not reach a dict lookup
+        if not isinstance(kid, str) or kid not in self.verify_keys:
+            raise InvalidToken("Unknown key id")
+        return kid
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str: ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        """Verified claims, or InvalidToken (bad signature, unknown kid, expired)."""
+
+
+class JoseBackend(TokenBackend):
+    """python-jose: every algorithm it supports, including RS*/ES* key pairs."""
+
+    def encode(self, claims: dict) -> str:
+        from jose import jwt
+
+        headers = {"kid": self.key_id} if self.key_id else None
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        from jose import JWTError, jwt
+
+        try:
+            key = self.verify_keys[self._key_id(jwt.get_unverified_header(token))]
+            return jwt.decode(token, key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise InvalidToken(str(e)) from e
+
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class HMACBackend(TokenBackend):
+    """HS256/384/512 with hmac and orjson, without jose.
+
+    Issues and accepts the same compact JWS as JoseBackend, so the two can be
+    switched without invalidating tokens.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.algorithm not in _HMAC_DIGESTS:
+            raise ValueError(f"HMACBackend does not support {self.algorithm}")
+        self._digest = _HMAC_DIGESTS[self.algorithm]
+        header = {"alg": self.algorithm, "typ": "JWT"}
+        if self.key_id:
+            header["kid"] = self.key_id
+        self._header_segment = _b64encode(orjson.dumps(header))
+        self._keys = {kid: key.encode() for kid, key in self.verify_keys.items()}
+
+    def encode(self, claims: dict) -> str:
+        signing_input = self._header_segment + b"." + _b64encode(orjson.dumps(claims))
+        signature = hmac.new(self._keys[self.key_id], signing_input, self._digest).digest()
+        return (signing_input + b"." + _b64encode(signature)).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = orjson.loads(_b64decode(header_segment))
+            if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+                raise InvalidToken("Unexpected algorithm")
+            key = self._keys[self._key_id(header)]
+            signing_input = f"{header_segment}.{payload_segment}".encode()
+            expected = hmac.new(key, signing_input, self._digest).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature_segment)):
+                raise InvalidToken("Signature verification failed")
+            claims = orjson.loads(_b64decode(payload_segment))
+        except ValueError as e:
+            # malformed segments, base64 or JSON
+            raise InvalidToken("Malformed token") from e
+
+        if not isinstance(claims, dict):
+            raise InvalidToken("Malformed token")
+        exp = claims.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise InvalidToken("Invalid exp claim")
+            if exp <= time.time():
+                raise InvalidToken("Signature has expired")
+        return claims
+
+
+TOKEN_BACKENDS: dict[str, type[TokenBackend]] = {"jose": JoseBackend, "hmac": HMACBackend}
+
+
+def build_token_backend() -> TokenBackend:
+    verify_keys = json.loads(settings.jwt_verify_keys) if settings.jwt_verify_keys else {}
+    return TOKEN_BACKENDS[settings.token_backend](
+        settings.secret_key,
+        settings.algorithm,
+        key_id=settings.jwt_key_id,
+        verify_keys=verify_keys,
+    )
+
+
+class RevocationStore(ABC):
+    """Revoked token ids (``jti``), kept until the token would have expired."""
+
+    @abstractmethod
+    async def is_revoked(self, jti: str) -> bool: ...
+
+    @abstractmethod
+    async def revoke(self, jti: str, expires_at: float) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class InMemoryRevocationStore(RevocationStore):
+    """A dict lookup per request. Per process: several workers need a shared store."""
+
+    def __init__(self, prune_interval: float = 60.0):
+        self.prune_interval = prune_interval
+        self._revoked: dict[str, float] = {}
+        self._next_prune = time.monotonic() + prune_interval
+
+    async def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        if time.monotonic() >= self._next_prune:
+            self._prune()
+
+    async def clear(self) -> None:
+        self._revoked.clear()
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._next_prune = time.monotonic() + self.prune_interval
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+def new_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def refresh_token_digest(token: str) -> str:
+    # 256 random bits need no salt or slow hash: a plain digest is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        backend: TokenBackend,
+        revocations: RevocationStore,
+        max_size: int,
+        ttl: float,
+    ):
+        self.backend = backend
+        self.revocations = revocations
+        self.cache: TTLCache[dict] = TTLCache(max_size=max_size, ttl=ttl, name="token")
+
+    async def verify(self, token: str) -> dict | None:
+        key = token_digest(token)
+        claims = self.cache.get(key)
+        result = "cached"
+        if claims is None:
+            try:
+                claims = self.backend.decode(token)
+            except InvalidToken:
+                token_verifications.inc(result="invalid")
+                return None
+            exp = claims.get("exp")
+            ttl = self.cache.ttl
+            if isinstance(exp, (int, float)):
+                ttl = min(ttl, exp - time.time())
+            self.cache.set(key, claims, ttl=ttl)
+            result = "verified"
+
+        jti = claims.get("jti")
+        if jti is not None and await self.revocations.is_revoked(jti):
+            token_verifications.inc(result="revoked")
+            return None
+        token_verifications.inc(result=result)
+        return claims
+
+    async def revoke(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti is None:
+            return False
+        exp = claims.get("exp")
+        await self.revocations.revoke(jti, exp if isinstance(exp, (int, float)) else math.inf)
+        return True
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+revocation_list = InMemoryRevocationStore()
+
+
+@lru_cache(maxsize=None)
+def get_token_verifier() -> TokenVerifier:
+    return TokenVerifier(
+        build_token_backend(),
+        revocation_list,
+        max_size=settings.token_cache_max_size,
+        ttl=settings.token_cache_ttl_seconds,
+    )
+
+
+async def verify_request_token(scope: dict, token: str) -> dict | None:
+    """Verify the request's bearer token once.
+
+    The claims are kept in the request state, so the rate limiter and the
+    auth dependencies share one verification and revocation check.
+    """
+    state = scope.setdefault("state", {})
+    verified = state.get("verified_token")
+    if verified is None or verified[0] != token:
+        verified = state["verified_token"] = (token, await get_token_verifier().verify(token))
+    return verified[1]
@@ -0,0 +1,61 @@
+"""Per-request overhead of get_current_user with the principal already cached.
+
+Isolates token handling: jose vs the stdlib HMAC backend, each with the
+verified-token cache off and on, plus the revocation check.
+
+    python -m benchmarks.bench_auth --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import new_request
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.cache import TTLCache
+from app.config import settings
+from app.dependencies import get_current_user
+from app.models import UserRole
+from app.principal import Principal, principal_cache
+from app.tokens import HMACBackend, JoseBackend, get_token_verifier
+
+
+async def measure(name: str, requests: int, tokens: int) -> None:
+    verifier = get_token_verifier()
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=verifier.backend.encode(
+                {"sub": "1", "exp": int(time.time()) + 3600, "jti": f"bench-{i}"}
+            ),
+        )
+        for i in range(tokens)
+    ]
+    for credential in credentials:
+        await get_current_user(new_request(), credential, None)
+
+    start = time.perf_counter()
+    for i in range(requests):
+        await get_current_user(new_request(), credentials[i % tokens], None)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} us/req={elapsed / requests * 1e6:8.2f}")
+
+
+async def main(requests: int, tokens: int) -> None:
+    principal_cache.set("1", Principal(id=1, role=UserRole.USER))
+    verifier = get_token_verifier()
+
+    for name, backend_cls in (("jose", JoseBackend), ("hmac", HMACBackend)):
+        verifier.backend = backend_cls(settings.secret_key, settings.algorithm)
+        for cache_size in (0, 10_000):
+            verifier.cache = TTLCache(max_size=cache_size, ttl=300)
+            await measure(f"{name}_{'cached' if cache_size else 'nocache'}", requests, tokens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--tokens", type=int, default=100, help="distinct tokens in rotation")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.tokens))
@@ -0,0 +1,103 @@
+"""Peak RSS of a full catalogue export: streamed vs materialized.
+
+Each mode runs in a fresh interpreter so ru_maxrss only reflects that mode.
+
+    python -m benchmarks.bench_export --books 1000000
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import reset_schema
+
+
+async def seed(books: int, authors: int) -> None:
+    from datetime import date
+
+    from sqlalchemy import insert
+
+    from app.database import get_engines
+    from app.models import Author, Book
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        await db.execute(
+            insert(Author),
+            [{"name": f"Author {i}", "birth_date": date(1970, 1, 1)} for i in range(authors)],
+        )
+        for start in range(0, books, 10_000):
+            await db.execute(
+                insert(Book),
+                [
+                    {
+                        "title": f"Book {i}",
+                        "description": "Lorem ipsum dolor sit amet " * 4,
+                        "price": i % 5000,
+                        "stock_quantity": i % 50,
+                        "author_id": i % authors + 1,
+                    }
+                    for i in range(start, min(start + 10_000, books))
+                ],
+            )
+        await db.commit()
+    await get_engines().engine.dispose()
+
+
+async def export(mode: str) -> dict:
+    from app.crud import get_books
+    from app.database import get_engines
+    from app.exporter import encode_rows, stream_catalogue
+    from app.schemas import PaginatedBooks
+
+    size = 0
+    start = time.perf_counter()
+    async with get_engines().async_session() as db:
+        if mode == "stream":
+            async for chunk in encode_rows(stream_catalogue(db), "ndjson"):
+                size += len(chunk)
+        else:
+            # what GET /books would do with an unbounded limit
+            books, total = await get_books(db, limit=sys.maxsize)
+            body = PaginatedBooks(items=books, total=total, limit=len(books), offset=0)
+            size = len(body.model_dump_json())
+    seconds = time.perf_counter() - start
+    await get_engines().engine.dispose()
+    # ru_maxrss is in KiB on Linux
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"mode": mode, "seconds": seconds, "bytes": size, "peak_rss_mib": peak_mib}
+
+
+def run_isolated(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_export", "--run", mode],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--authors", type=int, default=10_000)
+    parser.add_argument("--skip-materialized", action="store_true")
+    parser.add_argument("--run", choices=["stream", "materialized"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(asyncio.run(export(args.run))))
+        sys.exit()
+
+    asyncio.run(seed(args.books, args.authors))
+    modes = ["stream"] if args.skip_materialized else ["stream", "materialized"]
+    for mode in modes:
+        result = run_isolated(mode)
+        print(
+            f"{mode:<13} books={args.books:<8} time={result['seconds']:7.2f}s "
+            f"output={result['bytes'] / 2**20:8.1f}MiB peak_rss={result['peak_rss_mib']:8.1f}MiB"
+        )
@@ -0,0 +1,111 @@
+"""Bulk import throughput in rows/s.
+
+Compares the streaming importer with the one-book-at-a-time path that the
+``POST /authors`` + ``POST /books`` loop used to go through.
+
+    python -m benchmarks.bench_import --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import reset_schema
+
+
+def generate(rows: int, authors: int) -> list[bytes]:
+    rng = random.Random(1)
+    lines = []
+    for i in range(rows):
+        author = rng.randrange(authors)
+        lines.append(
+            json.dumps(
+                {
+                    "title": f"Imported book {i}",
+                    "description": "Lorem ipsum " * 20,
+                    "price": rng.randint(100, 5000),
+                    "stock_quantity": rng.randint(0, 50),
+                    "author_name": f"Publisher author {author}",
+                    "author_birth_date": "1970-01-01",
+                }
+            ).encode()
+        )
+    return lines
+
+
+async def chunked(lines: list[bytes], size: int = 1 << 16):
+    buffer = b""
+    for line in lines:
+        buffer += line + b"\n"
+        if len(buffer) >= size:
+            yield buffer
+            buffer = b""
+    if buffer:
+        yield buffer
+
+
+async def bulk(lines: list[bytes], batch_size: int) -> float:
+    from app.database import get_engines
+    from app.importer import CatalogueImporter, parse_records
+
+    await reset_schema()
+    start = time.perf_counter()
+    async with get_engines().async_session() as db:
+        report = await CatalogueImporter(db, batch_size=batch_size).run(
+            parse_records(chunked(lines), "ndjson")
+        )
+        await db.commit()
+    assert report.failed == 0, report.errors[:5]
+    return report.imported / (time.perf_counter() - start)
+
+
+async def per_row(lines: list[bytes]) -> float:
+    from app import crud
+    from app.database import get_engines
+    from app.schemas import AuthorCreate, BookCreate
+
+    await reset_schema()
+    start = time.perf_counter()
+    for line in lines:
+        record = json.loads(line)
+        async with get_engines().async_session() as db:
+            author = await crud.get_author_by_name(db, record["author_name"])
+            if author is None:
+                author = await crud.create_author(
+                    db, AuthorCreate(name=record["author_name"], birth_date=record["author_birth_date"])
+                )
+            await crud.get_author(db, author.id)
+            await crud.create_book(
+                db,
+                BookCreate(
+                    title=record["title"],
+                    description=record["description"],
+                    price=record["price"],
+                    stock_quantity=record["stock_quantity"],
+                    author_id=author.id,
+                ),
+            )
+            await db.commit()
+    return len(lines) / (time.perf_counter() - start)
+
+
+async def main(rows: int, authors: int, batch_size: int, baseline_rows: int) -> None:
+    from app.database import get_engines
+
+    lines = generate(rows, authors)
+    print(f"bulk      rows={rows:<8} rows/s={await bulk(lines, batch_size):10.0f}")
+    if baseline_rows:
+        sample = lines[:baseline_rows]
+        print(f"per-row   rows={len(sample):<8} rows/s={await per_row(sample):10.0f}")
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--baseline-rows", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.authors, args.batch_size, args.baseline_rows))
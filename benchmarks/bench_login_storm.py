@@ -0,0 +1,82 @@
+"""Latency of ``GET /books`` while ``/auth/login`` is saturated.
+
+``--hash-workers 0`` runs bcrypt inline on the event loop (the old behaviour),
+any positive value offloads it to the bounded thread pool.
+
+    python -m benchmarks.bench_login_storm --hash-workers 0
+    python -m benchmarks.bench_login_storm --hash-workers 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import percentile, reset_schema
+
+
+async def seed() -> None:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book, User
+    from app.security import get_password_hash
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        author = Author(name="Storm Author", birth_date=date(1970, 1, 1))
+        db.add(author)
+        db.add_all(
+            Book(title=f"Book {i}", description="x", price=100, stock_quantity=1, author=author)
+            for i in range(50)
+        )
+        db.add(User(username="storm", email="storm@example.com", password=get_password_hash("password")))
+        await db.commit()
+
+
+async def main(duration: float, login_concurrency: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.database import get_engines
+    from app.main import app
+
+    await seed()
+    stop_at = time.perf_counter() + duration
+    latencies: list[float] = []
+    logins = {"ok": 0, "busy": 0}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def login_loop():
+            while time.perf_counter() < stop_at:
+                response = await client.post(
+                    "/auth/login", json={"username": "storm", "password": "password"}
+                )
+                logins["ok" if response.status_code == 200 else "busy"] += 1
+
+        async def browse_loop():
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                await client.get("/books?limit=20")
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(browse_loop(), *(login_loop() for _ in range(login_concurrency)))
+
+    await get_engines().engine.dispose()
+    print(
+        f"hash_workers={os.environ['PASSWORD_HASH_WORKERS']} "
+        f"logins_ok={logins['ok']} logins_rejected={logins['busy']} "
+        f"books_requests={len(latencies)} "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hash-workers", type=int, default=4)
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+    asyncio.run(main(args.duration, args.login_concurrency))
@@ -0,0 +1,126 @@
+"""Cost of request and query instrumentation.
+
+Measures the middleware around a bare ASGI app, a full request to GET
+/books/{id} with the middleware and query listeners on and off, and the
+query listeners alone.
+
+    python -m benchmarks.bench_metrics_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import reset_schema
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_call(app, calls: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    start = time.perf_counter()
+    for _ in range(calls):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / calls
+
+
+async def seed() -> int:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        author = Author(name="Author", birth_date=date(1970, 1, 1))
+        book = Book(title="Book", description="x" * 400, price=100, author=author)
+        db.add(book)
+        await db.commit()
+        return book.id
+
+
+def set_instrumented(app, enabled: bool) -> None:
+    from starlette.middleware import Middleware
+
+    from app.instrumentation import MetricsMiddleware, instrument_queries, uninstrument_queries
+
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not MetricsMiddleware]
+    if enabled:
+        app.user_middleware.insert(0, Middleware(MetricsMiddleware))
+        instrument_queries()
+    else:
+        uninstrument_queries()
+    app.middleware_stack = None  # rebuilt on the next request
+
+
+async def per_request(client, path: str, requests: int) -> float:
+    await client.get(path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        (await client.get(path)).raise_for_status()
+    return (time.perf_counter() - start) / requests
+
+
+async def per_query(queries: int) -> float:
+    from sqlalchemy import text
+
+    from app.database import get_engines
+
+    async with get_engines().engine.connect() as conn:
+        start = time.perf_counter()
+        for _ in range(queries):
+            await conn.execute(text("SELECT 1"))
+        return (time.perf_counter() - start) / queries
+
+
+async def main(requests: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.cache import response_cache
+    from app.database import get_engines
+    from app.instrumentation import MetricsMiddleware, instrument_queries, uninstrument_queries
+    from app.main import app
+
+    bare = await per_call(bare_app, requests * 10)
+    wrapped = await per_call(MetricsMiddleware(bare_app), requests * 10)
+    print(f"middleware alone      {(wrapped - bare) * 1e6:+6.1f}us per request")
+
+    # alternate on/off runs and keep the best of each to shave off noise
+    timings = {}
+    for enabled in (False, True) * 3:
+        instrument_queries() if enabled else uninstrument_queries()
+        timings.setdefault(enabled, []).append(await per_query(requests))
+    plain, instrumented = min(timings[False]), min(timings[True])
+    print(f"query listeners       {(instrumented - plain) * 1e6:+6.1f}us per statement")
+
+    book_id = await seed()
+    response_cache.enabled = False
+    path = f"/books/{book_id}"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        results = {}
+        for enabled in (False, True) * 3:
+            set_instrumented(app, enabled)
+            results.setdefault(enabled, []).append(await per_request(client, path, requests))
+    off, on = min(results[False]), min(results[True])
+    print(
+        f"GET /books/{{id}}       off={off * 1e6:7.1f}us on={on * 1e6:7.1f}us "
+        f"overhead={(on - off) * 1e6:+6.1f}us ({(on - off) / off:+.1%})"
+    )
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,74 @@
+"""Connection pool saturation: N concurrent requests against a small pool.
+
+Each simulated request checks out a connection, runs a query and holds the
+connection for ``--hold-ms`` (standing in for work done inside the
+transaction). Past pool_size + max_overflow requests queue for a connection;
+those that wait longer than pool_timeout fail and are counted.
+
+    python -m benchmarks.bench_pool --pool-size 5 --overflow 0 --timeout 0.5 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import percentile
+
+
+async def main(concurrency: int, requests: int, hold: float) -> None:
+    from sqlalchemy import exc, text
+
+    from app.database import get_engines, pool_checkout_seconds, pool_checkout_timeouts
+    from app.metrics import registry
+
+    pool = get_engines().engine.sync_engine.pool
+    latencies: list[float] = []
+    peak_checked_out = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request():
+        nonlocal peak_checked_out
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with get_engines().async_session() as db:
+                    await db.execute(text("SELECT 1"))
+                    peak_checked_out = max(peak_checked_out, pool.checkedout())
+                    await asyncio.sleep(hold)
+                    await db.commit()
+            except exc.TimeoutError:
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await get_engines().engine.dispose()
+
+    _, wait_total = next(iter(pool_checkout_seconds.values.values()), ([], 0.0))
+    checkouts = pool_checkout_seconds.count()
+    print(
+        f"pool_size={os.environ['DB_POOL_SIZE']} overflow={os.environ['DB_MAX_OVERFLOW']} "
+        f"timeout={os.environ['DB_POOL_TIMEOUT']}s concurrency={concurrency}\n"
+        f"ok={len(latencies)} timeouts={int(pool_checkout_timeouts.get())} "
+        f"req/s={len(latencies) / elapsed:.1f} peak_checked_out={peak_checked_out}\n"
+        f"latency p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"mean_checkout_wait={wait_total / max(checkouts, 1) * 1000:.1f}ms"
+    )
+    print(registry.metrics["db_pool_checkout_seconds"].render())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--overflow", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--hold-ms", type=float, default=20)
+    args = parser.parse_args()
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(args.overflow)
+    os.environ["DB_POOL_TIMEOUT"] = str(args.timeout)
+    asyncio.run(main(args.concurrency, args.requests, args.hold_ms / 1000))
@@ -0,0 +1,87 @@
+"""Per-request cost of resolving the authenticated user.
+
+Compares the old path (full ``User`` entity with its order history) with the
+cached principal projection used by ``get_current_user``.
+
+    python -m benchmarks.bench_principal --orders 500 --requests 200
+"""
+import argparse
+import asyncio
+import tracemalloc
+from datetime import date
+
+from benchmarks.common import new_request, reset_schema, timer
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.crud import get_user
+from app.database import get_engines
+from app.dependencies import get_current_user
+from app.diagnostics import capture_queries
+from app.models import Author, Book, Order, User
+from app.principal import principal_cache
+from app.security import create_access_token
+
+
+async def seed(orders: int) -> int:
+    await reset_schema()
+
+    async with get_engines().async_session() as db:
+        author = Author(name="Bench Author", birth_date=date(1970, 1, 1))
+        book = Book(title="Bench", description="x" * 500, price=100, stock_quantity=10**6, author=author)
+        user = User(username="bench", email="bench@example.com", password="x")
+        db.add_all([author, book, user])
+        await db.flush()
+        db.add_all(
+            Order(user_id=user.id, book_id=book.id, quantity=1, total_price=100)
+            for _ in range(orders)
+        )
+        await db.commit()
+        return user.id
+
+
+async def measure(name: str, resolve, requests: int) -> None:
+    with capture_queries() as counter, timer() as elapsed:
+        tracemalloc.start()
+        for _ in range(requests):
+            async with get_engines().async_session() as db:
+                await resolve(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f"{name:<18} statements/req={counter.count / requests:6.2f} "
+        f"peak_alloc={peak / 1024:9.1f} KiB "
+        f"us/req={elapsed['seconds'] / requests * 1e6:9.1f}"
+    )
+
+
+async def main(orders: int, requests: int) -> None:
+    user_id = await seed(orders)
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=create_access_token({"sub": str(user_id)})
+    )
+
+    async def full_entity(db):
+        await get_user(db, user_id)
+
+    async def uncached_principal(db):
+        principal_cache.clear()
+        await get_current_user(new_request(), credentials, db)
+
+    async def cached_principal(db):
+        await get_current_user(new_request(), credentials, db)
+
+    await measure("full_entity", full_entity, requests)
+    await measure("principal_nocache", uncached_principal, requests)
+    principal_cache.clear()
+    await measure("principal_cached", cached_principal, requests)
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.requests))
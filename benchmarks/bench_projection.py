@@ -0,0 +1,110 @@
+"""Memory and latency of one 100-item book page: ORM entities vs projections.
+
+    python -m benchmarks.bench_projection --items 100 --description-size 4000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import percentile, reset_schema
+
+
+async def seed(books: int, description_size: int) -> None:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        authors = [Author(name=f"Author {i}", birth_date=date(1970, 1, 1)) for i in range(10)]
+        db.add_all(authors)
+        db.add_all(
+            Book(
+                title=f"Book {i}",
+                description="x" * description_size,
+                price=100 + i,
+                stock_quantity=10,
+                author=authors[i % len(authors)],
+            )
+            for i in range(books)
+        )
+        await db.commit()
+
+
+async def orm_page(db, limit: int) -> bytes:
+    from app.crud import get_books
+    from app.schemas import PaginatedBooks
+
+    books, total = await get_books(db, limit=limit)
+    return PaginatedBooks(items=books, total=total, limit=limit, offset=0).model_dump_json().encode()
+
+
+def projected_page(fields: str | None):
+    from app.crud import get_book_rows
+    from app.serialization import BookFields, book_item, book_page, dumps
+
+    book_fields = BookFields(fields)
+
+    async def page(db, limit: int) -> bytes:
+        rows, total = await get_book_rows(
+            db,
+            limit=limit,
+            book_columns=book_fields.columns,
+            with_author=book_fields.with_author,
+        )
+        return dumps(book_page([book_item(row, book_fields) for row in rows], total, limit, 0, None))
+
+    return page
+
+
+async def measure(page, limit: int, iterations: int) -> dict:
+    from app.database import get_engines
+
+    async with get_engines().read_session() as db:
+        await page(db, limit)  # warm up statement caches
+
+    latencies = []
+    for _ in range(iterations):
+        async with get_engines().read_session() as db:
+            start = time.perf_counter()
+            await page(db, limit)
+            latencies.append(time.perf_counter() - start)
+
+    async with get_engines().read_session() as db:
+        tracemalloc.start()
+        body = await page(db, limit)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"latencies": latencies, "peak": peak, "bytes": len(body)}
+
+
+async def main(items: int, iterations: int, description_size: int) -> None:
+    from app.database import get_engines
+
+    await seed(items, description_size)
+    for name, page in (
+        ("orm entities", orm_page),
+        ("rows, all fields", projected_page(None)),
+        ("rows, no description", projected_page("title,price,stock_quantity,author")),
+        ("rows, id+title+price", projected_page("title,price")),
+    ):
+        result = await measure(page, items, iterations)
+        latencies = result["latencies"]
+        print(
+            f"{name:<22} p50={statistics.median(latencies) * 1000:7.2f}ms "
+            f"p95={percentile(latencies, 95) * 1000:7.2f}ms "
+            f"peak_alloc={result['peak'] / 1024:8.1f}KiB body={result['bytes'] / 1024:7.1f}KiB"
+        )
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--description-size", type=int, default=4000)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.iterations, args.description_size))
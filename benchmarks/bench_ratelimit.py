@@ -0,0 +1,112 @@
+"""Latency of ``GET /books`` for one client while another floods ``/auth/login``.
+
+The flooder and the browser come from different addresses (``X-Forwarded-For``
+behind one trusted proxy). With ``--limit on`` the flooder's bucket runs dry
+after its burst and the rest of its logins get 429 without touching bcrypt.
+Also reports the cost of the limiter check itself.
+
+    python -m benchmarks.bench_ratelimit --limit off
+    python -m benchmarks.bench_ratelimit --limit on
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import percentile, reset_schema
+
+
+async def seed() -> None:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book, User
+    from app.security import get_password_hash
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        author = Author(name="Flood Author", birth_date=date(1970, 1, 1))
+        db.add(author)
+        db.add_all(
+            Book(title=f"Book {i}", description="x", price=100, stock_quantity=1, author=author)
+            for i in range(50)
+        )
+        db.add(User(username="flood", email="flood@example.com", password=get_password_hash("password")))
+        await db.commit()
+
+
+async def check_overhead(checks: int) -> float:
+    from app.ratelimit import InMemoryRateLimitStore, RateLimiter
+
+    limiter = RateLimiter(InMemoryRateLimitStore(max_keys=100_000), 1e9, 1e9, 1e9, 1e9)
+    scopes = [
+        {"method": "GET", "path": "/books", "query_string": b"limit=20", "headers": [],
+         "client": (f"10.{i // 256 % 256}.{i % 256}.1", 1234)}
+        for i in range(1000)
+    ]
+    start = time.perf_counter()
+    for i in range(checks):
+        await limiter.check(scopes[i % len(scopes)])
+    return (time.perf_counter() - start) / checks
+
+
+async def main(duration: float, login_concurrency: int, login_rate: float) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.database import get_engines
+    from app.main import app
+
+    await seed()
+    stop_at = time.perf_counter() + duration
+    latencies: list[float] = []
+    logins: dict[int, int] = {}
+    browse: dict[int, int] = {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def login_loop():
+            while time.perf_counter() < stop_at:
+                response = await client.post(
+                    "/auth/login",
+                    json={"username": "flood", "password": "password"},
+                    headers={"X-Forwarded-For": "203.0.113.66"},
+                )
+                logins[response.status_code] = logins.get(response.status_code, 0) + 1
+                # ignores Retry-After; paced so the in-process client does not eat the CPU
+                await asyncio.sleep(login_concurrency / login_rate)
+
+        async def browse_loop():
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                response = await client.get(
+                    "/books?limit=20", headers={"X-Forwarded-For": "198.51.100.7"}
+                )
+                latencies.append(time.perf_counter() - start)
+                browse[response.status_code] = browse.get(response.status_code, 0) + 1
+                # within the default per-IP rate
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(browse_loop(), *(login_loop() for _ in range(login_concurrency)))
+
+    await get_engines().engine.dispose()
+    overhead = await check_overhead(20000)
+    print(
+        f"rate_limit={os.environ['RATE_LIMIT_ENABLED']} "
+        f"logins={dict(sorted(logins.items()))} "
+        f"books={dict(sorted(browse.items()))} "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"check={overhead * 1e6:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", choices=["on", "off"], default="on")
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("--login-rate", type=float, default=100.0, help="offered logins/s")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if args.limit == "on" else "false"
+    os.environ["RATE_LIMIT_FORWARDED_HOPS"] = "1"
+    asyncio.run(main(args.duration, args.login_concurrency, args.login_rate))
@@ -0,0 +1,68 @@
+"""CPU cost of renewing a session: POST /auth/login vs POST /auth/refresh.
+
+Process CPU time includes the bcrypt worker threads, so login pays for its
+full bcrypt verify while refresh is one indexed UPDATE plus an INSERT.
+
+    python -m benchmarks.bench_refresh --requests 50
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import reset_schema
+
+
+async def seed() -> None:
+    from app.database import get_engines
+    from app.models import User
+    from app.security import get_password_hash
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        db.add(User(username="bench", email="bench@example.com", password=get_password_hash("password")))
+        await db.commit()
+
+
+async def main(requests: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.config import settings
+    from app.database import get_engines
+    from app.diagnostics import capture_queries
+    from app.main import app
+
+    await seed()
+    credentials = {"username": "bench", "password": "password"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        refresh_token = (await client.post("/auth/login", json=credentials)).json()["refresh_token"]
+
+        async def login():
+            response = await client.post("/auth/login", json=credentials)
+            assert response.status_code == 200
+
+        async def refresh():
+            nonlocal refresh_token
+            response = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+            assert response.status_code == 200
+            refresh_token = response.json()["refresh_token"]
+
+        print(f"bcrypt rounds={settings.bcrypt_rounds}, {requests} requests each")
+        for name, call in (("login", login), ("refresh", refresh)):
+            with capture_queries() as counter:
+                cpu, wall = time.process_time(), time.perf_counter()
+                for _ in range(requests):
+                    await call()
+                cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+            print(
+                f"{name:<8} cpu_ms/req={cpu / requests * 1000:8.2f} "
+                f"wall_ms/req={wall / requests * 1000:8.2f} "
+                f"statements/req={counter.count / requests:5.2f}"
+            )
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
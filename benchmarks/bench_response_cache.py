@@ -0,0 +1,71 @@
+"""Catalogue read throughput with the response cache on and off.
+
+    python -m benchmarks.bench_response_cache --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import reset_schema
+
+
+async def seed(books: int) -> None:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        authors = [Author(name=f"Author {i}", birth_date=date(1970, 1, 1)) for i in range(10)]
+        db.add_all(authors)
+        db.add_all(
+            Book(
+                title=f"Book {i}",
+                description="x" * 400,
+                price=100 + i,
+                stock_quantity=10,
+                author=authors[i % len(authors)],
+            )
+            for i in range(books)
+        )
+        await db.commit()
+
+
+async def run(client, paths: list[str], requests: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        response = await client.get(paths[i % len(paths)])
+        response.raise_for_status()
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, books: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.cache import response_cache
+    from app.database import get_engines
+    from app.main import app
+
+    await seed(books)
+    paths = ["/books?limit=20", "/books?limit=100", "/books/1", "/books/2", "/authors/1"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for enabled in (False, True):
+            response_cache.enabled = enabled
+            await response_cache.clear()
+            rps = await run(client, paths, requests)
+            print(
+                f"cache={'on ' if enabled else 'off'} req/s={rps:8.1f} "
+                f"hits={response_cache.hits} misses={response_cache.misses}"
+            )
+
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.books))
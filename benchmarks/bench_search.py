@@ -0,0 +1,132 @@
+"""Search and autocomplete latency on a synthetic catalogue.
+
+On SQLite this measures the in-process inverted index (including its build);
+on Postgres the GIN indexes from migration 002 are created after seeding.
+
+    python -m benchmarks.bench_search --books 100000
+    python -m benchmarks.bench_search --books 1000000
+"""
+import argparse
+import asyncio
+import random
+import runpy
+import time
+from pathlib import Path
+
+from benchmarks.common import percentile, reset_schema
+
+WORDS = (
+    "dragon ring empire desert spice ocean winter garden shadow crown river storm "
+    "night glass iron silver forest city machine star letter house war peace song "
+    "child king queen mirror road island"
+).split()
+
+
+def phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def seed(books: int, authors: int) -> None:
+    from datetime import date
+
+    from sqlalchemy import insert
+
+    from app.database import get_engines
+    from app.models import Author, Book
+
+    rng = random.Random(42)
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        await db.execute(
+            insert(Author),
+            [
+                {"name": f"{phrase(rng, 2).title()} {i}", "birth_date": date(1950, 1, 1)}
+                for i in range(authors)
+            ],
+        )
+        chunk = 10_000
+        for start in range(0, books, chunk):
+            await db.execute(
+                insert(Book),
+                [
+                    {
+                        "title": f"{phrase(rng, 3).title()} {i}",
+                        "description": phrase(rng, 30),
+                        "price": 100,
+                        "stock_quantity": 1,
+                        "author_id": rng.randint(1, authors),
+                    }
+                    for i in range(start, min(books, start + chunk))
+                ],
+            )
+        await db.commit()
+
+
+async def create_search_indexes() -> None:
+    from sqlalchemy import text
+
+    from app.database import get_engines
+
+    migration = runpy.run_path(
+        str(Path(__file__).resolve().parent.parent / "alembic" / "versions" / "002_search.py")
+    )
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX ix_books_search ON books USING gin (({migration['BOOK_DOCUMENT']}))",
+        f"CREATE INDEX ix_authors_search ON authors USING gin (({migration['AUTHOR_DOCUMENT']}))",
+        "CREATE INDEX ix_books_title_trgm ON books USING gin (lower(title) gin_trgm_ops)",
+        "CREATE INDEX ix_authors_name_trgm ON authors USING gin (lower(name) gin_trgm_ops)",
+        "ANALYZE",
+    ]
+    async with get_engines().engine.begin() as conn:
+        for statement in statements:
+            await conn.execute(text(statement))
+
+
+async def measure(name: str, call, arguments: list[str]) -> None:
+    from app.database import get_engines
+
+    latencies = []
+    async with get_engines().async_session() as db:
+        for argument in arguments:
+            start = time.perf_counter()
+            await call(db, argument)
+            latencies.append(time.perf_counter() - start)
+    print(
+        f"{name:<13} n={len(latencies)} p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.2f}ms"
+    )
+
+
+async def main(books: int, authors: int, queries: int) -> None:
+    from app.database import get_engines
+    from app.search import autocomplete, search_books, search_index
+
+    start = time.perf_counter()
+    await seed(books, authors)
+    print(f"seeded {books} books in {time.perf_counter() - start:.1f}s")
+
+    if get_engines().engine.dialect.name == "postgresql":
+        await create_search_indexes()
+    else:
+        search_index.invalidate()
+        start = time.perf_counter()
+        async with get_engines().async_session() as db:
+            await search_index.ensure_built(db)
+        print(f"inverted index built in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(7)
+    await measure("search", search_books, [phrase(rng, rng.randint(1, 3)) for _ in range(queries)])
+    await measure(
+        "autocomplete", autocomplete, [rng.choice(WORDS)[: rng.randint(2, 4)] for _ in range(queries)]
+    )
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.authors, args.queries))
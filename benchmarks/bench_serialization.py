@@ -0,0 +1,103 @@
+"""CPU per serialized GET /books page: pydantic from ORM vs rows + orjson.
+
+    python -m benchmarks.bench_serialization --items 100 --iterations 2000
+"""
+import argparse
+import time
+from datetime import date, datetime
+
+from pydantic import TypeAdapter
+
+import benchmarks.common  # noqa: F401  (offline settings)
+
+
+def make_data(items: int):
+    from app.models import Author, Book
+
+    author = Author(id=1, name="Author", bio="bio " * 20, birth_date=date(1970, 1, 1))
+    books = [
+        Book(
+            id=i,
+            title=f"Book {i}",
+            description="x" * 400,
+            price=100 + i,
+            stock_quantity=10,
+            author_id=1,
+            created_at=datetime(2024, 1, 1, 12, 0, i % 60),
+            author=author,
+        )
+        for i in range(items)
+    ]
+    rows = [
+        (b.id, b.title, b.description, b.price, b.stock_quantity, b.author_id, b.created_at)
+        + (author.id, author.name, author.bio, author.birth_date)
+        for b in books
+    ]
+    return books, rows
+
+
+def cpu_per_call(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations
+
+
+def main(items: int, iterations: int) -> None:
+    from app.schemas import AuthorResponse, BookResponse, PaginatedBooks
+    from app.serialization import book_item, book_page, dumps
+
+    books, rows = make_data(items)
+    # pydantic-core's encoder over the same dicts, without a model schema
+    dicts_adapter = TypeAdapter(list[dict])
+
+    def orm_validate():
+        # the previous path: validate ORM objects, then dump
+        PaginatedBooks(items=books, total=items, limit=items, offset=0).model_dump_json()
+
+    def rows_model_construct():
+        page = PaginatedBooks.model_construct(
+            items=[
+                BookResponse.model_construct(
+                    **dict(zip(BookResponse.model_fields, row[:7])),
+                    author=AuthorResponse.model_construct(
+                        **dict(zip(("id", "name", "bio", "birth_date"), row[7:]))
+                    ),
+                )
+                for row in rows
+            ],
+            total=items,
+            limit=items,
+            offset=0,
+            next_cursor=None,
+        )
+        page.model_dump_json()
+
+    def rows_type_adapter():
+        dicts_adapter.dump_json([book_item(row) for row in rows])
+
+    def rows_orjson():
+        dumps(book_page([book_item(row) for row in rows], items, items, 0, None))
+
+    baseline = None
+    for name, fn in (
+        ("orm + pydantic validate", orm_validate),
+        ("rows + model_construct", rows_model_construct),
+        ("rows + TypeAdapter dump", rows_type_adapter),
+        ("rows + orjson", rows_orjson),
+    ):
+        fn()
+        seconds = cpu_per_call(fn, iterations)
+        baseline = baseline or seconds
+        print(
+            f"{name:<25} items={items:<4} "
+            f"cpu/response={seconds * 1e6:9.1f}us x{baseline / seconds:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.items, args.iterations)
@@ -0,0 +1,139 @@
+"""Cold start budget: import time of app.main and time to first response.
+
+`import` runs `python -X importtime -c "import app.main"` in fresh processes
+and prints the median total plus the slowest imports. `first-response` starts
+the production server profile (one worker) and measures the time until
+/health answers, alongside the server's own startup gauges.
+
+    python -m benchmarks.bench_startup import --runs 5 --budget-ms 1500
+    python -m benchmarks.bench_startup first-response --runs 3
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (environment for the child processes)
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times() -> tuple[float, dict[str, tuple[float, float]]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        modules[name] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, modules
+
+
+def bench_import(runs: int, top: int, budget_ms: float | None) -> int:
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        total, modules = import_times()
+        totals.append(total)
+    median = statistics.median(totals)
+    print(f"import app.main: median {median:.0f} ms over {runs} runs (min {min(totals):.0f})")
+
+    print(f"\nslowest {top} packages by cumulative time (last run):")
+    roots = {}
+    for name, (_, cumulative) in modules.items():
+        root = name if name.startswith("app.") else name.split(".")[0]
+        roots[root] = max(roots.get(root, 0.0), cumulative)
+    for name, cumulative in sorted(roots.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<32} {cumulative:8.1f} ms")
+
+    if budget_ms is not None and median > budget_ms:
+        print(f"\nover budget: {median:.0f} ms > {budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+def first_response(port: int) -> tuple[float, str]:
+    from httpx import Client, HTTPError
+
+    env = {
+        **os.environ,
+        "BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": "1",
+        "LOG_LEVEL": "warning",
+    }
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"], env=env
+    )
+    try:
+        with Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        elapsed = time.perf_counter() - start
+                        break
+                except HTTPError:
+                    pass
+                if time.perf_counter() - start > 60:
+                    raise RuntimeError("server did not come up")
+                time.sleep(0.01)
+            gauges = [
+                line
+                for line in client.get("/metrics").text.splitlines()
+                if line.startswith(("process_startup_seconds", "process_time_to_first_response"))
+            ]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return elapsed, "; ".join(gauges)
+
+
+def bench_first_response(runs: int) -> int:
+    from app.database import dispose_engines
+    from benchmarks.common import reset_schema
+
+    async def prepare():
+        await reset_schema()
+        await dispose_engines()
+
+    asyncio.run(prepare())
+    samples = []
+    for i in range(runs):
+        elapsed, gauges = first_response(8770 + i)
+        samples.append(elapsed)
+        print(f"run {i + 1}: {elapsed * 1000:.0f} ms to first /health  ({gauges})")
+    print(f"median {statistics.median(samples) * 1000:.0f} ms over {runs} runs")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import time and time to first response")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("--runs", type=int, default=5)
+    import_parser.add_argument("--top", type=int, default=15)
+    import_parser.add_argument("--budget-ms", type=float, default=None)
+    first_parser = commands.add_parser("first-response")
+    first_parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        sys.exit(bench_import(args.runs, args.top, args.budget_ms))
+    sys.exit(bench_first_response(args.runs))
+
+
+if __name__ == "__main__":
+    main()
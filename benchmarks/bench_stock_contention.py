@@ -0,0 +1,96 @@
+"""N concurrent buyers on one hot book, row-lock vs atomic reservation.
+
+Each buyer places orders through ``crud.create_order`` in its own session
+until the stock runs out. Afterwards the script checks that stock never went
+negative and that sold units match the rows in ``orders``.
+
+    python -m benchmarks.bench_stock_contention --buyers 50 --stock 2000
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_stock_contention
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import percentile, reset_schema
+
+
+async def seed(stock: int) -> tuple[int, int]:
+    from datetime import date
+
+    from app.database import get_engines
+    from app.models import Author, Book, User
+
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        author = Author(name="Hot Author", birth_date=date(1970, 1, 1))
+        book = Book(title="Hot Title", description="x", price=100, stock_quantity=stock, author=author)
+        user = User(username="buyer", email="buyer@example.com", password="x")
+        db.add_all([author, book, user])
+        await db.commit()
+        return book.id, user.id
+
+
+async def run(mode: str, buyers: int, stock: int) -> None:
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import OperationalError
+
+    from app import crud
+    from app.config import settings
+    from app.database import get_engines
+    from app.models import Book, Order
+    from app.schemas import OrderCreate
+
+    settings.stock_reservation_mode = mode
+    book_id, user_id = await seed(stock)
+    latencies: list[float] = []
+    failures = {"sold_out": 0, "errors": 0}
+
+    async def buyer():
+        while True:
+            start = time.perf_counter()
+            async with get_engines().async_session() as db:
+                try:
+                    await crud.create_order(db, user_id, OrderCreate(book_id=book_id, quantity=1))
+                    await db.commit()
+                except ValueError:
+                    await db.rollback()
+                    failures["sold_out"] += 1
+                    return
+                except OperationalError:
+                    await db.rollback()
+                    failures["errors"] += 1
+                    continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buyer() for _ in range(buyers)))
+    elapsed = time.perf_counter() - start
+
+    async with get_engines().async_session() as db:
+        remaining = await db.scalar(select(Book.stock_quantity).where(Book.id == book_id))
+        sold = await db.scalar(select(func.coalesce(func.sum(Order.quantity), 0)))
+
+    consistent = remaining >= 0 and sold == stock - remaining
+    print(
+        f"mode={mode:<8} orders/s={len(latencies) / elapsed:8.1f} "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms p99={percentile(latencies, 99) * 1000:7.1f}ms "
+        f"sold={sold} remaining={remaining} retries={failures['errors']} "
+        f"consistent={'yes' if consistent else 'NO'}"
+    )
+
+
+async def main(buyers: int, stock: int, modes: list[str]) -> None:
+    from app.database import get_engines
+
+    for mode in modes:
+        await run(mode, buyers, stock)
+    await get_engines().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buyers", type=int, default=50)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--modes", nargs="+", default=["row_lock", "atomic"])
+    args = parser.parse_args()
+    asyncio.run(main(args.buyers, args.stock, args.modes))
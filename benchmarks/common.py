@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Benchmarks run offline against a scratch SQLite file unless DATABASE_URL is set explicitly.
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'bookservice_bench.db')}",
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+for _name in ("POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST"):
+    os.environ.setdefault(_name, "bench")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+# load generators hit the API from one address; export RATE_LIMIT_ENABLED=true to measure it
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+async def reset_schema() -> None:
+    from app.database import Base, get_engines
+    import app.models  # noqa: F401
+
+    async with get_engines().engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def new_request():
+    """A bare request for calling dependencies directly, with empty state."""
+    from fastapi import Request
+
+    return Request({"type": "http", "headers": []})
+
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result["seconds"] = time.perf_counter() - start
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
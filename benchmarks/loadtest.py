@@ -0,0 +1,381 @@
+"""Load tests for the whole API, with machine-readable results.
+
+Scenarios:
+  browse           catalogue lists, book/author details, search, autocomplete
+  login            POST /auth/login storm (bcrypt bound)
+  checkout         concurrent POST /orders on one hot book
+  deep_pagination  deep OFFSET pages vs cursor pages at the same depth
+
+Drivers:
+  inprocess  httpx ASGITransport, no sockets; the app shares our event loop
+  http       a real server: gunicorn.conf.py started with --spawn, or --base-url
+
+Runs offline against SQLite by default; set DATABASE_URL to use Postgres.
+
+    python -m benchmarks.loadtest run --scenario browse --concurrency 20 --duration 15 \\
+        --output results/browse.json
+    python -m benchmarks.loadtest run --scenario checkout --driver http --spawn
+    python -m benchmarks.loadtest compare results/before.json results/after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile
+from benchmarks.seed import SEED_PASSWORD, WORDS, seed, username
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.recording = False
+
+    async def request(self, client, method: str, url: str, name: str, ok=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code not in ok
+        except Exception:
+            response, failed = None, True
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.samples.setdefault(name, []).append(elapsed)
+            if failed:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        return response
+
+
+class Dataset:
+    def __init__(self, authors: int, books: int, users: int):
+        self.authors = authors
+        self.books = books
+        self.users = users
+
+
+class Scenario:
+    name = ""
+
+    async def setup(self, client, dataset: Dataset, concurrency: int) -> None:
+        self.dataset = dataset
+
+    async def step(self, client, recorder: Recorder, rng: random.Random, worker: int) -> None:
+        raise NotImplementedError
+
+
+class Browse(Scenario):
+    name = "browse"
+
+    async def step(self, client, recorder, rng, worker):
+        roll = rng.random()
+        if roll < 0.4:
+            offset = rng.randrange(0, min(self.dataset.books, 1000), 20)
+            await recorder.request(client, "GET", f"/books?limit=20&offset={offset}", "GET /books")
+        elif roll < 0.7:
+            book_id = rng.randint(1, self.dataset.books)
+            await recorder.request(client, "GET", f"/books/{book_id}", "GET /books/{id}")
+        elif roll < 0.85:
+            author_id = rng.randint(1, self.dataset.authors)
+            await recorder.request(client, "GET", f"/authors/{author_id}", "GET /authors/{id}")
+        elif roll < 0.95:
+            query = " ".join(rng.sample(WORDS, 2))
+            await recorder.request(client, "GET", "/search", "GET /search", params={"q": query})
+        else:
+            prefix = rng.choice(WORDS)[:3]
+            await recorder.request(
+                client,
+                "GET",
+                "/search/autocomplete",
+                "GET /search/autocomplete",
+                params={"prefix": prefix},
+            )
+
+
+class Login(Scenario):
+    name = "login"
+
+    async def step(self, client, recorder, rng, worker):
+        await recorder.request(
+            client,
+            "POST",
+            "/auth/login",
+            "POST /auth/login",
+            json={"username": username(rng.randrange(self.dataset.users)), "password": SEED_PASSWORD},
+        )
+
+
+async def login_tokens(client, count: int) -> list[str]:
+    tokens = []
+    for i in range(count):
+        response = await client.post(
+            "/auth/login", json={"username": username(i), "password": SEED_PASSWORD}
+        )
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+
+class Checkout(Scenario):
+    name = "checkout"
+    hot_book_id = 1
+
+    async def setup(self, client, dataset, concurrency):
+        from sqlalchemy import update
+
+        from app.database import get_engines
+        from app.models import Book
+
+        await super().setup(client, dataset, concurrency)
+        # plenty of stock: we measure contention, not sold-out errors
+        async with get_engines().async_session() as db:
+            await db.execute(
+                update(Book).where(Book.id == self.hot_book_id).values(stock_quantity=10**9)
+            )
+            await db.commit()
+        self.tokens = await login_tokens(client, min(concurrency, dataset.users))
+
+    async def step(self, client, recorder, rng, worker):
+        token = self.tokens[worker % len(self.tokens)]
+        await recorder.request(
+            client,
+            "POST",
+            "/orders",
+            "POST /orders",
+            ok=(201,),
+            json={"book_id": self.hot_book_id, "quantity": 1},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+
+class DeepPagination(Scenario):
+    name = "deep_pagination"
+
+    async def step(self, client, recorder, rng, worker):
+        from app.pagination import encode_cursor
+
+        # the last tenth of the catalogue, where OFFSET has to skip the most rows
+        books = self.dataset.books
+        # small catalogues: keep the range non-empty
+        depth = rng.randrange(min(books * 9 // 10, max(books - 51, 0)), max(books - 50, 1))
+        await recorder.request(
+            client, "GET", f"/books?limit=50&offset={depth}", "GET /books offset"
+        )
+        await recorder.request(
+            client,
+            "GET",
+            "/books",
+            "GET /books cursor",
+            params={"limit": 50, "cursor": encode_cursor({"id": depth})},
+        )
+
+
+SCENARIOS = {cls.name: cls for cls in (Browse, Login, Checkout, DeepPagination)}
+
+
+@asynccontextmanager
+async def inprocess_client():
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://loadtest") as client:
+        yield client
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0) -> None:
+    from httpx import AsyncClient, HTTPError
+
+    deadline = time.monotonic() + timeout
+    async with AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"server at {base_url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+@asynccontextmanager
+async def http_client(base_url: str | None, spawn: bool, workers: int, concurrency: int):
+    from httpx import AsyncClient, Limits
+
+    server = None
+    if spawn:
+        port = 8765
+        base_url = f"http://127.0.0.1:{port}"
+        # the production profile: gunicorn.conf.py with WEB_CONCURRENCY workers
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+            env={
+                **os.environ,
+                "BIND": f"127.0.0.1:{port}",
+                "WEB_CONCURRENCY": str(workers),
+                "LOG_LEVEL": "warning",
+            },
+        )
+    try:
+        await wait_until_up(base_url)
+        limits = Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            yield client
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def summarize(samples: list[float], errors: int, duration: float) -> dict:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / duration, 1),
+        "latency_ms": {
+            "p50": round(percentile(samples, 50) * 1000, 2),
+            "p95": round(percentile(samples, 95) * 1000, 2),
+            "p99": round(percentile(samples, 99) * 1000, 2),
+            "max": round(max(samples, default=0) * 1000, 2),
+        },
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    from sqlalchemy.engine import make_url
+
+    from app.config import settings
+    from app.database import get_engines
+
+    if args.driver == "http" and make_url(settings.database_url).database in (None, "", ":memory:"):
+        raise SystemExit("the http driver needs a database the server process can see")
+
+    dataset = Dataset(args.authors, args.books, args.users)
+    if not args.no_seed:
+        await seed(args.authors, args.books, args.users)
+
+    scenario = SCENARIOS[args.scenario]()
+    recorder = Recorder()
+    if args.driver == "inprocess":
+        client_context = inprocess_client()
+    else:
+        client_context = http_client(args.base_url, args.spawn, args.workers, args.concurrency)
+
+    async with client_context as client:
+        await scenario.setup(client, dataset, args.concurrency)
+
+        async def worker(index: int, stop_at: float) -> None:
+            rng = random.Random(index)
+            while time.perf_counter() < stop_at:
+                await scenario.step(client, recorder, rng, index)
+
+        async def phase(seconds: float) -> float:
+            start = time.perf_counter()
+            stop_at = start + seconds
+            await asyncio.gather(*(worker(i, stop_at) for i in range(args.concurrency)))
+            return time.perf_counter() - start
+
+        await phase(args.warmup)
+        recorder.recording = True
+        elapsed = await phase(args.duration)
+
+    await get_engines().engine.dispose()
+
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        "scenario": scenario.name,
+        "driver": args.driver,
+        "workers": args.workers if args.driver == "http" else 1,
+        "database": make_url(settings.database_url).get_backend_name(),
+        "git_commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "dataset": vars(dataset),
+        **summarize(all_samples, sum(recorder.errors.values()), elapsed),
+        "endpoints": {
+            name: summarize(samples, recorder.errors.get(name, 0), elapsed)
+            for name, samples in sorted(recorder.samples.items())
+        },
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    def line(name, old, new):
+        def delta(a, b):
+            return f"{(b - a) / a:+7.1%}" if a else "    n/a"
+
+        print(
+            f"{name:<28} rps {old['rps']:>9} -> {new['rps']:>9} {delta(old['rps'], new['rps'])}"
+            f"   p95 {old['latency_ms']['p95']:>8} -> {new['latency_ms']['p95']:>8} ms "
+            f"{delta(old['latency_ms']['p95'], new['latency_ms']['p95'])}"
+        )
+
+    print(f"{before.get('git_commit')} -> {after.get('git_commit')} ({after['scenario']})")
+    line("total", before, after)
+    for name in sorted(before["endpoints"].keys() & after["endpoints"].keys()):
+        line(name, before["endpoints"][name], after["endpoints"][name])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API load tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="browse")
+    run_parser.add_argument("--driver", choices=["inprocess", "http"], default="inprocess")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument(
+        "--spawn", action="store_true", help="start gunicorn.conf.py ourselves"
+    )
+    run_parser.add_argument("--workers", type=int, default=1, help="server workers with --spawn")
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument("--duration", type=float, default=15.0)
+    run_parser.add_argument("--warmup", type=float, default=2.0)
+    run_parser.add_argument("--authors", type=int, default=200)
+    run_parser.add_argument("--books", type=int, default=20_000)
+    run_parser.add_argument("--users", type=int, default=200)
+    run_parser.add_argument("--no-seed", action="store_true", help="reuse the existing data")
+    run_parser.add_argument("--output", help="write the JSON result here")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.before, args.after)
+        return
+
+    result = asyncio.run(run(args))
+    text = json.dumps(result, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
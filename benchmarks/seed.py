@@ -0,0 +1,96 @@
+"""Deterministic data generator for benchmarks and load tests.
+
+Recreates the schema and bulk-inserts N authors, books and users. Every
+user's password is SEED_PASSWORD; it is hashed once and reused, so seeding
+100k users does not cost 100k bcrypt rounds.
+
+    python -m benchmarks.seed --authors 1000 --books 100000 --users 1000
+"""
+import argparse
+import asyncio
+import random
+from datetime import date
+
+from benchmarks.common import reset_schema
+
+SEED_PASSWORD = "loadtest-password"
+WORDS = (
+    "war peace night day river stone garden winter summer city house road "
+    "shadow light silent golden lost last first secret little great dark"
+).split()
+BATCH = 5_000
+
+
+def username(i: int) -> str:
+    return f"user{i}"
+
+
+async def seed(authors: int, books: int, users: int, rng_seed: int = 1) -> None:
+    from sqlalchemy import insert
+
+    from app.database import get_engines
+    from app.models import Author, Book, User, UserRole
+    from app.security import get_password_hash
+
+    rng = random.Random(rng_seed)
+    await reset_schema()
+    async with get_engines().async_session() as db:
+        for start in range(0, authors, BATCH):
+            await db.execute(
+                insert(Author),
+                [
+                    {
+                        "name": f"Author {i}",
+                        "bio": " ".join(rng.choices(WORDS, k=20)),
+                        "birth_date": date(1900 + i % 100, 1 + i % 12, 1 + i % 28),
+                    }
+                    for i in range(start, min(start + BATCH, authors))
+                ],
+            )
+        for start in range(0, books, BATCH):
+            await db.execute(
+                insert(Book),
+                [
+                    {
+                        "title": f"{' '.join(rng.choices(WORDS, k=3)).title()} {i}",
+                        "description": " ".join(rng.choices(WORDS, k=60)),
+                        "price": rng.randint(100, 5_000),
+                        "stock_quantity": rng.randint(0, 100),
+                        "author_id": rng.randint(1, authors),
+                    }
+                    for i in range(start, min(start + BATCH, books))
+                ],
+            )
+
+        password = get_password_hash(SEED_PASSWORD)
+        for start in range(0, users, BATCH):
+            await db.execute(
+                insert(User),
+                [
+                    {
+                        "username": username(i),
+                        "email": f"{username(i)}@example.com",
+                        "password": password,
+                        "role": UserRole.USER,
+                    }
+                    for i in range(start, min(start + BATCH, users))
+                ],
+            )
+        await db.commit()
+
+
+async def main(authors: int, books: int, users: int) -> None:
+    from app.database import get_engines
+
+    await seed(authors, books, users)
+    await get_engines().engine.dispose()
+    print(f"seeded authors={authors} books={books} users={users}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--authors", type=int, default=1_000)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.authors, args.books, args.users))
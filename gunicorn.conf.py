@@ -0,0 +1,25 @@
+"""Production server profile: gunicorn supervising uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master and forked into the workers. Each
+worker then runs the lifespan startup (database connections, mapper
+configuration, bcrypt threads) before it accepts connections.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+# one process per core: bcrypt and JSON rendering are CPU-bound
+workers = int(os.environ.get("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# SIGTERM: stop accepting, let in-flight requests finish, then lifespan shutdown
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info")
@@ -1,14 +1,23 @@
 import asyncio
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.database import Base, get_db
+from app.cache import CacheBackend, discard_invalidations, flush_invalidations, response_cache
+from app.database import Base, get_db, get_read_db, get_read_db_factory
+from app.diagnostics import QueryLog, capture_queries
 from app.main import app
 from app.models import UserRole
+from app.principal import principal_cache
+from app.ratelimit import rate_limiter
+from app.search import search_index
 from app.security import create_access_token, get_password_hash
+from app.tokens import get_token_verifier
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -23,6 +32,59 @@ def event_loop():
     loop.close()
 
 
+class FakeCacheBackend(CacheBackend):
+    """Dict-backed stand-in for a shared cache that records invalidations."""
+
+    def __init__(self):
+        self.entries: dict[str, tuple[bytes, tuple[str, ...]]] = {}
+        self.invalidated: list[str] = []
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    async def set(self, key, value, ttl, tags=()):
+        self.entries[key] = (value, tuple(tags))
+
+    async def invalidate_tags(self, tags):
+        tags = set(tags)
+        self.invalidated.extend(sorted(tags))
+        self.entries = {
+            key: entry for key, entry in self.entries.items() if not tags.intersection(entry[1])
+        }
+
+    async def clear(self):
+        self.entries.clear()
+        self.invalidated.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    principal_cache.clear()
+    get_token_verifier().clear()
+    search_index.invalidate()
+    yield
+    principal_cache.clear()
+    get_token_verifier().clear()
+
+
+@pytest.fixture(autouse=True)
+async def cache_backend(monkeypatch) -> FakeCacheBackend:
+    backend = FakeCacheBackend()
+    monkeypatch.setattr(response_cache, "backend", backend)
+    monkeypatch.setattr(response_cache, "enabled", True)
+    await response_cache.clear()
+    return backend
+
+
+@pytest.fixture(autouse=True)
+async def rate_limits(monkeypatch):
+    # every test client shares one address; limits are opted into per test
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    await rate_limiter.store.clear()
+    return rate_limiter
+
+
 @pytest.fixture
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with engine.begin() as conn:
@@ -35,12 +97,58 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@dataclass
+class QueryCounter(QueryLog):
+    """QueryLog that also counts ORM entities hydrated while active."""
+
+    entities: dict[str, int] = field(default_factory=dict)
+
+    def _on_load(self, target, *args):
+        name = type(target).__name__
+        self.entities[name] = self.entities.get(name, 0) + 1
+
+    def start(self):
+        event.listen(Base, "load", self._on_load, propagate=True)
+        event.listen(Base, "refresh", self._on_load, propagate=True)
+
+    def stop(self):
+        event.remove(Base, "load", self._on_load)
+        event.remove(Base, "refresh", self._on_load)
+
+    def reset(self):
+        super().reset()
+        self.entities.clear()
+
+
+@pytest.fixture
+def query_counter(db_session: AsyncSession):
+    # start from an empty identity map so every load hits the database
+    db_session.expunge_all()
+    counter = QueryCounter()
+    counter.start()
+    with capture_queries(counter):
+        yield counter
+    counter.stop()
+
+
 @pytest.fixture
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
-    async def override_get_db():
+    async def override_get_read_db():
         yield db_session
 
+    async def override_get_db():
+        # commits like session_scope, so invalidations run at the same point
+        try:
+            yield db_session
+        except Exception:
+            discard_invalidations(db_session)
+            raise
+        await db_session.commit()
+        await flush_invalidations(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    app.dependency_overrides[get_read_db_factory] = lambda: asynccontextmanager(override_get_read_db)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models import Book, BookSales
+
+
+@pytest.fixture
+async def sales(client: AsyncClient, user_token, test_book, db_session):
+    other = Book(
+        title="Bestseller",
+        description="d",
+        price=50,
+        stock_quantity=100,
+        author_id=test_book.author_id,
+    )
+    db_session.add(other)
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    await client.post("/orders", json={"book_id": test_book.id, "quantity": 2}, headers=headers)
+    await client.post(
+        "/orders/batch",
+        json={
+            "items": [
+                {"book_id": other.id, "quantity": 5},
+                {"book_id": other.id, "quantity": 1},
+                {"book_id": test_book.id, "quantity": 1},
+            ]
+        },
+        headers=headers,
+    )
+    return test_book, other
+
+
+@pytest.mark.asyncio
+async def test_top_books(client: AsyncClient, admin_token, sales):
+    test_book, other = sales
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await client.get("/analytics/top-books", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "book_id": other.id,
+            "title": "Bestseller",
+            "order_count": 2,
+            "units_sold": 6,
+            "revenue": 300,
+        },
+        {
+            "book_id": test_book.id,
+            "title": test_book.title,
+            "order_count": 2,
+            "units_sold": 3,
+            "revenue": test_book.price * 3,
+        },
+    ]
+
+    response = await client.get("/analytics/top-books?by=revenue&limit=1", headers=headers)
+    expected = test_book.id if test_book.price * 3 > 300 else other.id
+    assert [row["book_id"] for row in response.json()] == [expected]
+
+
+@pytest.mark.asyncio
+async def test_revenue_by_author_and_daily_sales(client: AsyncClient, admin_token, sales):
+    test_book, _ = sales
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    revenue = test_book.price * 3 + 300
+
+    response = await client.get("/analytics/revenue-by-author", headers=headers)
+    assert response.json() == [
+        {"author_id": test_book.author_id, "name": "Test Author", "units_sold": 9, "revenue": revenue}
+    ]
+
+    response = await client.get("/analytics/daily-sales", headers=headers)
+    assert response.json() == [
+        {
+            "day": datetime.utcnow().date().isoformat(),
+            "order_count": 4,
+            "units_sold": 9,
+            "revenue": revenue,
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_analytics_requires_admin(client: AsyncClient, user_token):
+    response = await client.get(
+        "/analytics/top-books", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_reconcile_detects_and_repairs_drift(
+    client: AsyncClient, admin_token, db_session, sales
+):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await client.post("/analytics/reconcile", headers=headers)
+    assert response.json()["mismatched"] == 0
+    assert response.json()["books_checked"] == 2
+
+    test_book, _ = sales
+    await db_session.execute(
+        update(BookSales).where(BookSales.book_id == test_book.id).values(units_sold=0)
+    )
+
+    report = (await client.post("/analytics/reconcile", headers=headers)).json()
+    assert report["mismatched"] == 1
+    assert report["mismatches"][0]["table"] == "book_sales"
+    assert report["repaired"] is False
+
+    report = (await client.post("/analytics/reconcile?repair=true", headers=headers)).json()
+    assert report["repaired"] is True
+    report = (await client.post("/analytics/reconcile", headers=headers)).json()
+    assert report["mismatched"] == 0
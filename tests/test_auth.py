@@ -1,5 +1,12 @@
+from datetime import datetime
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.crud import RefreshTokenReused, create_refresh_token, rotate_refresh_token
+from app.models import RefreshToken
+from app.security import password_hash_seconds, password_hasher, pwd_context
 
 
 @pytest.mark.asyncio
@@ -61,3 +68,115 @@ async def test_login_nonexistent_user(client: AsyncClient):
         json={"username": "nobody", "password": "password"},
     )
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_outdated_cost(client: AsyncClient, test_user, db_session):
+    test_user.password = pwd_context.hash("testpass123", rounds=4)
+    await db_session.commit()
+
+    response = await client.post(
+        "/auth/login",
+        json={"username": "testuser", "password": "testpass123"},
+    )
+    assert response.status_code == 200
+
+    await db_session.refresh(test_user)
+    assert not pwd_context.needs_update(test_user.password)
+    assert pwd_context.verify("testpass123", test_user.password)
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hashing_queue_full(client: AsyncClient, test_user, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = await client.post(
+        "/auth/login",
+        json={"username": "testuser", "password": "testpass123"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+async def login(client: AsyncClient) -> dict:
+    response = await client.post(
+        "/auth/login",
+        json={"username": "testuser", "password": "testpass123"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens_without_bcrypt(client: AsyncClient, test_user):
+    tokens = await login(client)
+    verifications = password_hash_seconds.count(operation="verify")
+
+    response = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    renewed = response.json()
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    assert password_hash_seconds.count(operation="verify") == verifications
+
+    headers = {"Authorization": f"Bearer {renewed['access_token']}"}
+    assert (await client.get("/orders", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_family(client: AsyncClient, test_user):
+    tokens = await login(client)
+    first = tokens["refresh_token"]
+    second = (await client.post("/auth/refresh", json={"refresh_token": first})).json()
+
+    response = await client.post("/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token reuse detected"
+
+    # the legitimate successor went down with the family
+    response = await client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+
+    # other logins are separate families
+    other = await login(client)
+    response = await client.post("/auth/refresh", json={"refresh_token": other["refresh_token"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rotate_refresh_token_leaves_commit_to_caller(db_session, test_user):
+    first = await create_refresh_token(db_session, test_user.id)
+    _, second = await rotate_refresh_token(db_session, first)
+    await db_session.commit()
+
+    with pytest.raises(RefreshTokenReused):
+        await rotate_refresh_token(db_session, first)
+    await db_session.rollback()
+
+    # nothing was committed, so the family is still live
+    assert await rotate_refresh_token(db_session, second) is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_or_unknown_refresh_token(client: AsyncClient, test_user, db_session):
+    tokens = await login(client)
+    await db_session.execute(update(RefreshToken).values(expires_at=datetime(2000, 1, 1)))
+    await db_session.commit()
+
+    for token in (tokens["refresh_token"], "unknown"):
+        response = await client.post("/auth/refresh", json={"refresh_token": token})
+        assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(client: AsyncClient, test_user):
+    tokens = await login(client)
+    response = await client.post(
+        "/auth/logout",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 204
+
+    response = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
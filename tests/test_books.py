@@ -1,6 +1,9 @@
 import pytest
 from httpx import AsyncClient
 
+from app.models import Book
+from app.pagination import encode_cursor
+
 
 @pytest.mark.asyncio
 async def test_list_books_empty(client: AsyncClient):
@@ -126,3 +129,70 @@ async def test_delete_book(client: AsyncClient, admin_token, test_book):
 
     response = await client.get(f"/books/{test_book.id}")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_books_cursor_pagination(client: AsyncClient, db_session, test_author):
+    db_session.add_all(
+        Book(title=f"Book {i}", description="d", price=100, author_id=test_author.id)
+        for i in range(5)
+    )
+    await db_session.commit()
+
+    response = await client.get("/books?limit=2")
+    data = response.json()
+    assert data["total"] == 5
+    assert data["next_cursor"]
+
+    seen = [item["id"] for item in data["items"]]
+    cursor = data["next_cursor"]
+    while cursor:
+        response = await client.get(f"/books?limit=2&cursor={cursor}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_books_cursor_with_total(client: AsyncClient, test_book):
+    response = await client.get(f"/books?cursor={encode_cursor({'id': 0})}&include_total=true")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_list_books_invalid_cursor(client: AsyncClient):
+    response = await client.get("/books?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+    for position in ({"id": 10**30}, {"id": True}, {"id": "5"}, {"id": -1}):
+        response = await client.get(f"/books?cursor={encode_cursor(position)}")
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_books_sparse_fields(client: AsyncClient, test_book):
+    response = await client.get("/books?fields=title,price")
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {"id": test_book.id, "title": test_book.title, "price": test_book.price}
+    ]
+
+    response = await client.get("/books?fields=title,author")
+    item = response.json()["items"][0]
+    assert set(item) == {"id", "title", "author"}
+    assert item["author"]["id"] == test_book.author_id
+
+
+@pytest.mark.asyncio
+async def test_list_books_unknown_field(client: AsyncClient):
+    response = await client.get("/books?fields=title,password")
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
@@ -0,0 +1,232 @@
+import asyncio
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+
+from app.cache import (
+    InMemoryCacheBackend,
+    ResponseCache,
+    TTLCache,
+    book_tag,
+    cache_hits,
+    cache_misses,
+    flush_invalidations,
+    response_cache,
+)
+import app.routers.books as books_router
+from app.database import get_db, read_lag
+from app.main import app
+from app.models import Author
+
+
+@pytest.mark.asyncio
+async def test_book_detail_is_cached(client: AsyncClient, test_book):
+    first = await client.get(f"/books/{test_book.id}")
+    second = await client.get(f"/books/{test_book.id}")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.json() == second.json()
+    assert response_cache.hits == 1
+    assert response_cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_hits_and_misses_are_exported(client: AsyncClient, test_book):
+    hits = cache_hits.get(cache="response")
+    misses = cache_misses.get(cache="response")
+
+    await client.get(f"/books/{test_book.id}")
+    await client.get(f"/books/{test_book.id}")
+
+    assert cache_hits.get(cache="response") == hits + 1
+    assert cache_misses.get(cache="response") == misses + 1
+    body = (await client.get("/metrics")).text
+    assert 'cache_hits_total{cache="response"}' in body
+    assert 'cache_misses_total{cache="response"}' in body
+
+
+def test_only_named_ttl_caches_are_exported():
+    named = TTLCache(max_size=10, ttl=60, name="test-named")
+    named.set("a", 1)
+    named.get("a")
+    named.get("b")
+    TTLCache(max_size=10, ttl=60).get("a")
+
+    assert cache_hits.get(cache="test-named") == 1
+    assert cache_misses.get(cache="test-named") == 1
+    assert ("None",) not in cache_misses.values
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_book_lists_and_author(
+    client: AsyncClient, admin_token, db_session, test_book, test_author, cache_backend
+):
+    await db_session.refresh(test_author)
+    await client.get(f"/books/{test_book.id}")
+    await client.get("/books")
+    await client.get(f"/authors/{test_author.id}")
+
+    response = await client.patch(
+        f"/books/{test_book.id}",
+        json={"price": 2999},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert cache_backend.entries == {}
+
+    detail = await client.get(f"/books/{test_book.id}")
+    assert detail.headers["X-Cache"] == "MISS"
+    assert detail.json()["price"] == 2999
+
+    author = await client.get(f"/authors/{test_author.id}")
+    assert author.json()["books"][0]["price"] == 2999
+
+
+@pytest.mark.asyncio
+async def test_create_book_keeps_unrelated_entries(
+    client: AsyncClient, admin_token, db_session, test_book, test_author
+):
+    other = Author(name="Other Author", birth_date=date(1970, 1, 1))
+    db_session.add(other)
+    await db_session.commit()
+
+    await client.get(f"/books/{test_book.id}")
+    await client.get("/books")
+    await client.get(f"/authors/{other.id}")
+
+    await client.post(
+        "/books",
+        json={
+            "title": "New Book",
+            "description": "Description",
+            "price": 2500,
+            "author_id": test_author.id,
+        },
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert (await client.get(f"/books/{test_book.id}")).headers["X-Cache"] == "HIT"
+    assert (await client.get(f"/authors/{other.id}")).headers["X-Cache"] == "HIT"
+
+    listing = await client.get("/books")
+    assert listing.headers["X-Cache"] == "MISS"
+    assert listing.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_order_invalidates_book_stock(client: AsyncClient, user_token, test_book):
+    initial_stock = test_book.stock_quantity
+    await client.get(f"/books/{test_book.id}")
+
+    await client.post(
+        "/orders",
+        json={"book_id": test_book.id, "quantity": 3},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    response = await client.get(f"/books/{test_book.id}")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["stock_quantity"] == initial_stock - 3
+
+
+@pytest.mark.asyncio
+async def test_invalidation_waits_for_commit(
+    client: AsyncClient, admin_token, db_session, test_book, cache_backend
+):
+    await client.get(f"/books/{test_book.id}")
+    written = asyncio.Event()
+    commit = asyncio.Event()
+
+    async def paused_get_db():
+        yield db_session
+        written.set()
+        await commit.wait()
+        await db_session.commit()
+        await flush_invalidations(db_session)
+
+    app.dependency_overrides[get_db] = paused_get_db
+    patch = asyncio.ensure_future(
+        client.patch(
+            f"/books/{test_book.id}",
+            json={"price": 999},
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+    )
+    await written.wait()
+    assert cache_backend.invalidated == []
+
+    commit.set()
+    assert (await patch).status_code == 200
+    assert cache_backend.invalidated == [book_tag(test_book.id)]
+    assert (await client.get(f"/books/{test_book.id}")).json()["price"] == 999
+
+
+@pytest.mark.asyncio
+async def test_read_held_open_across_a_commit_is_not_cached(
+    client: AsyncClient, admin_token, test_book, monkeypatch
+):
+    get_book_row = books_router.get_book_row
+    old_price = test_book.price
+    read = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_get_book_row(db, book_id):
+        row = await get_book_row(db, book_id)
+        read.set()
+        await release.wait()
+        return row
+
+    monkeypatch.setattr(books_router, "get_book_row", slow_get_book_row)
+    pending = asyncio.ensure_future(client.get(f"/books/{test_book.id}"))
+    await read.wait()
+    monkeypatch.setattr(books_router, "get_book_row", get_book_row)
+
+    response = await client.patch(
+        f"/books/{test_book.id}",
+        json={"price": 999},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    release.set()
+    # served the row it read before the commit, but did not cache it
+    assert (await pending).json()["price"] == old_price
+
+    detail = await client.get(f"/books/{test_book.id}")
+    assert detail.headers["X-Cache"] == "MISS"
+    assert detail.json()["price"] == 999
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_are_not_cached_right_after_invalidation():
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10), ttl=60)
+    await cache.invalidate("book:1")
+
+    token = read_lag.set(5.0)
+    try:
+        assert await cache.get("detail") is None
+        await cache.set("detail", b"replica", tags=["book:1"])
+        assert await cache.backend.get("detail") is None
+    finally:
+        read_lag.reset(token)
+
+    assert await cache.get("detail") is None
+    await cache.set("detail", b"primary", tags=["book:1"])
+    assert await cache.backend.get("detail") == b"primary"
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_evicts_and_untags():
+    backend = InMemoryCacheBackend(max_entries=2)
+    await backend.set("a", b"1", ttl=60, tags=["t1"])
+    await backend.set("b", b"2", ttl=60, tags=["t1", "t2"])
+    await backend.set("c", b"3", ttl=60, tags=["t2"])
+
+    assert await backend.get("a") is None
+    assert "t1" in backend._tags and backend._tags["t1"] == {"b"}
+
+    await backend.invalidate_tags(["t2"])
+    assert await backend.get("b") is None
+    assert await backend.get("c") is None
+    assert backend._tags == {}
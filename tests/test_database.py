@@ -0,0 +1,257 @@
+from datetime import date
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+import app.database as database
+import app.main as main
+from app.database import (
+    Base,
+    EngineRouter,
+    InstrumentedQueuePool,
+    Replica,
+    engine_options,
+    get_engines,
+    pool_checkout_seconds,
+    pool_checkout_timeouts,
+    replica_failovers,
+    session_scope,
+    transaction_seconds,
+)
+from app.main import app
+from app.models import Author
+
+
+def test_engine_options_for_memory_sqlite():
+    assert engine_options("sqlite+aiosqlite:///:memory:") == {}
+
+
+def test_engine_options_for_asyncpg():
+    options = engine_options("postgresql+asyncpg://user:pass@db:5432/bookstore")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert set(options["connect_args"]) == {"prepared_statement_cache_size", "statement_cache_size"}
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_timeout_is_counted(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    checkouts = pool_checkout_seconds.count()
+    timeouts = pool_checkout_timeouts.get()
+
+    async with engine.connect() as held:
+        await held.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect() as waiting:
+                await waiting.execute(text("SELECT 1"))
+
+    await engine.dispose()
+    assert pool_checkout_timeouts.get() == timeouts + 1
+    assert pool_checkout_seconds.count() == checkouts + 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exports_pool_stats(client: AsyncClient):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE db_pool_checkout_seconds histogram" in response.text
+    assert "db_pool_checked_out " in response.text
+
+
+async def make_sqlite_engine(path, author_name=None):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if author_name:
+            await conn.execute(
+                Author.__table__.insert().values(name=author_name, birth_date=date(1970, 1, 1))
+            )
+    return engine
+
+
+@pytest.fixture
+async def primary_and_replica(tmp_path, monkeypatch):
+    primary = await make_sqlite_engine(tmp_path / "primary.db", "Primary Author")
+    replica = await make_sqlite_engine(tmp_path / "replica.db", "Replica Author")
+    router = database.EngineRouter([database.Replica(replica)], retry_seconds=60)
+    engines = database.get_engines()
+    monkeypatch.setattr(
+        engines, "async_session", async_sessionmaker(primary, expire_on_commit=False)
+    )
+    monkeypatch.setattr(
+        engines,
+        "read_session",
+        async_sessionmaker(
+            primary.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False
+        ),
+    )
+    monkeypatch.setattr(engines, "router", router)
+    yield router
+    await primary.dispose()
+    await replica.dispose()
+
+
+@pytest.fixture
+async def routed_client(primary_and_replica):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def test_engines_are_created_once(monkeypatch):
+    engines = get_engines()
+    monkeypatch.setattr(engines, "async_session", None)
+    monkeypatch.undo()
+
+    assert get_engines() is engines
+    assert engines.async_session.kw["bind"] is engines.engine
+
+
+def test_engine_router_round_robin_and_failover():
+    first = Replica(create_async_engine("sqlite+aiosqlite:///:memory:"))
+    second = Replica(create_async_engine("sqlite+aiosqlite:///:memory:"))
+    router = EngineRouter([first, second], retry_seconds=60)
+
+    assert [router.pick(), router.pick(), router.pick()] == [first, second, first]
+
+    router.mark_down(second)
+    assert [router.pick(), router.pick()] == [first, first]
+
+    router.mark_down(first)
+    assert router.pick() is None
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(routed_client: AsyncClient):
+    response = await routed_client.get("/authors")
+    assert [author["name"] for author in response.json()] == ["Replica Author"]
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_primary_after_write(routed_client: AsyncClient):
+    response = await routed_client.post(
+        "/auth/register",
+        json={"username": "writer", "email": "writer@example.com", "password": "password123"},
+    )
+    assert response.status_code == 201
+    assert "db_primary_until" in response.cookies
+    assert "HttpOnly" in response.headers["set-cookie"]
+
+    response = await routed_client.get("/authors")
+    assert [author["name"] for author in response.json()] == ["Primary Author"]
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_fails_over_to_primary(
+    tmp_path, primary_and_replica, routed_client
+):
+    broken = Replica(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    primary_and_replica.replicas = [broken]
+
+    failovers = replica_failovers.get()
+    response = await routed_client.get("/authors")
+    assert response.status_code == 200
+    assert [author["name"] for author in response.json()] == ["Primary Author"]
+    assert not broken.healthy
+    assert replica_failovers.get() == failovers + 1
+
+    response = await routed_client.get("/authors")
+    assert [author["name"] for author in response.json()] == ["Primary Author"]
+    assert replica_failovers.get() == failovers + 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_fails_over_to_next_replica(
+    tmp_path, monkeypatch, primary_and_replica, routed_client
+):
+    healthy = primary_and_replica.replicas[0]
+    broken = database.Replica(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    )
+    monkeypatch.setattr(
+        database.get_engines(), "router", database.EngineRouter([broken, healthy], retry_seconds=60)
+    )
+
+    for _ in range(2):
+        response = await routed_client.get("/authors")
+        assert [author["name"] for author in response.json()] == ["Replica Author"]
+    assert not broken.healthy
+    assert healthy.healthy
+
+
+@pytest.mark.asyncio
+async def test_failed_query_marks_replica_down_only_if_connection_was_lost(
+    primary_and_replica,
+):
+    replica = primary_and_replica.replicas[0]
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    timeout = exc.OperationalError("SELECT 1", {}, Exception("canceling statement"))
+    lost = exc.OperationalError(
+        "SELECT 1", {}, Exception("server closed the connection"), connection_invalidated=True
+    )
+
+    with pytest.raises(exc.OperationalError):
+        async with session_scope(replica.sessionmaker, request, replica, read_only=True):
+            raise timeout
+    assert replica.healthy
+
+    with pytest.raises(exc.OperationalError):
+        async with session_scope(replica.sessionmaker, request, replica, read_only=True):
+            raise lost
+    assert not replica.healthy
+
+
+@pytest.mark.asyncio
+async def test_read_requests_do_not_commit(primary_and_replica, routed_client: AsyncClient):
+    replica_engine = primary_and_replica.replicas[0].engine.sync_engine
+    commits = []
+    event.listen(replica_engine, "commit", lambda conn: commits.append(conn))
+    reads = transaction_seconds.count(route="/authors", mode="read")
+
+    response = await routed_client.get("/authors")
+
+    assert response.status_code == 200
+    assert commits == []
+    assert transaction_seconds.count(route="/authors", mode="read") == reads + 1
+
+
+@pytest.mark.asyncio
+async def test_connect_engines_marks_unreachable_replica_down(
+    tmp_path, monkeypatch, primary_and_replica
+):
+    healthy = primary_and_replica.replicas[0]
+    broken = database.Replica(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    )
+    primary_and_replica.replicas = [healthy, broken]
+    monkeypatch.setattr(database.get_engines(), "engine", healthy.engine)
+
+    await database.connect_engines()
+
+    assert healthy.healthy
+    assert not broken.healthy
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_up_and_disposes(monkeypatch):
+    calls = []
+
+    async def record(name):
+        calls.append(name)
+
+    monkeypatch.setattr(main, "connect_engines", lambda: record("connect"))
+    monkeypatch.setattr(main, "dispose_engines", lambda: record("dispose"))
+    monkeypatch.setattr(main.password_hasher, "warm_up", lambda: record("warm_up"))
+    monkeypatch.setattr(main.password_hasher, "shutdown", lambda: calls.append("shutdown"))
+
+    async with main.app.router.lifespan_context(main.app):
+        assert calls == ["connect", "warm_up"]
+    assert calls == ["connect", "warm_up", "shutdown", "dispose"]
@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models import UserRole
+from app.principal import principal_cache
+
+
+@pytest.mark.asyncio
+async def test_principal_is_cached_between_requests(
+    client: AsyncClient, user_token, test_book, query_counter
+):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    await client.post("/orders", json={"book_id": test_book.id, "quantity": 1}, headers=headers)
+
+    query_counter.reset()
+    response = await client.post(
+        "/orders", json={"book_id": test_book.id, "quantity": 1}, headers=headers
+    )
+
+    assert response.status_code == 201
+    assert not any("FROM users" in s for s in query_counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_invalidated_on_role_change(
+    client: AsyncClient, db_session, test_user, user_token
+):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    payload = {"name": "Author", "bio": "Bio", "birth_date": "1980-01-01"}
+
+    response = await client.post("/authors", json=payload, headers=headers)
+    assert response.status_code == 403
+    assert len(principal_cache) == 1
+
+    test_user.role = UserRole.ADMIN
+    await db_session.commit()
+    assert len(principal_cache) == 0
+
+    response = await client.post("/authors", json=payload, headers=headers)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_invalidated_on_user_delete(
+    client: AsyncClient, db_session, test_user, user_token
+):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    payload = {"name": "Author", "bio": "Bio", "birth_date": "1980-01-01"}
+
+    response = await client.post("/authors", json=payload, headers=headers)
+    assert response.status_code == 403
+
+    await db_session.delete(test_user)
+    await db_session.commit()
+
+    response = await client.post("/authors", json=payload, headers=headers)
+    assert response.status_code == 401
@@ -0,0 +1,140 @@
+import logging
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import crud
+from app.config import settings
+from app.diagnostics import (
+    SUMMARY_HEADER,
+    QueryDiagnosticsMiddleware,
+    _explain,
+    capture_queries,
+    disable_query_diagnostics,
+    enable_query_diagnostics,
+    query_diagnostics_enabled,
+    statement_shape,
+)
+from app.main import app
+
+
+def test_statement_shape_collapses_bind_lists():
+    assert statement_shape("SELECT * FROM books WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT *\n  FROM books WHERE id IN (?)"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id IN ($1, $2)") == (
+        "SELECT * FROM t WHERE id IN (?)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_flagged(db_session, test_book):
+    with capture_queries() as log:
+        for _ in range(3):
+            await crud.get_book_row(db_session, test_book.id)
+        await crud.author_exists(db_session, test_book.author_id)
+
+    assert log.count == 4
+    [(shape, count)] = log.repeated(threshold=3).items()
+    assert count == 3
+    assert "FROM books" in shape
+
+
+@pytest.mark.asyncio
+async def test_assert_budget_lists_statements(db_session, test_book):
+    with capture_queries() as log:
+        for _ in range(2):
+            await crud.get_book_row(db_session, test_book.id)
+
+    log.assert_budget(2)
+    with pytest.raises(AssertionError, match="2 statements, budget is 1") as error:
+        log.assert_budget(1)
+    assert "1. SELECT" in str(error.value)
+    with pytest.raises(AssertionError, match=r"2x \(max 1\)"):
+        log.assert_budget(5, max_repeats=1)
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_plan(db_session, test_book, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    with caplog.at_level(logging.WARNING, logger="app.diagnostics"), capture_queries():
+        await crud.get_book_row(db_session, test_book.id)
+
+    [record] = [r for r in caplog.records if r.getMessage().startswith("Slow query")]
+    assert "FROM books" in record.getMessage()
+    assert "Plan:" in record.getMessage()
+
+
+class FailingPostgresConnection:
+    """Just enough of a Connection to watch _explain on Postgres."""
+
+    def __init__(self, isolation_level="READ COMMITTED"):
+        self.dialect = SimpleNamespace(name="postgresql")
+        self.isolation_level = isolation_level
+        self.savepoints = []
+
+    def in_transaction(self):
+        return True
+
+    def get_execution_options(self):
+        return {"isolation_level": self.isolation_level}
+
+    @contextmanager
+    def begin_nested(self):
+        self.savepoints.append("open")
+        try:
+            yield
+        except Exception:
+            self.savepoints.append("rolled back")
+            raise
+
+    def exec_driver_sql(self, statement, parameters):
+        raise RuntimeError("relation does not exist")
+
+
+def test_failed_explain_rolls_back_to_a_savepoint():
+    conn = FailingPostgresConnection()
+    assert _explain(conn, "SELECT 1", ()).startswith("EXPLAIN failed")
+    assert conn.savepoints == ["open", "rolled back"]
+
+    autocommit = FailingPostgresConnection(isolation_level="AUTOCOMMIT")
+    assert _explain(autocommit, "SELECT 1", ()).startswith("EXPLAIN failed")
+    assert autocommit.savepoints == []
+
+
+@pytest.mark.asyncio
+async def test_capture_queries_restores_listeners(db_session, test_book):
+    assert not query_diagnostics_enabled()
+    with capture_queries():
+        with capture_queries() as inner:
+            await crud.get_book_row(db_session, test_book.id)
+        # the inner block did not install the listeners, so it leaves them
+        assert query_diagnostics_enabled()
+    assert not query_diagnostics_enabled()
+    assert inner.count == 1
+
+    enable_query_diagnostics()
+    try:
+        with capture_queries():
+            pass
+        assert query_diagnostics_enabled()
+    finally:
+        disable_query_diagnostics()
+
+
+@pytest.mark.asyncio
+async def test_middleware_adds_summary_header(client: AsyncClient, test_book, caplog):
+    transport = ASGITransport(app=QueryDiagnosticsMiddleware(app))
+    enable_query_diagnostics()
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as diagnosed:
+            with caplog.at_level(logging.WARNING, logger="app.diagnostics"):
+                response = await diagnosed.get(f"/books/{test_book.id}")
+    finally:
+        disable_query_diagnostics()
+
+    assert response.status_code == 200
+    assert response.headers[SUMMARY_HEADER].startswith("queries=1;")
+    assert "N+1" not in caplog.text
@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exporter import EXPORT_COLUMNS, encode_rows, stream_catalogue
+from app.models import Author, Book
+
+
+@pytest.fixture
+async def catalogue(db_session: AsyncSession, test_author):
+    other = Author(name="Other Author", birth_date=date(1950, 1, 1))
+    db_session.add(other)
+    await db_session.flush()
+    db_session.add_all(
+        [
+            Book(
+                title=f"Book {i}",
+                description='Line one\nline "two", three',
+                price=100 + i,
+                stock_quantity=i,
+                author_id=test_author.id if i % 2 else other.id,
+            )
+            for i in range(1, 8)
+        ]
+    )
+    await db_session.commit()
+    return test_author
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(client: AsyncClient, admin_token, catalogue):
+    response = await client.get(
+        "/books/export", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"Book {i}" for i in range(1, 8)]
+    assert rows[0] == {
+        "id": rows[0]["id"],
+        "title": "Book 1",
+        "description": 'Line one\nline "two", three',
+        "price": 101,
+        "stock_quantity": 1,
+        "author_id": catalogue.id,
+        "author_name": "Test Author",
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_renders_text_like_the_api(
+    client: AsyncClient, admin_token, test_author, db_session: AsyncSession
+):
+    book = Book(title="Война и мир", description="«Том I»", price=5, author_id=test_author.id)
+    db_session.add(book)
+    await db_session.commit()
+
+    export = await client.get("/books/export", headers={"Authorization": f"Bearer {admin_token}"})
+    api = await client.get(f"/books/{book.id}")
+
+    for fragment in ('"title":"Война и мир"', '"description":"«Том I»"'):
+        assert fragment.encode() in export.content
+        assert fragment.encode() in api.content
+
+
+@pytest.mark.asyncio
+async def test_export_csv_filtered_by_author(client: AsyncClient, admin_token, catalogue):
+    response = await client.get(
+        f"/books/export?format=csv&author_id={catalogue.id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert tuple(reader.fieldnames) == EXPORT_COLUMNS
+    rows = list(reader)
+    assert [row["title"] for row in rows] == ["Book 1", "Book 3", "Book 5", "Book 7"]
+    assert rows[0]["description"] == 'Line one\nline "two", three'
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_batches(db_session: AsyncSession, catalogue):
+    chunks = [
+        chunk
+        async for chunk in encode_rows(
+            stream_catalogue(db_session, batch_size=2), "ndjson", chunk_rows=3
+        )
+    ]
+    assert [chunk.count(b"\n") for chunk in chunks] == [3, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_export_csv_can_be_imported(client: AsyncClient, admin_token, catalogue):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    exported = (await client.get("/books/export?format=csv", headers=headers)).content
+
+    response = await client.post(
+        "/books/import?format=csv", content=exported, headers=headers
+    )
+    assert response.json()["imported"] == 7
+    assert response.json()["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_export_requires_admin(client: AsyncClient, user_token):
+    response = await client.get(
+        "/books/export", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 403
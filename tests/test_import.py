@@ -0,0 +1,137 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app import importer
+
+
+def ndjson(*records) -> bytes:
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records).encode()
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson(client: AsyncClient, admin_token, test_author):
+    body = ndjson(
+        {"title": "Known", "description": "d", "price": 100, "author_name": "Test Author"},
+        {
+            "title": "New",
+            "description": "d",
+            "price": 200,
+            "stock_quantity": 3,
+            "author_name": "Imported Author",
+            "author_birth_date": "1960-02-03",
+        },
+        {"title": "Second New", "description": "d", "price": 1, "author_name": "Imported Author"},
+    )
+    response = await client.post(
+        "/books/import",
+        content=body,
+        headers={
+            "Authorization": f"Bearer {admin_token}",
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report == {
+        "processed": 3,
+        "imported": 3,
+        "failed": 0,
+        "authors_created": 1,
+        "errors": [],
+    }
+
+    books = (await client.get("/books")).json()
+    assert books["total"] == 3
+    assert {book["author"]["name"] for book in books["items"]} == {"Test Author", "Imported Author"}
+
+
+@pytest.mark.asyncio
+async def test_import_reports_row_errors(client: AsyncClient, admin_token, test_author):
+    body = ndjson(
+        {"title": "Good", "description": "d", "price": 100, "author_name": "Test Author"},
+        "{not json",
+        {"title": "Negative", "description": "d", "price": -1, "author_name": "Test Author"},
+        {"title": "Orphan", "description": "d", "price": 1, "author_name": "Nobody"},
+    )
+    response = await client.post(
+        "/books/import",
+        content=body,
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    report = response.json()
+    assert report["imported"] == 1
+    assert report["failed"] == 3
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["error"].startswith("price:")
+    assert "Unknown author" in report["errors"][2]["error"]
+
+
+@pytest.mark.asyncio
+async def test_import_reports_undecodable_and_overlong_lines(
+    client: AsyncClient, admin_token, test_author, monkeypatch
+):
+    monkeypatch.setattr(importer, "MAX_LINE_BYTES", 200)
+    good = ndjson({"title": "Good", "description": "d", "price": 100, "author_name": "Test Author"})
+    body = b"\n".join(
+        [
+            good,
+            b'{"title": "Bad \xff\xfe", "description": "d"}',
+            b'{"title": "' + b"x" * 500 + b'"}',
+            good.replace(b"Good", b"After"),
+        ]
+    )
+    response = await client.post(
+        "/books/import",
+        content=body,
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert report["errors"][0]["error"].startswith("Invalid UTF-8")
+    assert report["errors"][1]["error"] == "Line longer than 200 bytes"
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_drops_the_rest_of_an_overlong_line():
+    async def chunks():
+        for chunk in (b"ok\n", b"x" * 6, b"x" * 6, b"xx\nlast"):
+            yield chunk
+
+    lines = [line async for line in importer.iter_lines(chunks(), max_line_bytes=8)]
+    assert lines == ["ok", importer.BadLine("Line longer than 8 bytes"), "last"]
+
+
+@pytest.mark.asyncio
+async def test_import_csv_with_quoted_newlines(client: AsyncClient, admin_token, test_author):
+    body = (
+        "title,description,price,author_name\n"
+        'Plain,Short,100,Test Author\n'
+        '"Quoted, title","Line one\nLine two",250,Test Author\n'
+        "Broken,row\n"
+    ).encode()
+    response = await client.post(
+        "/books/import?batch_size=1",
+        content=body,
+        headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"},
+    )
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["errors"] == [{"line": 5, "error": "Expected 4 columns, got 2"}]
+
+    books = (await client.get("/books")).json()["items"]
+    assert books[1]["title"] == "Quoted, title"
+    assert books[1]["description"] == "Line one\nLine two"
+
+
+@pytest.mark.asyncio
+async def test_import_requires_admin(client: AsyncClient, user_token):
+    response = await client.post(
+        "/books/import",
+        content=b"",
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 403
@@ -0,0 +1,65 @@
+import pytest
+from httpx import AsyncClient
+
+from app.cache import response_cache
+from app.instrumentation import (
+    UNMATCHED_ROUTE,
+    queries_per_request,
+    request_seconds,
+    requests_in_flight,
+    responses_total,
+)
+from app.security import password_hash_seconds
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client: AsyncClient, test_book):
+    route = "/books/{book_id}"
+    before = request_seconds.count(method="GET", route=route)
+    not_found = responses_total.get(method="GET", route=route, status=404)
+
+    assert (await client.get(f"/books/{test_book.id}")).status_code == 200
+    assert (await client.get("/books/999999")).status_code == 404
+
+    assert request_seconds.count(method="GET", route=route) == before + 2
+    assert responses_total.get(method="GET", route=route, status=404) == not_found + 1
+    assert requests_in_flight.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_unmatched_paths_share_a_label(client: AsyncClient):
+    before = responses_total.get(method="GET", route=UNMATCHED_ROUTE, status=404)
+    await client.get("/no/such/path/1")
+    await client.get("/no/such/path/2")
+    assert responses_total.get(method="GET", route=UNMATCHED_ROUTE, status=404) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_queries_are_counted_per_request(client: AsyncClient, test_book):
+    await response_cache.clear()
+    before = queries_per_request.values.get(("/books/{book_id}",))
+    before_sum = before[1] if before else 0
+
+    await client.get(f"/books/{test_book.id}")
+
+    _, total_queries = queries_per_request.values[("/books/{book_id}",)]
+    assert total_queries == before_sum + 1
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_is_timed(client: AsyncClient):
+    before = password_hash_seconds.count(operation="hash")
+    await client.post(
+        "/auth/register",
+        json={"username": "timed", "email": "timed@example.com", "password": "secret123"},
+    )
+    assert password_hash_seconds.count(operation="hash") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exports_request_metrics(client: AsyncClient):
+    await client.get("/health")
+    body = (await client.get("/metrics")).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert "# TYPE db_query_duration_seconds histogram" in body
@@ -0,0 +1,93 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.fixture
+async def placed_orders(client: AsyncClient, user_token, test_book):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    ids = []
+    for quantity in (1, 2, 3):
+        response = await client.post(
+            "/orders", json={"book_id": test_book.id, "quantity": quantity}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    response = await client.post(
+        "/orders/batch",
+        json={"items": [{"book_id": test_book.id, "quantity": 1}] * 2},
+        headers=headers,
+    )
+    ids.extend(order["id"] for order in response.json()["orders"])
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_list_orders_keyset_pagination(client: AsyncClient, user_token, placed_orders):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    seen = []
+    url = "/orders?limit=2"
+    while url:
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(order["id"] for order in data["items"])
+        url = f"/orders?limit=2&cursor={data['next_cursor']}" if data["next_cursor"] else None
+
+    # newest first
+    assert seen == sorted(placed_orders, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_list_orders_only_own(client: AsyncClient, admin_token, placed_orders):
+    response = await client.get("/orders", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_admin_lists_orders_of_user(
+    client: AsyncClient, admin_token, test_user, placed_orders
+):
+    response = await client.get(
+        f"/orders?user_id={test_user.id}", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == len(placed_orders)
+
+
+@pytest.mark.asyncio
+async def test_user_cannot_list_other_users_orders(
+    client: AsyncClient, user_token, admin_user
+):
+    response = await client.get(
+        f"/orders?user_id={admin_user.id}", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_list_orders_invalid_cursor(client: AsyncClient, user_token):
+    response = await client.get(
+        "/orders?cursor=nope", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_order_summary(client: AsyncClient, user_token, test_user, test_book, placed_orders):
+    response = await client.get(
+        "/orders/summary", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "user_id": test_user.id,
+        "order_count": 5,
+        "total_spent": test_book.price * (1 + 2 + 3 + 1 + 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_order_summary_without_orders(client: AsyncClient, admin_token, admin_user):
+    response = await client.get(
+        "/orders/summary", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.json() == {"user_id": admin_user.id, "order_count": 0, "total_spent": 0}
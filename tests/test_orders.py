@@ -1,5 +1,15 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import Book, Order
+
+
+@pytest.fixture(autouse=True, params=["row_lock", "atomic"])
+def stock_reservation_mode(request, monkeypatch):
+    monkeypatch.setattr(settings, "stock_reservation_mode", request.param)
+    return request.param
 
 
 @pytest.mark.asyncio
@@ -67,3 +77,86 @@ async def test_order_decreases_stock(client: AsyncClient, user_token, test_book,
 
     await db_session.refresh(test_book)
     assert test_book.stock_quantity == initial_stock - 3
+
+
+@pytest.fixture
+async def second_book(db_session, test_author):
+    book = Book(
+        title="Second Book",
+        description="Second description",
+        price=500,
+        stock_quantity=3,
+        author_id=test_author.id,
+    )
+    db_session.add(book)
+    await db_session.commit()
+    await db_session.refresh(book)
+    return book
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch(client: AsyncClient, user_token, test_book, second_book, db_session):
+    response = await client.post(
+        "/orders/batch",
+        json={
+            "items": [
+                {"book_id": second_book.id, "quantity": 2},
+                {"book_id": test_book.id, "quantity": 1},
+                {"book_id": test_book.id, "quantity": 4},
+            ]
+        },
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert [order["quantity"] for order in data["orders"]] == [2, 1, 4]
+    assert all(order["id"] for order in data["orders"])
+    assert data["total_price"] == second_book.price * 2 + test_book.price * 5
+
+    await db_session.refresh(test_book)
+    await db_session.refresh(second_book)
+    assert test_book.stock_quantity == 5
+    assert second_book.stock_quantity == 1
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_is_atomic(
+    client: AsyncClient, user_token, test_book, second_book, db_session
+):
+    response = await client.post(
+        "/orders/batch",
+        json={
+            "items": [
+                {"book_id": test_book.id, "quantity": 1},
+                {"book_id": second_book.id, "quantity": 2},
+                {"book_id": second_book.id, "quantity": 2},
+            ]
+        },
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 400
+    assert "Not enough stock" in response.json()["detail"]
+
+    await db_session.refresh(test_book)
+    assert test_book.stock_quantity == 10
+    assert await db_session.scalar(select(func.count(Order.id))) == 0
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_book_not_found(client: AsyncClient, user_token, test_book):
+    response = await client.post(
+        "/orders/batch",
+        json={"items": [{"book_id": test_book.id, "quantity": 1}, {"book_id": 999, "quantity": 1}]},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_empty(client: AsyncClient, user_token):
+    response = await client.post(
+        "/orders/batch",
+        json={"items": []},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,135 @@
+import pytest
+from httpx import AsyncClient
+
+from app.cache import response_cache
+from app.models import Book, Order
+from app.pagination import encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+
+@pytest.fixture
+async def catalogue(db_session, test_author):
+    db_session.add_all(
+        Book(title=f"Book {i}", description="d", price=100, stock_quantity=5, author_id=test_author.id)
+        for i in range(5)
+    )
+    await db_session.commit()
+    return test_author
+
+
+@pytest.mark.asyncio
+async def test_list_books_budget(client: AsyncClient, catalogue, query_counter):
+    response = await client.get("/books")
+    assert response.status_code == 200
+
+    assert query_counter.count == 2
+    # rendered straight from row tuples, no ORM objects
+    assert query_counter.entities == {}
+
+
+@pytest.mark.asyncio
+async def test_list_books_cursor_budget(client: AsyncClient, catalogue, query_counter):
+    response = await client.get(f"/books?cursor={encode_cursor({'id': 0})}")
+    assert response.status_code == 200
+
+    assert query_counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_list_books_sparse_fields_skip_columns(client: AsyncClient, catalogue, query_counter):
+    response = await client.get("/books?fields=title,price")
+    assert response.status_code == 200
+
+    page_query = query_counter.statements[-1]
+    assert "description" not in page_query
+    assert "authors" not in page_query
+
+
+@pytest.mark.asyncio
+async def test_book_detail_budget(client: AsyncClient, test_book, query_counter):
+    response = await client.get(f"/books/{test_book.id}")
+    assert response.status_code == 200
+
+    assert query_counter.count == 1
+    assert query_counter.entities == {}
+
+
+@pytest.mark.asyncio
+async def test_list_authors_does_not_load_books(client: AsyncClient, catalogue, query_counter):
+    response = await client.get("/authors")
+    assert response.status_code == 200
+
+    assert query_counter.count == 1
+    assert query_counter.entities == {}
+
+
+@pytest.mark.asyncio
+async def test_author_detail_budget(client: AsyncClient, catalogue, query_counter):
+    response = await client.get(f"/authors/{catalogue.id}")
+    assert response.status_code == 200
+    assert len(response.json()["books"]) == 5
+
+    query_counter.assert_budget(2, max_repeats=1)
+    assert query_counter.entities == {}
+
+
+@pytest.mark.asyncio
+async def test_place_order_does_not_load_order_history(
+    client: AsyncClient, db_session, test_user, user_token, test_book, query_counter
+):
+    db_session.add_all(
+        Order(user_id=test_user.id, book_id=test_book.id, quantity=1, total_price=1)
+        for _ in range(10)
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+    query_counter.reset()
+
+    response = await client.post(
+        "/orders",
+        json={"book_id": test_book.id, "quantity": 1},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 201
+
+    assert "Order" in query_counter.entities
+    assert query_counter.entities["Order"] == 1
+    assert "User" not in query_counter.entities
+
+
+
+@pytest.mark.asyncio
+async def test_order_batch_budget(client: AsyncClient, catalogue, user_token, query_counter):
+    books = (await client.get("/books?limit=3")).json()["items"]
+    query_counter.reset()
+
+    response = await client.post(
+        "/orders/batch",
+        json={"items": [{"book_id": book["id"], "quantity": 1} for book in books]},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+    assert response.status_code == 201
+
+    # principal lookup, one locking SELECT, one UPDATE, one multi-row INSERT,
+    # then one upsert each for the user, book and daily sales rollups
+    assert query_counter.count == 7
+
+
+@pytest.mark.asyncio
+async def test_refresh_budget(client: AsyncClient, test_user, query_counter):
+    response = await client.post(
+        "/auth/login", json={"username": "testuser", "password": "testpass123"}
+    )
+    query_counter.reset()
+
+    response = await client.post(
+        "/auth/refresh", json={"refresh_token": response.json()["refresh_token"]}
+    )
+    assert response.status_code == 200
+
+    # claim the presented token (UPDATE ... RETURNING) and insert its successor
+    assert query_counter.count == 2
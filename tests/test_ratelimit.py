@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+import app.ratelimit
+from app.ratelimit import (
+    AdmissionController,
+    InMemoryRateLimitStore,
+    RateLimitStore,
+    client_ip,
+    rate_limited_total,
+    request_cost,
+)
+from app.tokens import token_verifications
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(max_keys=10, clock=clock)
+
+    assert [await store.take("k", 1, rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert await store.take("k", 1, rate=1, burst=3) == pytest.approx(1.0)
+
+    clock.now += 2
+    assert await store.take("k", 2, rate=1, burst=3) == 0
+    assert await store.take("k", 1, rate=1, burst=3) == pytest.approx(1.0)
+    assert await store.take("other", 1, rate=1, burst=3) == 0
+
+
+@pytest.mark.asyncio
+async def test_cost_above_burst_is_clamped():
+    store = InMemoryRateLimitStore(max_keys=10, clock=FakeClock())
+    assert await store.take("k", 50, rate=1, burst=10) == 0
+    assert await store.take("k", 50, rate=1, burst=10) == pytest.approx(10.0)
+
+
+def test_request_costs():
+    assert request_cost("GET", "/books/1", b"") == 1
+    assert request_cost("POST", "/auth/login", b"") == 10
+    assert request_cost("GET", "/books", b"limit=20&offset=0") == 1
+    assert request_cost("GET", "/books", b"limit=20&offset=5000") == 6
+    assert request_cost("GET", "/books/", b"offset=10000000") == 21
+    assert request_cost("GET", "/books", b"offset=abc") == 1
+
+
+def test_client_ip_trusts_only_configured_proxies():
+    scope = {"client": ("10.0.0.1", 1234), "headers": [(b"x-forwarded-for", b"6.6.6.6, 1.2.3.4")]}
+    assert client_ip(scope, 0) == "10.0.0.1"
+    assert client_ip(scope, 1) == "1.2.3.4"
+    assert client_ip(scope, 5) == "6.6.6.6"
+
+
+@pytest.mark.asyncio
+async def test_login_is_limited_per_ip(client: AsyncClient, test_user, rate_limits, monkeypatch):
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    monkeypatch.setattr(rate_limits, "ip_burst", 25)
+    monkeypatch.setattr(rate_limits, "ip_rate", 0.01)
+    before = rate_limited_total.get(bucket="ip")
+
+    credentials = {"username": "testuser", "password": "wrong"}
+    statuses = [(await client.post("/auth/login", json=credentials)).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
+
+    response = await client.post("/auth/login", json=credentials)
+    assert int(response.headers["Retry-After"]) >= 100
+    assert rate_limited_total.get(bucket="ip") == before + 2
+    assert (await client.get("/health")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_use_the_user_bucket(
+    client: AsyncClient, user_token, admin_token, rate_limits, monkeypatch
+):
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    monkeypatch.setattr(rate_limits, "user_burst", 2)
+    monkeypatch.setattr(rate_limits, "user_rate", 0.01)
+
+    user = {"Authorization": f"Bearer {user_token}"}
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    statuses = [(await client.get("/orders", headers=user)).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert (await client.get("/orders", headers=admin)).status_code == 200
+    # anonymous traffic from the same address is not charged to either user
+    assert (await client.get("/books")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_also_spend_from_the_ip_bucket(
+    client: AsyncClient, user_token, admin_token, rate_limits, monkeypatch
+):
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    monkeypatch.setattr(rate_limits, "ip_burst", 2)
+    monkeypatch.setattr(rate_limits, "ip_rate", 0.01)
+    before = rate_limited_total.get(bucket="ip")
+
+    for token in (user_token, admin_token):
+        response = await client.get("/orders", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+    assert (await client.get("/books")).status_code == 429
+    assert rate_limited_total.get(bucket="ip") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_and_dependency_share_one_token_check(
+    client: AsyncClient, user_token, rate_limits, monkeypatch
+):
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    checks = sum(token_verifications.get(result=r) for r in ("verified", "cached"))
+
+    response = await client.get("/orders", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == 200
+    assert sum(token_verifications.get(result=r) for r in ("verified", "cached")) == checks + 1
+
+
+@pytest.mark.asyncio
+async def test_store_is_pluggable(client: AsyncClient, rate_limits, monkeypatch):
+    class DenyAll(RateLimitStore):
+        async def take(self, key, cost, rate, burst):
+            return 2.5
+
+        async def clear(self):
+            pass
+
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    monkeypatch.setattr(rate_limits, "store", DenyAll())
+
+    response = await client.get("/books")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+@pytest.mark.asyncio
+async def test_admission_sheds_load_when_slots_stay_busy(client: AsyncClient, monkeypatch):
+    controller = AdmissionController(limit=1, max_queued=1, timeout=0.05)
+    monkeypatch.setattr(app.ratelimit, "admission", controller)
+
+    assert await controller.acquire()
+    response = await client.get("/books")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    # a queued request gets the slot as soon as it is released
+    controller.timeout = 10
+    waiting = asyncio.ensure_future(client.get("/books"))
+    while controller.queued == 0:
+        await asyncio.sleep(0.001)
+    controller.release()
+    assert (await waiting).status_code == 200
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_immediately_when_queue_is_full():
+    controller = AdmissionController(limit=1, max_queued=0, timeout=10)
+    assert await controller.acquire()
+    assert not await controller.acquire()
+    controller.release()
+    assert await controller.acquire()
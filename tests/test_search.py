@@ -0,0 +1,101 @@
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models import Author, Book
+from app.search import search_index
+
+
+@pytest.fixture
+async def catalogue(db_session):
+    tolkien = Author(name="J. R. R. Tolkien", birth_date=date(1892, 1, 3))
+    herbert = Author(name="Frank Herbert", birth_date=date(1920, 10, 8))
+    db_session.add_all([tolkien, herbert])
+    await db_session.flush()
+    books = [
+        ("The Hobbit", "A dragon and a ring", tolkien),
+        ("The Silmarillion", "Elves and the ring", tolkien),
+        ("Dune", "Spice, sand and a desert planet", herbert),
+        ("Dune Messiah", "The emperor and the ring of sand", herbert),
+    ]
+    db_session.add_all(
+        Book(title=title, description=description, price=1, author_id=author.id)
+        for title, description, author in books
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_title_above_description(client: AsyncClient, catalogue):
+    response = await client.get("/search?q=dune")
+    assert response.status_code == 200
+    titles = [item["title"] for item in response.json()["items"]]
+    assert titles == ["Dune", "Dune Messiah"]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_author_name(client: AsyncClient, catalogue):
+    response = await client.get("/search?q=tolkien")
+    titles = {item["title"] for item in response.json()["items"]}
+    assert titles == {"The Hobbit", "The Silmarillion"}
+
+
+@pytest.mark.asyncio
+async def test_search_requires_all_terms(client: AsyncClient, catalogue):
+    response = await client.get("/search?q=ring sand")
+    titles = [item["title"] for item in response.json()["items"]]
+    assert titles == ["Dune Messiah"]
+
+
+@pytest.mark.asyncio
+async def test_search_sees_new_books(client: AsyncClient, catalogue, admin_token):
+    assert (await client.get("/search?q=arrakis")).json()["items"] == []
+
+    authors = (await client.get("/authors")).json()
+    await client.post(
+        "/books",
+        json={
+            "title": "Children of Dune",
+            "description": "Arrakis again",
+            "price": 1,
+            "author_id": authors[1]["id"],
+        },
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    titles = [item["title"] for item in (await client.get("/search?q=arrakis")).json()["items"]]
+    assert titles == ["Children of Dune"]
+
+
+@pytest.mark.asyncio
+async def test_stock_changes_keep_the_index(client: AsyncClient, catalogue, db_session):
+    assert len((await client.get("/search?q=dune")).json()["items"]) == 2
+    book = await db_session.scalar(select(Book).where(Book.title == "Dune"))
+
+    book.stock_quantity -= 1
+    await db_session.commit()
+    assert not search_index.stale
+
+    book.title = "Dune Chronicles"
+    await db_session.commit()
+    assert search_index.stale
+    titles = [item["title"] for item in (await client.get("/search?q=chronicles")).json()["items"]]
+    assert titles == ["Dune Chronicles"]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete(client: AsyncClient, catalogue):
+    response = await client.get("/search/autocomplete?prefix=du")
+    assert response.status_code == 200
+    assert [s["text"] for s in response.json()] == ["Dune", "Dune Messiah"]
+
+    response = await client.get("/search/autocomplete?prefix=FRA")
+    assert [(s["kind"], s["text"]) for s in response.json()] == [("author", "Frank Herbert")]
+
+
+@pytest.mark.asyncio
+async def test_search_empty_query_rejected(client: AsyncClient):
+    response = await client.get("/search?q=")
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timezone
+
+import orjson
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models import Book
+from app.schemas import AuthorResponse, AuthorWithBooksResponse, PaginatedBooks
+from app.serialization import author_with_books, book_item, book_page, dumps
+
+
+@pytest.fixture
+async def catalogue(db_session: AsyncSession, test_author):
+    db_session.add_all(
+        Book(
+            title=f"Book {i}",
+            description="Описание",
+            price=100 * i,
+            stock_quantity=i,
+            author_id=test_author.id,
+        )
+        for i in range(3)
+    )
+    await db_session.commit()
+    return test_author
+
+
+@pytest.mark.asyncio
+async def test_book_page_matches_response_model(db_session: AsyncSession, catalogue):
+    rows, total = await crud.get_book_rows(db_session)
+    books, _ = await crud.get_books(db_session)
+
+    fast = dumps(book_page([book_item(row) for row in rows], total, 20, 0, None))
+    expected = PaginatedBooks(items=books, total=total, limit=20, offset=0).model_dump_json()
+    assert orjson.loads(fast) == orjson.loads(expected)
+
+
+@pytest.mark.asyncio
+async def test_author_detail_matches_response_model(db_session: AsyncSession, catalogue):
+    author = await crud.get_author_row(db_session, catalogue.id)
+    books = await crud.get_author_book_rows(db_session, catalogue.id)
+
+    fast = dumps(author_with_books(author, books))
+    expected = AuthorWithBooksResponse.model_validate(
+        await crud.get_author(db_session, catalogue.id)
+    ).model_dump_json()
+    assert orjson.loads(fast) == orjson.loads(expected)
+
+
+def test_datetimes_render_like_pydantic():
+    value = datetime(2024, 1, 2, 3, 4, 5, 120, tzinfo=timezone.utc)
+    assert dumps({"at": value}) == b'{"at":"2024-01-02T03:04:05.000120Z"}'
+
+
+def test_response_models_do_not_revalidate_stored_data():
+    # the future-date rule guards input only
+    author = AuthorResponse(id=1, name="Time Traveller", birth_date=date(9999, 1, 1))
+    assert author.birth_date.year == 9999
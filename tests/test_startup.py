@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from httpx import AsyncClient
+
+from app.instrumentation import process_age, time_to_first_response_seconds
+
+
+def run_python(code: str, env: dict) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_importing_the_app_defers_engine_and_crypto():
+    output = run_python(
+        "import sys, app.main, app.database as d; "
+        "print(d._engines, [m for m in ('passlib', 'jose', 'asyncpg', 'aiosqlite') "
+        "if m in sys.modules])",
+        env=os.environ.copy(),
+    )
+    assert output == "None []"
+
+
+def test_models_import_without_settings():
+    env = {key: value for key, value in os.environ.items() if key in ("PATH", "PYTHONPATH")}
+    output = run_python(
+        "import app.models, app.schemas, app.config as c; "
+        "print(c.get_settings.cache_info().currsize)",
+        env=env,
+    )
+    assert output == "0"
+
+
+@pytest.mark.asyncio
+async def test_time_to_first_response_is_recorded(client: AsyncClient):
+    assert (await client.get("/health")).status_code == 200
+    assert 0 < time_to_first_response_seconds.get() <= process_age()
@@ -0,0 +1,178 @@
+import base64
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from httpx import AsyncClient
+
+from app.security import create_access_token
+from app.tokens import (
+    HMACBackend,
+    InMemoryRevocationStore,
+    InvalidToken,
+    JoseBackend,
+    TokenVerifier,
+    get_token_verifier,
+)
+
+SECRET = "test-secret"
+
+
+def claims(ttl: float = 60, **extra) -> dict:
+    return {"sub": "1", "exp": int(time.time() + ttl), **extra}
+
+
+@pytest.mark.parametrize(
+    "issuer,verifier", [(HMACBackend, JoseBackend), (JoseBackend, HMACBackend)]
+)
+def test_backends_are_interchangeable(issuer, verifier):
+    token = issuer(SECRET, "HS256", key_id="k1").encode(claims())
+    assert verifier(SECRET, "HS256", key_id="k1").decode(token)["sub"] == "1"
+
+
+@pytest.mark.parametrize("backend_cls", [HMACBackend, JoseBackend])
+def test_backends_reject_bad_tokens(backend_cls):
+    backend = backend_cls(SECRET, "HS256")
+    header, payload, signature = backend.encode(claims()).split(".")
+    forged = HMACBackend(SECRET, "HS256").encode(claims(sub="2")).split(".")[1]
+
+    for token in (
+        f"{header}.{forged}.{signature}",
+        backend_cls("other-secret", "HS256").encode(claims()),
+        backend.encode(claims(ttl=-1)),
+        "not-a-token",
+        f"{header}.{payload}",
+    ):
+        with pytest.raises(InvalidToken):
+            backend.decode(token)
+
+
+def token_with_header(header: dict) -> str:
+    def segment(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return f"{segment(header)}.{segment(claims())}.c2lnbmF0dXJl"
+
+
+@pytest.mark.parametrize("backend_cls", [HMACBackend, JoseBackend])
+@pytest.mark.parametrize("kid", [["k1"], {"k": 1}, 1, None])
+def test_backends_reject_non_string_kid(backend_cls, kid):
+    backend = backend_cls(SECRET, "HS256", key_id="k1")
+    with pytest.raises(InvalidToken):
+        backend.decode(token_with_header({"alg": "HS256", "typ": "JWT", "kid": kid}))
+
+
+@pytest.mark.asyncio
+async def test_malformed_kid_is_unauthorized_not_an_error(client: AsyncClient, rate_limits, monkeypatch):
+    # the rate limiter verifies bearer tokens on every route, public ones included
+    monkeypatch.setattr(rate_limits, "enabled", True)
+    token = token_with_header({"alg": "HS256", "typ": "JWT", "kid": ["x"]})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert (await client.get("/books", headers=headers)).status_code == 200
+    assert (await client.get("/orders", headers=headers)).status_code == 401
+
+
+def test_hmac_backend_rejects_other_algorithms():
+    token = JoseBackend(SECRET, "HS512").encode(claims())
+    with pytest.raises(InvalidToken):
+        HMACBackend(SECRET, "HS256").decode(token)
+
+
+@pytest.mark.parametrize("backend_cls", [HMACBackend, JoseBackend])
+def test_key_rotation_by_kid(backend_cls):
+    old = backend_cls("old-secret", "HS256", key_id="2026-01")
+    token = old.encode(claims())
+
+    rotated = backend_cls(
+        "new-secret", "HS256", key_id="2026-10", verify_keys={"2026-01": "old-secret"}
+    )
+    assert rotated.decode(token)["sub"] == "1"
+    assert rotated.decode(rotated.encode(claims()))["sub"] == "1"
+
+    retired = backend_cls("new-secret", "HS256", key_id="2026-10")
+    with pytest.raises(InvalidToken):
+        retired.decode(token)
+
+
+def test_asymmetric_keys_need_a_public_key_for_the_signing_kid():
+    key = ec.generate_private_key(ec.SECP256R1())
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+    with pytest.raises(ValueError):
+        JoseBackend(private_pem, "ES256", key_id="k1")
+
+    backend = JoseBackend(private_pem, "ES256", key_id="k1", verify_keys={"k1": public_pem})
+    assert backend.decode(backend.encode(claims()))["sub"] == "1"
+
+
+class CountingBackend(HMACBackend):
+    decodes = 0
+
+    def decode(self, token):
+        self.decodes += 1
+        return super().decode(token)
+
+
+@pytest.mark.asyncio
+async def test_verifier_caches_claims_until_exp():
+    backend = CountingBackend(SECRET, "HS256")
+    verifier = TokenVerifier(backend, InMemoryRevocationStore(), max_size=10, ttl=300)
+    token = backend.encode(claims(ttl=2))
+
+    assert (await verifier.verify(token))["sub"] == "1"
+    assert (await verifier.verify(token))["sub"] == "1"
+    assert backend.decodes == 1
+    assert len(verifier.cache) == 1
+
+    expires_at, _ = next(iter(verifier.cache._data.values()))
+    assert expires_at <= time.monotonic() + 2
+
+    assert await verifier.verify(token + "x") is None
+    assert len(verifier.cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_revoked_tokens_are_rejected_even_when_cached():
+    backend = HMACBackend(SECRET, "HS256")
+    revocations = InMemoryRevocationStore()
+    verifier = TokenVerifier(backend, revocations, max_size=10, ttl=300)
+    token = backend.encode(claims(jti="a"))
+    other = backend.encode(claims(jti="b"))
+
+    assert await verifier.verify(token)
+    assert await verifier.revoke(await verifier.verify(token))
+    assert await verifier.verify(token) is None
+    assert await verifier.verify(other)
+
+
+@pytest.mark.asyncio
+async def test_revocation_store_prunes_expired_entries():
+    store = InMemoryRevocationStore(prune_interval=0)
+    await store.revoke("expired", time.time() - 1)
+    await store.revoke("live", time.time() + 60)
+    assert len(store) == 1
+    assert await store.is_revoked("live")
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_only_the_presented_token(client: AsyncClient, test_user):
+    token = create_access_token({"sub": str(test_user.id)})
+    other = create_access_token({"sub": str(test_user.id)})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert (await client.get("/orders", headers=headers)).status_code == 200
+    assert (await client.post("/auth/logout", headers=headers)).status_code == 204
+    assert (await client.get("/orders", headers=headers)).status_code == 401
+    assert (await client.post("/auth/logout", headers=headers)).status_code == 401
+
+    response = await client.get("/orders", headers={"Authorization": f"Bearer {other}"})
+    assert response.status_code == 200
+    assert get_token_verifier().cache.hits > 0